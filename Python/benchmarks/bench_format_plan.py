@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark formattazione tabelle
+Confronta la risoluzione per cella (percorso originale) con il piano compilato
+applicato riga per riga e colonna per colonna
+
+Con --report le righe simulano un report da stored procedure: colonne
+numeriche, decimali e date con valori variabili.
+
+Uso: python benchmarks/bench_format_plan.py [--rows 5000] [--cols 60] [--report]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.formatters import SmartFormatter, TableFormatter
+
+
+FORMATTER_CYCLE = ['monospace_id', 'datetime', 'status_badge', 'number', 'decimal', 'text']
+
+# Report numerico: quantità, importi e date
+REPORT_CYCLE = ['number', 'decimal', 'decimal', 'number', 'datetime']
+
+
+def build_dataset(rows_count, cols_count, cycle=FORMATTER_CYCLE):
+    """Genera schema, override e righe sintetiche"""
+    
+    columns = []
+    for i in range(cols_count):
+        columns.append({
+            'name': f'COL_{i:02d}',
+            'type': 'VARCHAR(50)',
+            'suggested_formatter': cycle[i % len(cycle)]
+        })
+    
+    schema = {'name': 'BENCH', 'columns': columns}
+    overrides = {'columns': {'COL_02': {'formatter': 'status_badge', 'status_colors': {'WAIT': 'yellow'}}}}
+    
+    sample_values = {
+        'monospace_id': 123456,
+        'datetime': datetime(2025, 1, 1, 12, 30),
+        'status_badge': 'COMPL',
+        'number': 1234567,
+        'decimal': 1234.5678,
+        'text': 'Testo di esempio'
+    }
+    
+    column_names = [col['name'] for col in columns]
+    row = tuple(sample_values[col['suggested_formatter']] for col in columns)
+    rows = [row for _ in range(rows_count)]
+    
+    return schema, overrides, column_names, rows
+
+
+def build_report_rows(columns, rows_count, seed=0):
+    """Righe con valori variabili (quantità ripetute, importi e timestamp quasi tutti distinti)"""
+    
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    generators = {
+        'number': lambda: rng.randint(0, 500) if rng.random() < 0.8 else rng.randint(0, 10 ** 7),
+        'decimal': lambda: round(rng.uniform(-1e5, 1e6), 4),
+        'datetime': lambda: start + timedelta(seconds=rng.randint(0, 10 ** 7))
+    }
+    
+    kinds = [col['suggested_formatter'] for col in columns]
+    return [tuple(generators[kind]() for kind in kinds) for _ in range(rows_count)]
+
+
+def format_per_cell(formatter, rows, columns):
+    """Percorso originale: metadati e formatter risolti per ogni cella"""
+    
+    formatted_rows = []
+    
+    for row in rows:
+        formatted_row = {}
+        for col_name, value in zip(columns, row):
+            col_meta = formatter._get_column_metadata(col_name)
+            formatter_type = formatter._get_formatter_for_column(col_name, col_meta)
+            formatted_row[col_name] = SmartFormatter.format_value(
+                value,
+                formatter_type,
+                col_name,
+                formatter.overrides.get('columns', {}).get(col_name)
+            )
+        formatted_rows.append(tuple(formatted_row.values()))
+    
+    return formatted_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark piano di formattazione')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--cols', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--report', action='store_true', help='Report numerico con valori variabili')
+    args = parser.parse_args()
+    
+    if args.report:
+        schema, overrides, columns, _ = build_dataset(0, args.cols, REPORT_CYCLE)
+        rows = build_report_rows(schema['columns'], args.rows)
+    else:
+        schema, overrides, columns, rows = build_dataset(args.rows, args.cols)
+    formatter = TableFormatter(schema, overrides)
+    
+    # Verifica che i tre percorsi producano lo stesso output
+    expected = [[cell.to_dict() for cell in row] for row in format_per_cell(formatter, rows[:200], columns)]
+    by_row = [[cell.to_dict() for cell in row] for row in formatter.iter_format_table_data(rows[:200], columns)]
+    by_column = [[cell.to_dict() for cell in row] for row in formatter.format_table_data(rows[:200], columns)]
+    assert expected == by_row == by_column
+    
+    per_cell = min(timeit.repeat(lambda: format_per_cell(formatter, rows, columns), number=1, repeat=args.repeat))
+    planned = min(timeit.repeat(lambda: list(formatter.iter_format_table_data(rows, columns)), number=1, repeat=args.repeat))
+    columnar = min(timeit.repeat(lambda: formatter.format_table_data(rows, columns), number=1, repeat=args.repeat))
+    
+    print(f"\n📊 Formattazione {args.rows} righe x {args.cols} colonne")
+    print("=" * 60)
+    print(f"Per cella (originale): {per_cell * 1000:8.1f} ms")
+    print(f"Piano, per riga:       {planned * 1000:8.1f} ms   ({per_cell / planned:5.2f}x)")
+    print(f"Piano, per colonna:    {columnar * 1000:8.1f} ms   ({per_cell / columnar:5.2f}x)")
+    print("=" * 60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
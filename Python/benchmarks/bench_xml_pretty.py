@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark formattazione XML
+Confronta minidom (percorso originale) con il backend in streaming e lxml
+
+Il corpus sintetico riproduce i messaggi HOST_IMPORT (testata, pallet con
+SSCC, righe articolo); con --corpus si usano invece file .xml reali.
+
+Uso: python benchmarks/bench_xml_pretty.py [--corpus DIR] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.xml_pretty import BACKENDS, pretty_print_xml, preview_xml, XmlFormatError
+
+
+# Nome -> numero di pallet nel messaggio sintetico
+CORPUS_SIZES = {
+    'small': 2,
+    'medium': 60,
+    'large': 1200
+}
+
+
+def build_message(pallets, seed):
+    """Genera un messaggio di import con `pallets` pallet e alcune righe articolo ciascuno"""
+    
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<HostMessage xmlns="urn:systore:host" version="2.1">',
+        '<Header><MsgType>RECEIPT</MsgType><Sender>HOST01</Sender>',
+        f'<MsgId>{seed:010d}</MsgId><Created>2025-01-01T10:00:00</Created></Header>',
+        '<Pallets>'
+    ]
+    
+    for p in range(pallets):
+        sscc = ''.join(rng.choice('0123456789') for _ in range(18))
+        parts.append(f'<Pallet sscc="{sscc}" type="EUR"><Location>A-{p % 40:02d}-{p % 7}</Location><Lines>')
+        for line in range(rng.randint(1, 6)):
+            parts.append(
+                f'<Line nr="{line + 1}"><Sku>ART{rng.randint(1, 99999):05d}</Sku>'
+                f'<Description>Articolo &amp; confezione {rng.randint(1, 500)}</Description>'
+                f'<Qty uom="PZ">{rng.randint(1, 240)}</Qty><Lot>L{rng.randint(1000, 9999)}</Lot>'
+                f'<Expiry>2026-{rng.randint(1, 12):02d}-28</Expiry></Line>'
+            )
+        parts.append('</Lines></Pallet>')
+    
+    parts.append('</Pallets></HostMessage>')
+    return ''.join(parts)
+
+
+def load_corpus(directory):
+    """Legge i file .xml di una cartella (nome file -> contenuto)"""
+    
+    return {path.name: path.read_text(encoding='utf-8', errors='replace') for path in sorted(Path(directory).glob('*.xml'))}
+
+
+def measure(func, repeat):
+    """Tempo minimo (s) e picco di memoria allocata (byte) di una chiamata"""
+    
+    elapsed = min(timeit.repeat(func, number=1, repeat=repeat))
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return elapsed, peak
+
+
+def minidom_preview(document):
+    """Anteprima del percorso originale: documento completo formattato, prime 2 righe"""
+    
+    lines = pretty_print_xml(document, backend='minidom').split('\n')
+    return '\n'.join(lines[:2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark formattazione XML')
+    parser.add_argument('--corpus', help='Cartella con messaggi .xml reali')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = {name: build_message(pallets, seed) for seed, (name, pallets) in enumerate(CORPUS_SIZES.items())}
+        
+        # Messaggio troncato dall'host (XML non valido)
+        corpus['truncated'] = corpus['medium'][:len(corpus['medium']) // 2]
+    
+    backends = [name for name in ('minidom', 'stream', 'lxml') if name in BACKENDS]
+    
+    print("\n📊 Formattazione XML (popup)")
+    print("=" * 72)
+    print(f"{'Messaggio':<16}{'KB':>8}  " + ''.join(f"{name:>16}" for name in backends))
+    
+    for name, document in corpus.items():
+        row = f"{name:<16}{len(document) / 1024:>8.1f}  "
+        
+        for backend in backends:
+            try:
+                elapsed, peak = measure(lambda: pretty_print_xml(document, backend=backend), args.repeat)
+                row += f"{elapsed * 1000:>7.1f}ms {peak / 1048576:>5.1f}MB"
+            except XmlFormatError:
+                row += f"{'invalid':>16}"
+        
+        print(row)
+    
+    print("\n📊 Anteprima cella (rendering pagina)")
+    print("=" * 72)
+    
+    for name, document in corpus.items():
+        streamed, _ = measure(lambda: preview_xml(document), args.repeat)
+        
+        # L'anteprima legge solo l'inizio: funziona anche sui messaggi troncati
+        try:
+            original, _ = measure(lambda: minidom_preview(document), args.repeat)
+        except XmlFormatError:
+            print(f"{name:<16}minidom  invalid   streaming {streamed * 1000:8.3f} ms")
+            continue
+        
+        print(
+            f"{name:<16}minidom {original * 1000:8.2f} ms   "
+            f"streaming {streamed * 1000:8.3f} ms   ({original / streamed:,.0f}x)"
+        )
+    
+    print("=" * 72 + "\n")
+
+
+if __name__ == '__main__':
+    main()
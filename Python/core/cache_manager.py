@@ -3,6 +3,11 @@ Cache Manager - Gestisce cache dei metadati e configurazioni
 """
 
 import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
@@ -13,9 +18,19 @@ logger = logging.getLogger(__name__)
 class CacheManager:
     """Gestisce cache per performance ottimali"""
     
-    def __init__(self, cache_dir='metadata'):
+    # File di cache in cache_dir: JSON e cache binaria dello schema (db_schema.bin, indice incluso)
+    CACHE_PATTERNS = ('*.json', '*.bin')
+    
+    def __init__(self, cache_dir='metadata', max_result_bytes=64 * 1024 * 1024):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        
+        # Cache risultati query: chiave -> (vista, valore, dimensione, scadenza), in ordine LRU
+        self.max_result_bytes = max_result_bytes
+        self._results = OrderedDict()
+        self._results_bytes = 0
+        self._results_lock = threading.Lock()
+        self._result_stats = {}
     
     def is_cache_valid(self, cache_file, max_age_hours=1):
         """
@@ -64,7 +79,7 @@ class CacheManager:
             
             logger.debug(f"Loaded cache: {cache_name}")
             return data
-            
+        
         except Exception as e:
             logger.error(f"Error loading cache {cache_name}: {e}")
             return None
@@ -85,7 +100,7 @@ class CacheManager:
                 json.dump(data, f, indent=2, ensure_ascii=False, default=str)
             
             logger.debug(f"Saved cache: {cache_name}")
-            
+        
         except Exception as e:
             logger.error(f"Error saving cache {cache_name}: {e}")
     
@@ -98,13 +113,12 @@ class CacheManager:
         """
         
         if cache_name:
-            cache_file = self.cache_dir / f"{cache_name}.json"
-            if cache_file.exists():
+            for cache_file in self._cache_files(cache_name):
                 cache_file.unlink()
-                logger.info(f"Invalidated cache: {cache_name}")
+                logger.info(f"Invalidated cache: {cache_file.name}")
         else:
             # Elimina tutte le cache
-            for cache_file in self.cache_dir.glob("*.json"):
+            for cache_file in self._cache_files():
                 cache_file.unlink()
             logger.info("Invalidated all caches")
     
@@ -118,7 +132,7 @@ class CacheManager:
         
         cache_info = {}
         
-        for cache_file in self.cache_dir.glob("*.json"):
+        for cache_file in self._cache_files():
             cache_name = cache_file.stem
             file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
             age = datetime.now() - file_time
@@ -132,4 +146,182 @@ class CacheManager:
                 'valid': self.is_cache_valid(cache_file)
             }
         
-        return cache_info
\ No newline at end of file
+        return cache_info
+    
+    def _cache_files(self, cache_name='*'):
+        """File di cache (tutti o quelli di un nome, in ogni formato)"""
+        
+        return [
+            cache_file
+            for pattern in self.CACHE_PATTERNS
+            for cache_file in self.cache_dir.glob(pattern.replace('*', cache_name, 1))
+        ]
+    
+    # ========================================================================
+    # CACHE RISULTATI QUERY
+    # ========================================================================
+    
+    @staticmethod
+    def make_result_key(view_name, query, params=None, variant=None):
+        """
+        Costruisce la chiave di cache per una query
+        
+        Args:
+            view_name: Nome tabella/vista
+            query: Query SQL o callable (stored procedure con attributo cache_key)
+            params: Parametri della query
+            variant: Rappresentazione del risultato (es. 'api', o la lingua delle pagine formattate)
+        
+        Returns:
+            tuple: Chiave normalizzata (vista, SQL, parametri, variante)
+        """
+        
+        if callable(query):
+            sql = getattr(query, 'cache_key', repr(query))
+        else:
+            # Normalizza spazi bianchi
+            sql = re.sub(r'\s+', ' ', query).strip()
+        
+        params_key = tuple(sorted((k, repr(v)) for k, v in (params or {}).items()))
+        return (view_name, sql, params_key, variant)
+    
+    def get_result(self, key):
+        """
+        Restituisce un risultato dalla cache se presente e non scaduto
+        
+        Args:
+            key: Chiave generata da make_result_key
+        
+        Returns:
+            Valore in cache o None
+        """
+        
+        view_name = key[0]
+        
+        with self._results_lock:
+            stats = self._result_stats.setdefault(view_name, {'hits': 0, 'misses': 0})
+            entry = self._results.get(key)
+            
+            if entry is None or entry[3] < time.monotonic():
+                if entry is not None:
+                    self._drop_result(key)
+                stats['misses'] += 1
+                return None
+            
+            self._results.move_to_end(key)
+            stats['hits'] += 1
+            return entry[1]
+    
+    def set_result(self, key, value, ttl):
+        """
+        Salva un risultato in cache con scadenza
+        
+        Args:
+            key: Chiave generata da make_result_key
+            value: Valore da salvare (righe formattate)
+            ttl: Durata in secondi
+        """
+        
+        size = self._estimate_size(value)
+        
+        # Risultati più grandi dell'intera cache non vengono salvati
+        if size > self.max_result_bytes:
+            logger.debug(f"Result for {key[0]} too large to cache ({size} bytes)")
+            return
+        
+        with self._results_lock:
+            if key in self._results:
+                self._drop_result(key)
+            
+            self._results[key] = (key[0], value, size, time.monotonic() + ttl)
+            self._results_bytes += size
+            
+            # Eviction LRU fino a rientrare nel limite
+            while self._results_bytes > self.max_result_bytes:
+                oldest_key = next(iter(self._results))
+                self._drop_result(oldest_key)
+    
+    def invalidate_results(self, view_name=None):
+        """
+        Invalida i risultati in cache
+        
+        Args:
+            view_name: Nome tabella/vista, o None per tutte
+        
+        Returns:
+            int: Numero di risultati eliminati
+        """
+        
+        with self._results_lock:
+            keys = [
+                key for key, entry in self._results.items()
+                if view_name is None or entry[0] == view_name
+            ]
+            for key in keys:
+                self._drop_result(key)
+        
+        logger.info(f"Invalidated {len(keys)} cached results ({view_name or 'all views'})")
+        return len(keys)
+    
+    def get_result_cache_info(self):
+        """
+        Statistiche della cache risultati
+        
+        Returns:
+            dict: Dimensione, numero voci e hit/miss per vista
+        """
+        
+        with self._results_lock:
+            entries = {}
+            for view_name, _, size, _ in self._results.values():
+                entries[view_name] = entries.get(view_name, 0) + 1
+            
+            views = {}
+            for view_name, stats in self._result_stats.items():
+                total = stats['hits'] + stats['misses']
+                views[view_name] = {
+                    **stats,
+                    'hit_rate': round(stats['hits'] / total, 3) if total else 0,
+                    'entries': entries.get(view_name, 0)
+                }
+            
+            return {
+                'entries': len(self._results),
+                'size_kb': round(self._results_bytes / 1024, 2),
+                'max_size_kb': round(self.max_result_bytes / 1024, 2),
+                'views': views
+            }
+    
+    def _drop_result(self, key):
+        """Rimuove una voce (chiamare con il lock acquisito)"""
+        
+        entry = self._results.pop(key)
+        self._results_bytes -= entry[2]
+    
+    @staticmethod
+    def _estimate_size(value, sample_size=20):
+        """
+        Stima la memoria occupata da un risultato
+        
+        Per le sequenze di righe misura un campione e lo estende al totale,
+        così la stima non costa quanto una visita completa.
+        """
+        
+        def deep_size(obj, depth=0):
+            size = sys.getsizeof(obj)
+            
+            if depth > 3:
+                return size
+            
+            if isinstance(obj, dict):
+                size += sum(deep_size(k, depth + 1) + deep_size(v, depth + 1) for k, v in obj.items())
+            elif isinstance(obj, (list, tuple)):
+                items = obj[:sample_size] if len(obj) > sample_size else obj
+                sampled = sum(deep_size(item, depth + 1) for item in items)
+                size += sampled * len(obj) // len(items) if items else 0
+            elif hasattr(obj, '__slots__'):
+                size += sum(deep_size(getattr(obj, attr, None), depth + 1) for attr in obj.__slots__)
+            
+            return size
+        
+        return deep_size(value)
@@ -0,0 +1,144 @@
+"""
+Database - Creazione engine SQLAlchemy con pool configurabile e metriche
+"""
+
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Attributo ODBC per la dimensione dei pacchetti di rete (SQL_ATTR_PACKET_SIZE)
+SQL_ATTR_PACKET_SIZE = 112
+
+# Impostazioni pool di default (sovrascrivibili in overrides/global.yaml)
+DEFAULT_POOL_CONFIG = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    'pool_use_lifo': False
+}
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool che misura i tempi di attesa del checkout delle connessioni"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waiting = 0
+        self._peak_checked_out = 0
+    
+    def connect(self):
+        with self._stats_lock:
+            self._waiting += 1
+        
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._waiting -= 1
+        
+        with self._stats_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._peak_checked_out = max(self._peak_checked_out, self.checkedout())
+        
+        return connection
+    
+    def get_stats(self):
+        """
+        Statistiche live del pool
+        
+        Returns:
+            dict: Connessioni in uso/libere, overflow, attese e timeout
+        """
+        
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                'pool_size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': self.overflow(),
+                'max_overflow': self._max_overflow,
+                'waiting_requests': self._waiting,
+                'peak_checked_out': self._peak_checked_out,
+                'total_checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0,
+                'max_wait_ms': round(self._wait_max * 1000, 3)
+            }
+
+
+def create_db_engine(connection_string, db_config=None):
+    """
+    Crea l'engine SQLAlchemy applicando la configurazione del pool
+    
+    Chiavi supportate in `database` di global.yaml: url, pool_size,
+    max_overflow, pool_timeout, pool_pre_ping, pool_recycle, pool_use_lifo,
+    fast_executemany, packet_size.
+    
+    Args:
+        connection_string: Connection string di default
+        db_config: Sezione `database` di global.yaml (opzionale)
+    
+    Returns:
+        Engine: engine con MonitoredQueuePool
+    """
+    
+    db_config = db_config or {}
+    url = make_url(db_config.get('url', connection_string))
+    
+    pool_config = {key: db_config.get(key, value) for key, value in DEFAULT_POOL_CONFIG.items()}
+    engine_kwargs = {'poolclass': MonitoredQueuePool, **pool_config}
+    
+    # Opzioni specifiche ODBC (SQL Server via pyodbc)
+    if url.get_driver_name() == 'pyodbc':
+        engine_kwargs['fast_executemany'] = db_config.get('fast_executemany', True)
+        
+        packet_size = db_config.get('packet_size')
+        if packet_size:
+            engine_kwargs['connect_args'] = {
+                'attrs_before': {SQL_ATTR_PACKET_SIZE: int(packet_size)}
+            }
+    
+    logger.info(
+        f"Database pool: size={pool_config['pool_size']}, "
+        f"overflow={pool_config['max_overflow']}, pre_ping={pool_config['pool_pre_ping']}, "
+        f"recycle={pool_config['pool_recycle']}s"
+    )
+    
+    return create_engine(url, **engine_kwargs)
+
+
+def get_pool_stats(engine):
+    """
+    Statistiche del pool di un engine
+    
+    Returns:
+        dict: Statistiche (solo stato testuale se il pool non è monitorato)
+    """
+    
+    pool = engine.pool
+    
+    if isinstance(pool, MonitoredQueuePool):
+        return pool.get_stats()
+    
+    return {'status': pool.status()}
@@ -0,0 +1,230 @@
+"""
+Exporters - Esportazione in streaming di righe in CSV, NDJSON e Parquet
+"""
+
+import csv
+import io
+import re
+from datetime import date, datetime, time
+from .serialization import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Export Parquet non disponibile
+    pa = None
+    pq = None
+
+
+# Righe accumulate prima di ogni invio al client
+ROWS_PER_CHUNK = 1000
+
+# Righe per row group Parquet (memoria massima usata dall'export)
+PARQUET_ROW_GROUP = 10000
+
+# Tipo SQL (senza lunghezza/precisione) -> tipo Arrow; DECIMAL/NUMERIC con precisione
+# dello schema, gli altri tipi come stringa (vedi parquet_type)
+PARQUET_TYPES = {
+    'BIT': lambda: pa.bool_(),
+    'TINYINT': lambda: pa.int16(),
+    'SMALLINT': lambda: pa.int16(),
+    'INT': lambda: pa.int32(),
+    'INTEGER': lambda: pa.int32(),
+    'BIGINT': lambda: pa.int64(),
+    'REAL': lambda: pa.float32(),
+    'FLOAT': lambda: pa.float64(),
+    'MONEY': lambda: pa.decimal128(19, 4),
+    'SMALLMONEY': lambda: pa.decimal128(10, 4),
+    'DATE': lambda: pa.date32(),
+    'TIME': lambda: pa.time64('us'),
+    'DATETIME': lambda: pa.timestamp('us'),
+    'DATETIME2': lambda: pa.timestamp('us'),
+    'SMALLDATETIME': lambda: pa.timestamp('us'),
+    'BINARY': lambda: pa.binary(),
+    'VARBINARY': lambda: pa.binary(),
+    'IMAGE': lambda: pa.binary(),
+    'TIMESTAMP': lambda: pa.binary()
+}
+
+
+def iter_csv(columns, rows, column_types=None):
+    """
+    Genera un CSV a blocchi
+    
+    Args:
+        columns: Nomi colonna
+        rows: Iterabile di righe (sequenze di valori)
+        column_types: Non usato (stessa firma degli altri formati)
+    
+    Yields:
+        str: Blocchi di testo CSV
+    """
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+
+def iter_ndjson(columns, rows, column_types=None):
+    """
+    Genera NDJSON (un oggetto JSON per riga) a blocchi
+    
+    Args:
+        columns: Nomi colonna
+        rows: Iterabile di righe (sequenze di valori)
+        column_types: Non usato (stessa firma degli altri formati)
+    
+    Yields:
+        bytes: Blocchi di righe JSON separate da newline
+    """
+    
+    chunk = []
+    
+    for row in rows:
+        chunk.append(dumps(dict(zip(columns, row))))
+        
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+
+class _ChunkSink(io.RawIOBase):
+    """File di sola scrittura che accumula i byte scritti fino al prelievo"""
+    
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_type(sql_type):
+    """
+    Tipo Arrow di una colonna a partire dal tipo SQL dello schema
+    
+    Args:
+        sql_type: Tipo come salvato nello schema (es. 'DECIMAL(18, 2)', 'NVARCHAR(50) COLLATE ...')
+    
+    Returns:
+        pyarrow.DataType: Tipo della colonna (stringa per i tipi non mappati)
+    """
+    
+    sql_type = (sql_type or '').upper()
+    base_type = re.split(r'[\s(]', sql_type, 1)[0]
+    
+    if base_type in ('DECIMAL', 'NUMERIC'):
+        match = re.search(r'\((\d+)\s*(?:,\s*(\d+))?\)', sql_type)
+        precision, scale = (int(match.group(1)), int(match.group(2) or 0)) if match else (18, 0)
+        return pa.decimal128(precision, scale)
+    
+    arrow_type = PARQUET_TYPES.get(base_type)
+    return arrow_type() if arrow_type else pa.string()
+
+
+def _to_text(value):
+    """Valore di una colonna esportata come stringa (tipi non mappati o colonne senza tipo)"""
+    
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _to_arrow(values, arrow_type):
+    """Array Arrow del tipo di colonna (valori del driver in un altro tipo, es. date come testo: cast)"""
+    
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(values).cast(arrow_type)
+
+
+def iter_parquet(columns, rows, column_types=None):
+    """
+    Genera un file Parquet un row group alla volta
+    
+    Lo schema del file è fissato prima della prima riga a partire dai tipi SQL
+    (vedi parquet_type): un row group successivo non può cambiarlo e
+    interrompere un export già iniziato. Le colonne senza tipo (viste custom,
+    export formattati) vengono esportate come stringhe.
+    
+    Args:
+        columns: Nomi colonna
+        rows: Iterabile di righe (sequenze di valori)
+        column_types: dict colonna -> tipo SQL dello schema (opzionale)
+    
+    Yields:
+        bytes: Porzioni del file Parquet
+    """
+    
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    
+    column_types = column_types or {}
+    schema = pa.schema([pa.field(col, parquet_type(column_types.get(col))) for col in columns])
+    text_columns = [i for i, field in enumerate(schema) if pa.types.is_string(field.type)]
+    
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    
+    def write_group(group):
+        data = [[row[i] for row in group] for i in range(len(columns))]
+        for i in text_columns:
+            data[i] = [_to_text(value) for value in data[i]]
+        
+        writer.write_table(pa.Table.from_arrays(
+            [_to_arrow(values, field.type) for values, field in zip(data, schema)],
+            schema=schema
+        ))
+    
+    group = []
+    for row in rows:
+        group.append(row)
+        if len(group) >= PARQUET_ROW_GROUP:
+            write_group(group)
+            group = []
+            yield sink.drain()
+    
+    if group:
+        write_group(group)
+    
+    writer.close()
+    yield sink.drain()
+
+
+# Formato -> (generatore, mimetype, estensione file)
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv', 'csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson', 'ndjson'),
+    'parquet': (iter_parquet, 'application/vnd.apache.parquet', 'parquet')
+}
@@ -0,0 +1,245 @@
+"""
+Format Memo - Cache delle celle formattate indirizzata per contenuto
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FormatMemo:
+    """
+    Cache LRU dei testi formattati (anteprime e documenti XML/JSON indentati)
+    
+    La chiave è l'hash del valore grezzo insieme a tipo di formattazione e
+    config della colonna: lo stesso messaggio mostrato da pagine, feed live
+    o popup diversi viene analizzato una volta sola, e una modifica del
+    contenuto produce semplicemente una chiave nuova (niente invalidazione).
+    
+    La memoria è limitata a `max_bytes`; con `spill_dir` le voci rimosse
+    dalla memoria vengono salvate su disco (fino a `spill_max_bytes`) e
+    ricaricate alla richiesta successiva, anche dopo un riavvio.
+    """
+    
+    def __init__(self, max_bytes=32 * 1024 * 1024, spill_dir=None, spill_max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # chiave -> (testo, dimensione), in ordine LRU
+        self._bytes = 0
+        
+        self._spilled = OrderedDict()   # chiave -> byte su disco, dal più vecchio
+        self._spilled_bytes = 0
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._load_spill_index()
+    
+    @staticmethod
+    def make_key(kind, value, config=None):
+        """
+        Chiave di una cella: hash di tipo, config e valore grezzo
+        
+        Args:
+            kind: Tipo di risultato (es. 'preview', 'pretty')
+            value: Valore grezzo (str o bytes)
+            config: Config della colonna che influisce sul risultato
+        
+        Returns:
+            str: Digest esadecimale (usato anche come nome file su disco)
+        """
+        
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(kind.encode('utf-8'))
+        digest.update(json.dumps(config or {}, sort_keys=True, default=str).encode('utf-8'))
+        
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            digest.update(b'b')
+            digest.update(value)
+        else:
+            digest.update(b's')
+            digest.update(str(value).encode('utf-8', errors='surrogatepass'))
+        
+        return digest.hexdigest()
+    
+    def get_or_compute(self, key, compute):
+        """
+        Restituisce il testo in cache o lo calcola con compute() e lo salva
+        
+        Returns:
+            str: Testo formattato
+        """
+        
+        text = self.get(key)
+        if text is None:
+            text = compute()
+            self.put(key, text)
+        return text
+    
+    def get(self, key):
+        """Testo in cache (memoria, poi disco) o None"""
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            
+            spilled = key in self._spilled
+            if not spilled:
+                self.misses += 1
+                return None
+        
+        text = self._read_spilled(key)
+        
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        
+        # Voce di nuovo usata: torna in memoria
+        self.put(key, text)
+        return text
+    
+    def put(self, key, text):
+        """Salva un testo in memoria (eviction LRU, con spill su disco se attivo)"""
+        
+        size = sys.getsizeof(text)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            
+            self._entries[key] = (text, size)
+            self._bytes += size
+            
+            evicted = []
+            while self._bytes > self.max_bytes:
+                old_key, (old_text, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append((old_key, old_text))
+        
+        if self.spill_dir is not None:
+            for old_key, old_text in evicted:
+                self._spill(old_key, old_text)
+    
+    def clear(self):
+        """Svuota memoria e disco e azzera i contatori"""
+        
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            spilled = list(self._spilled)
+            self._spilled.clear()
+            self._spilled_bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+        
+        for key in spilled:
+            self._spill_path(key).unlink(missing_ok=True)
+    
+    def get_stats(self):
+        """
+        Statistiche della cache
+        
+        Returns:
+            dict: Voci e dimensione (memoria e disco), hit/miss e hit rate
+        """
+        
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_kb': round(self._bytes / 1024, 2),
+                'max_size_kb': round(self.max_bytes / 1024, 2),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / total, 3) if total else 0,
+                'spilled_entries': len(self._spilled),
+                'spilled_size_kb': round(self._spilled_bytes / 1024, 2)
+            }
+    
+    def _spill_path(self, key):
+        return self.spill_dir / key[:2] / f'{key}.txt'
+    
+    def _spill(self, key, text):
+        """Scrive una voce rimossa dalla memoria (scrittura atomica) e applica il limite su disco"""
+        
+        data = text.encode('utf-8', errors='surrogatepass')
+        if len(data) > self.spill_max_bytes:
+            return
+        
+        path = self._spill_path(key)
+        
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Format cache spill failed: {e}")
+            return
+        
+        with self._lock:
+            self._spilled_bytes -= self._spilled.pop(key, 0)
+            self._spilled[key] = len(data)
+            self._spilled_bytes += len(data)
+            
+            removed = []
+            while self._spilled_bytes > self.spill_max_bytes:
+                old_key, old_size = self._spilled.popitem(last=False)
+                self._spilled_bytes -= old_size
+                removed.append(old_key)
+        
+        for old_key in removed:
+            self._spill_path(old_key).unlink(missing_ok=True)
+    
+    def _read_spilled(self, key):
+        try:
+            return self._spill_path(key).read_bytes().decode('utf-8', errors='surrogatepass')
+        except OSError:
+            with self._lock:
+                self._spilled_bytes -= self._spilled.pop(key, 0)
+            return None
+    
+    def _load_spill_index(self):
+        """Indicizza le voci su disco di un'esecuzione precedente (dalla più vecchia)"""
+        
+        files = []
+        for path in self.spill_dir.glob('*/*.txt'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        
+        for _, key, size in sorted(files):
+            self._spilled[key] = size
+            self._spilled_bytes += size
+        
+        # Limite ridotto rispetto all'esecuzione precedente: via le voci più vecchie
+        while self._spilled_bytes > self.spill_max_bytes:
+            old_key, old_size = self._spilled.popitem(last=False)
+            self._spilled_bytes -= old_size
+            self._spill_path(old_key).unlink(missing_ok=True)
+        
+        if files:
+            logger.info(f"Format cache: {len(files)} entries on disk ({self._spilled_bytes // 1024} KB)")
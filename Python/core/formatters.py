@@ -3,15 +3,119 @@ Smart Formatters - Formattazione intelligente dei dati per rendering HTML
 """
 
 from datetime import datetime
-import xml.dom.minidom
+from decimal import Decimal, InvalidOperation
+from functools import partial
 import json
+import logging
+from .xml_pretty import pretty_print_xml, preview_xml, XmlFormatError, DEFAULT_MAX_BYTES, DEFAULT_MAX_DEPTH
+from .format_memo import FormatMemo
+from .locale_format import get_locale, ISO_DATETIME_FORMAT
+
+logger = logging.getLogger(__name__)
+
+
+class FormattedCell:
+    """Cella formattata (oggetto compatto con __slots__ al posto di un dict)"""
+    
+    __slots__ = ('value', 'css_class', 'raw', 'full_text', 'full_content',
+                 'is_status', 'is_expandable', 'timestamp')
+    
+    def __init__(self, value, css_class, raw, full_text=None, full_content=None,
+                 is_status=False, is_expandable=False, timestamp=None):
+        self.value = value
+        self.css_class = css_class
+        self.raw = raw
+        self.full_text = full_text
+        self.full_content = full_content
+        self.is_status = is_status
+        self.is_expandable = is_expandable
+        self.timestamp = timestamp
+    
+    def __str__(self):
+        return str(self.value)
+    
+    def to_dict(self):
+        """Rappresentazione dict (solo attributi valorizzati)"""
+        
+        data = {'value': self.value, 'css_class': self.css_class, 'raw': self.raw}
+        
+        for attr in ('full_text', 'full_content', 'is_status', 'is_expandable', 'timestamp'):
+            attr_value = getattr(self, attr)
+            if attr_value:
+                data[attr] = attr_value
+        
+        return data
+
+
+# Cella vuota condivisa (le celle formattate non vanno modificate)
+EMPTY_CELL = FormattedCell('—', 'empty-cell', None)
+
+
+class FormattedRow(tuple):
+    """Riga formattata (tuple di FormattedCell) con la chiave della riga (data-key nel DOM)"""
+    
+    def __new__(cls, cells, key=None):
+        row = super().__new__(cls, cells)
+        row.key = key
+        return row
+    
+    def __reduce__(self):
+        return (FormattedRow, (tuple(self), self.key))
+
+
+def row_key(values):
+    """Chiave di una riga: JSON dei valori di primary key (stesso formato dei feed live)"""
+    
+    return json.dumps(list(values), default=str)
 
 
 class SmartFormatter:
     """Applica formattazione intelligente ai dati della tabella"""
     
+    # Colori di default per i badge di stato
+    DEFAULT_STATUS_COLORS = {
+        'COMPL': 'green',
+        'COMPLETED': 'green',
+        'SUCCESS': 'green',
+        'OK': 'green',
+        'WAIT': 'yellow',
+        'WAITING': 'yellow',
+        'PENDING': 'yellow',
+        'ERR': 'red',
+        'ERROR': 'red',
+        'FAILED': 'red',
+        'CANCEL': 'gray',
+        'CANCELLED': 'gray'
+    }
+    
+    # Caratteri mostrati nell'anteprima delle celle espandibili (XML/JSON)
+    PREVIEW_CHARS = 120
+    
+    # Cache di anteprime e documenti formattati, per hash del contenuto (vedi configure_memo)
+    memo = FormatMemo()
+    
+    # Valori più corti vengono formattati senza cache (l'hash costerebbe quanto la formattazione)
+    MEMO_MIN_CHARS = 512
+    
+    # Formatter compilati per lingua (LocaleFormat -> set, vedi get_formatter_set)
+    _formatter_sets = {}
+    
     @staticmethod
-    def format_value(value, formatter_type, column_name=None, config=None):
+    def configure_memo(max_bytes=32 * 1024 * 1024, spill_dir=None, spill_max_bytes=256 * 1024 * 1024):
+        """
+        Sostituisce la cache delle celle formattate
+        
+        Args:
+            max_bytes: Memoria massima occupata dai testi in cache
+            spill_dir: Cartella per le voci rimosse dalla memoria (None: nessuno spill)
+            spill_max_bytes: Spazio massimo su disco
+        """
+        
+        SmartFormatter.memo = FormatMemo(max_bytes, spill_dir, spill_max_bytes)
+        return SmartFormatter.memo
+    
+    @staticmethod
+    def format_value(value, formatter_type, column_name=None, config=None, locale=None):
         """
         Formatta un valore singolo
         
@@ -20,103 +124,236 @@ class SmartFormatter:
             formatter_type: Tipo di formatter da applicare
             column_name: Nome colonna (opzionale)
             config: Configurazione aggiuntiva (opzionale)
+            locale: Codice lingua (default: DEFAULT_LOCALE)
         
         Returns:
-            dict: {'value': formatted_value, 'css_class': css_class, 'raw': original}
+            FormattedCell: valore formattato, classe CSS e valore originale
         """
         
         if value is None or value == '':
-            return {
-                'value': '—',
-                'css_class': 'empty-cell',
-                'raw': None
-            }
-        
-        formatter_map = {
-            'status_badge': SmartFormatter._format_status,
-            'expandable_code': SmartFormatter._format_expandable_code,
-            'datetime': SmartFormatter._format_datetime,
-            'monospace_id': SmartFormatter._format_monospace_id,
-            'monospace_code': SmartFormatter._format_monospace_code,
-            'number': SmartFormatter._format_number,
-            'decimal': SmartFormatter._format_decimal,
-            'boolean': SmartFormatter._format_boolean,
-            'text': SmartFormatter._format_text
-        }
-        
-        formatter_func = formatter_map.get(formatter_type, SmartFormatter._format_text)
+            return SmartFormatter.format_empty()
+        
+        formatter_func = SmartFormatter.get_formatter(formatter_type, locale)
         return formatter_func(value, column_name, config)
     
+    @staticmethod
+    def format_column(values, formatter_type, column_name=None, config=None, locale=None):
+        """
+        Formatta tutti i valori di una colonna con una sola chiamata
+        
+        Numeri, decimali e date usano formatter dedicati al lavoro per colonna
+        (config risolta una volta, celle riusate per valori ripetuti); gli altri
+        tipi applicano il formatter del valore singolo. L'output è identico a
+        format_value() chiamato su ogni valore.
+        
+        Args:
+            values: Sequenza di valori della colonna
+            formatter_type: Tipo di formatter da applicare
+            column_name: Nome colonna (opzionale)
+            config: Configurazione aggiuntiva (opzionale)
+            locale: Codice lingua (default: DEFAULT_LOCALE)
+        
+        Returns:
+            list: FormattedCell, una per valore
+        """
+        
+        return SmartFormatter.get_column_formatter(formatter_type, locale)(values, column_name, config)
+    
+    @staticmethod
+    def get_column_formatter(formatter_type, locale=None):
+        """
+        Restituisce la funzione di formattazione per colonna di un tipo di formatter
+        
+        Returns:
+            callable: funzione (values, column_name, config) -> list di FormattedCell
+        """
+        
+        formatters = SmartFormatter.get_formatter_set(locale)
+        return formatters.get(formatter_type, formatters['text'])[1]
+    
+    @staticmethod
+    def get_formatter_set(locale=None):
+        """
+        Formatter di tutti i tipi, con le regole di una lingua già applicate
+        
+        Il set viene compilato una volta per lingua: i formatter di numeri,
+        decimali e date ricevono le regole (separatori, formato date) come
+        argomento fisso, senza cercarle a ogni cella.
+        
+        Args:
+            locale: Codice lingua (default o sconosciuto: DEFAULT_LOCALE)
+        
+        Returns:
+            dict: tipo formatter -> (formatter valore, formatter colonna)
+        """
+        
+        rules = get_locale(locale)
+        formatters = SmartFormatter._formatter_sets.get(rules)
+        
+        if formatters is None:
+            formatters = {}
+            for formatter_type, func in FORMATTER_MAP.items():
+                column_func = COLUMN_FORMATTER_MAP.get(formatter_type)
+                
+                if formatter_type in LOCALE_FORMATTERS:
+                    func = partial(func, locale=rules)
+                    column_func = partial(column_func, locale=rules)
+                elif column_func is None:
+                    column_func = SmartFormatter._column_formatter(func)
+                
+                formatters[formatter_type] = (func, column_func)
+            
+            SmartFormatter._formatter_sets[rules] = formatters
+        
+        return formatters
+    
+    @staticmethod
+    def _column_formatter(func):
+        """Formatter per colonna che applica il formatter del valore singolo"""
+        
+        def format_values(values, column_name=None, config=None):
+            return [
+                EMPTY_CELL if value is None or value == '' else func(value, column_name, config)
+                for value in values
+            ]
+        
+        return format_values
+    
+    @staticmethod
+    def format_empty():
+        """Cella vuota (NULL o stringa vuota)"""
+        
+        return EMPTY_CELL
+    
+    @staticmethod
+    def get_formatter(formatter_type, locale=None):
+        """
+        Restituisce la funzione di formattazione per un tipo di formatter
+        
+        Args:
+            formatter_type: Tipo di formatter
+            locale: Codice lingua (default: DEFAULT_LOCALE)
+        
+        Returns:
+            callable: funzione (value, column_name, config) -> FormattedCell
+        """
+        
+        formatters = SmartFormatter.get_formatter_set(locale)
+        return formatters.get(formatter_type, formatters['text'])[0]
+    
     @staticmethod
     def _format_status(value, column_name=None, config=None):
         """Formatta colonne STATUS con badge colorati"""
         
-        # Default colors
-        status_colors = {
-            'COMPL': 'green',
-            'COMPLETED': 'green',
-            'SUCCESS': 'green',
-            'OK': 'green',
-            'WAIT': 'yellow',
-            'WAITING': 'yellow',
-            'PENDING': 'yellow',
-            'ERR': 'red',
-            'ERROR': 'red',
-            'FAILED': 'red',
-            'CANCEL': 'gray',
-            'CANCELLED': 'gray'
-        }
+        status_colors = SmartFormatter.DEFAULT_STATUS_COLORS
         
         # Override con config se disponibile
         if config and 'status_colors' in config:
-            status_colors.update(config['status_colors'])
+            status_colors = {**status_colors, **config['status_colors']}
         
         value_upper = str(value).upper()
         color = status_colors.get(value_upper, 'blue')
         
-        return {
-            'value': value,
-            'css_class': f'campo-evidenziato-{color}',
-            'raw': value,
-            'is_status': True
-        }
+        return FormattedCell(value, f'campo-evidenziato-{color}', value, is_status=True)
     
     @staticmethod
     def _format_expandable_code(value, column_name=None, config=None):
-        """Formatta XML/JSON con popup espandibile"""
+        """
+        Formatta XML/JSON con popup espandibile
+        
+        Produce solo un'anteprima: le prime 2 righe indentate per l'XML (solo
+        l'inizio del documento viene analizzato), altrimenti `preview_chars`
+        caratteri con spazi compattati. Il documento completo formattato viene
+        richiesto al click del popup, quindi peso della pagina e tempo di
+        rendering non dipendono dal payload.
+        Con `lazy: false` il documento formattato viene incluso nella cella
+        (viste custom, le cui righe non si possono rileggere per primary key).
+        """
         
-        # Prova a pretty-print XML
-        if value and (str(value).strip().startswith('<') or 'XML' in str(column_name or '').upper()):
-            try:
-                dom = xml.dom.minidom.parseString(str(value))
-                pretty = dom.toprettyxml(indent="  ")
-            except:
-                pretty = str(value)
+        text = str(value)
+        limit = config.get('preview_chars', SmartFormatter.PREVIEW_CHARS) if config else SmartFormatter.PREVIEW_CHARS
+        
+        if len(text) < SmartFormatter.MEMO_MIN_CHARS:
+            preview = SmartFormatter._build_preview(text, limit)
         else:
-            # Potrebbe essere JSON
+            preview = SmartFormatter.memo.get_or_compute(
+                FormatMemo.make_key('expandable_code:preview', text, config),
+                lambda: SmartFormatter._build_preview(text, limit)
+            )
+        
+        full_content = None
+        if config and config.get('lazy') is False:
+            full_content = SmartFormatter.pretty_print(value, column_name, config)
+        
+        return FormattedCell(preview, 'campo-xml', value, full_content=full_content, is_expandable=True)
+    
+    @staticmethod
+    def _build_preview(text, limit):
+        """Anteprima di una cella espandibile (prime righe XML o testo compattato)"""
+        
+        if text.lstrip().startswith('<'):
             try:
-                parsed = json.loads(str(value))
-                pretty = json.dumps(parsed, indent=2)
-            except:
-                pretty = str(value)
+                return preview_xml(text)[:limit * 2]
+            except XmlFormatError:
+                pass
         
-        # Preview (prime 2 righe)
-        lines = pretty.split('\n')
-        preview = '\n'.join(lines[:2])
-        if len(lines) > 2:
+        head = ' '.join(text[:limit * 2].split())
+        preview = head[:limit]
+        if len(head) > limit or len(text) > limit * 2:
             preview += '...'
+        return preview
+    
+    @staticmethod
+    def pretty_print(value, column_name=None, config=None):
+        """
+        Formatta un documento XML o JSON completo (popup delle celle espandibili)
         
-        return {
-            'value': preview,
-            'css_class': 'campo-xml',
-            'raw': value,
-            'full_content': pretty,
-            'is_expandable': True
-        }
+        L'XML viene indentato in streaming entro `max_bytes` e `max_depth`
+        (config colonna); un documento non valido viene restituito invariato,
+        preceduto da un commento con la posizione dell'errore.
+        Il risultato resta in cache (SmartFormatter.memo) per hash del contenuto.
+        
+        Returns:
+            str: Documento indentato, o il valore originale se non analizzabile
+        """
+        
+        if not isinstance(value, (str, bytes, bytearray, memoryview)) or len(value) < SmartFormatter.MEMO_MIN_CHARS:
+            return SmartFormatter._pretty_print(value, column_name, config or {})
+        
+        return SmartFormatter.memo.get_or_compute(
+            FormatMemo.make_key('expandable_code:pretty', value, {'column': column_name, **(config or {})}),
+            lambda: SmartFormatter._pretty_print(value, column_name, config or {})
+        )
+    
+    @staticmethod
+    def _pretty_print(value, column_name, config):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            text = bytes(value).decode('utf-8', errors='replace')
+        else:
+            text = str(value)
+        
+        # Prova a pretty-print XML
+        if text.strip().startswith('<') or 'XML' in str(column_name or '').upper():
+            try:
+                return pretty_print_xml(
+                    text.strip(),
+                    max_bytes=config.get('max_bytes', DEFAULT_MAX_BYTES),
+                    max_depth=config.get('max_depth', DEFAULT_MAX_DEPTH),
+                    backend=config.get('xml_backend', 'auto')
+                )
+            except XmlFormatError as e:
+                logger.warning(f"Cannot format XML in {column_name}: {e}")
+                return f"<!-- {e} -->\n{text}"
+        
+        # Potrebbe essere JSON
+        try:
+            return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+        except ValueError:
+            return text
     
     @staticmethod
-    def _format_datetime(value, column_name=None, config=None):
-        """Formatta date e timestamp"""
+    def _format_datetime(value, column_name=None, config=None, locale=None):
+        """Formatta date e timestamp (formato date della lingua)"""
         
         if isinstance(value, datetime):
             dt = value
@@ -124,95 +361,62 @@ class SmartFormatter:
             try:
                 dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
             except:
-                return {'value': value, 'css_class': 'datetime', 'raw': value}
+                return FormattedCell(value, 'datetime', value)
         else:
-            return {'value': str(value), 'css_class': 'datetime', 'raw': value}
+            return FormattedCell(str(value), 'datetime', value)
         
-        # Formato: YYYY-MM-DD HH:MM:SS
-        formatted = dt.strftime('%Y-%m-%d %H:%M:%S')
+        # Formato della lingua (default: YYYY-MM-DD HH:MM:SS)
+        formatted = dt.strftime((locale or get_locale()).datetime_format)
         
-        return {
-            'value': formatted,
-            'css_class': 'datetime',
-            'raw': value,
-            'timestamp': dt.timestamp()
-        }
+        return FormattedCell(formatted, 'datetime', value, timestamp=dt.timestamp())
     
     @staticmethod
     def _format_monospace_id(value, column_name=None, config=None):
         """Formatta ID con font monospace"""
         
-        return {
-            'value': str(value),
-            'css_class': 'monospace-id',
-            'raw': value
-        }
+        return FormattedCell(str(value), 'monospace-id', value)
     
     @staticmethod
     def _format_monospace_code(value, column_name=None, config=None):
         """Formatta codici (SSCC, UDC, etc.) con font monospace"""
         
-        return {
-            'value': str(value),
-            'css_class': 'monospace-code',
-            'raw': value
-        }
+        return FormattedCell(str(value), 'monospace-code', value)
     
     @staticmethod
-    def _format_number(value, column_name=None, config=None):
-        """Formatta numeri interi"""
+    def _format_number(value, column_name=None, config=None, locale=None):
+        """Formatta numeri interi (separatore delle migliaia della lingua)"""
         
         try:
             num = int(value)
-            formatted = f"{num:,}".replace(',', '.')  # Formato italiano
+            formatted = (locale or get_locale()).localize(f"{num:,}")
         except:
             formatted = str(value)
         
-        return {
-            'value': formatted,
-            'css_class': 'number',
-            'raw': value
-        }
+        return FormattedCell(formatted, 'number', value)
     
     @staticmethod
-    def _format_decimal(value, column_name=None, config=None):
-        """Formatta numeri decimali"""
+    def _format_decimal(value, column_name=None, config=None, locale=None):
+        """Formatta numeri decimali (separatori della lingua)"""
         
         try:
             num = float(value)
             decimals = config.get('decimals', 2) if config else 2
-            formatted = f"{num:,.{decimals}f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            formatted = (locale or get_locale()).localize(f"{num:,.{decimals}f}")
         except:
             formatted = str(value)
         
-        return {
-            'value': formatted,
-            'css_class': 'decimal',
-            'raw': value
-        }
+        return FormattedCell(formatted, 'decimal', value)
     
     @staticmethod
     def _format_boolean(value, column_name=None, config=None):
         """Formatta valori booleani"""
         
         if value in [True, 1, '1', 'true', 'True', 'TRUE', 'Yes', 'YES']:
-            return {
-                'value': '✓',
-                'css_class': 'boolean-true',
-                'raw': value
-            }
+            return FormattedCell('✓', 'boolean-true', value)
         elif value in [False, 0, '0', 'false', 'False', 'FALSE', 'No', 'NO']:
-            return {
-                'value': '✗',
-                'css_class': 'boolean-false',
-                'raw': value
-            }
+            return FormattedCell('✗', 'boolean-false', value)
         else:
-            return {
-                'value': str(value),
-                'css_class': 'boolean-unknown',
-                'raw': value
-            }
+            return FormattedCell(str(value), 'boolean-unknown', value)
     
     @staticmethod
     def _format_text(value, column_name=None, config=None):
@@ -224,18 +428,125 @@ class SmartFormatter:
         max_length = config.get('max_length', 100) if config else 100
         
         if len(text) > max_length:
-            return {
-                'value': text[:max_length] + '...',
-                'css_class': 'text-truncated',
-                'raw': value,
-                'full_text': text
-            }
-        
-        return {
-            'value': text,
-            'css_class': 'text',
-            'raw': value
-        }
+            return FormattedCell(text[:max_length] + '...', 'text-truncated', value, full_text=text)
+        
+        return FormattedCell(text, 'text', value)
+    
+    @staticmethod
+    def _format_number_column(values, column_name=None, config=None, locale=None):
+        """Formatta una colonna di interi (una cella per valore distinto)"""
+        
+        locale = locale or get_locale()
+        localize = locale.localize
+        
+        cells = []
+        append = cells.append
+        seen = {}
+        
+        for value in values:
+            if value is None or value == '':
+                append(EMPTY_CELL)
+            elif type(value) is int:
+                cell = seen.get(value)
+                if cell is None:
+                    cell = seen[value] = FormattedCell(localize(f"{value:,}"), 'number', value)
+                append(cell)
+            else:
+                append(SmartFormatter._format_number(value, column_name, config, locale))
+        
+        return cells
+    
+    @staticmethod
+    def _format_decimal_column(values, column_name=None, config=None, locale=None):
+        """Formatta una colonna di decimali (numero di decimali risolto una volta)"""
+        
+        localize = (locale or get_locale()).localize
+        decimals = config.get('decimals', 2) if config else 2
+        spec = f",.{decimals}f"
+        
+        cells = []
+        append = cells.append
+        seen = {}
+        
+        for value in values:
+            if value is None or value == '':
+                append(EMPTY_CELL)
+                continue
+            
+            # Valori ripetuti (float o Decimal di DECIMAL/NUMERIC): stessa cella.
+            # Decimal per testo (1.0 e 1.00 hanno raw diversi), float 0.0 escluso (-0.0 ha un formato diverso)
+            value_type = type(value)
+            if value_type is Decimal:
+                key = str(value)
+            elif value_type is float and value:
+                key = value
+            else:
+                key = None
+            
+            if key is not None:
+                cell = seen.get(key)
+                if cell is not None:
+                    append(cell)
+                    continue
+            
+            try:
+                formatted = localize(format(float(value), spec))
+            except (TypeError, ValueError, InvalidOperation):
+                formatted = str(value)
+            
+            cell = FormattedCell(formatted, 'decimal', value)
+            if key is not None:
+                seen[key] = cell
+            append(cell)
+        
+        return cells
+    
+    @staticmethod
+    def _format_datetime_column(values, column_name=None, config=None, locale=None):
+        """Formatta una colonna di date (isoformat al posto di strftime per il formato ISO)"""
+        
+        locale = locale or get_locale()
+        iso_format = locale.datetime_format == ISO_DATETIME_FORMAT
+        
+        cells = []
+        append = cells.append
+        
+        for value in values:
+            if value is None or value == '':
+                append(EMPTY_CELL)
+            elif iso_format and type(value) is datetime and value.tzinfo is None and value.year >= 1000:
+                # Stesso testo di strftime('%Y-%m-%d %H:%M:%S') (anni < 1000: senza zeri)
+                append(FormattedCell(
+                    value.isoformat(' ', 'seconds'), 'datetime', value, timestamp=value.timestamp()
+                ))
+            else:
+                append(SmartFormatter._format_datetime(value, column_name, config, locale))
+        
+        return cells
+
+
+# Mappa tipo formatter -> funzione, costruita una sola volta
+FORMATTER_MAP = {
+    'status_badge': SmartFormatter._format_status,
+    'expandable_code': SmartFormatter._format_expandable_code,
+    'datetime': SmartFormatter._format_datetime,
+    'monospace_id': SmartFormatter._format_monospace_id,
+    'monospace_code': SmartFormatter._format_monospace_code,
+    'number': SmartFormatter._format_number,
+    'decimal': SmartFormatter._format_decimal,
+    'boolean': SmartFormatter._format_boolean,
+    'text': SmartFormatter._format_text
+}
+
+# Formatter per colonna intera (gli altri tipi: formatter del valore singolo)
+COLUMN_FORMATTER_MAP = {
+    'number': SmartFormatter._format_number_column,
+    'decimal': SmartFormatter._format_decimal_column,
+    'datetime': SmartFormatter._format_datetime_column
+}
+
+# Formatter che dipendono dalla lingua (ricevono le regole come argomento `locale`)
+LOCALE_FORMATTERS = ('number', 'decimal', 'datetime')
 
 
 class TableFormatter:
@@ -244,41 +555,165 @@ class TableFormatter:
     def __init__(self, schema, overrides=None):
         self.schema = schema
         self.overrides = overrides or {}
+        
+        # Piani di formattazione compilati, per tupla di colonne e lingua
+        self._plans = {}
     
-    def format_table_data(self, rows):
+    def format_table_data(self, rows, columns, visible_columns=None, key_columns=None, locale=None):
         """
         Formatta tutte le righe di una tabella
         
         Args:
-            rows: Lista di dizionari (righe della query)
+            rows: Lista di tuple (righe della query)
+            columns: Nomi colonna, nell'ordine delle tuple
+            visible_columns: Colonne da formattare (default: tutte)
+            key_columns: Colonne chiave (primary key) da associare a ogni riga (opzionale)
+            locale: Codice lingua per numeri e date (default: DEFAULT_LOCALE)
+        
+        Returns:
+            list: Righe formattate (tuple di FormattedCell, una per colonna visibile)
+        """
+        
+        rows = rows if isinstance(rows, list) else list(rows)
+        
+        # Formattazione per colonna, poi ricomposizione delle righe
+        formatted_columns = self.format_columns(rows, columns, visible_columns, locale)
+        formatted = list(zip(*formatted_columns)) if formatted_columns else [() for _ in rows]
+        
+        if key_columns and all(col in columns for col in key_columns):
+            key_indexes = [list(columns).index(col) for col in key_columns]
+            return [
+                FormattedRow(cells, row_key(row[i] for i in key_indexes))
+                for row, cells in zip(rows, formatted)
+            ]
+        
+        return formatted
+    
+    def format_columns(self, rows, columns, visible_columns=None, locale=None):
+        """
+        Formatta le righe colonna per colonna (un batch per colonna visibile)
+        
+        Args:
+            rows: Lista di tuple (righe della query)
+            columns: Nomi colonna, nell'ordine delle tuple
+            visible_columns: Colonne da formattare (default: tutte)
+            locale: Codice lingua per numeri e date (default: DEFAULT_LOCALE)
         
         Returns:
-            list: Righe formattate con metadati
+            list: Una lista di FormattedCell per colonna visibile, nell'ordine delle righe
         """
         
-        formatted_rows = []
+        plan = self.get_format_plan(tuple(columns), tuple(visible_columns or columns), locale)
+        
+        return [
+            column_func([row[index] for row in rows], col_name, config)
+            for index, col_name, _, config, column_func in plan
+        ]
+    
+    def format_column(self, values, column_name, locale=None):
+        """
+        Formatta i valori di una colonna con il formatter risolto per la tabella
+        
+        Args:
+            values: Sequenza di valori
+            column_name: Nome colonna (schema/override)
+            locale: Codice lingua per numeri e date (default: DEFAULT_LOCALE)
+        
+        Returns:
+            list: FormattedCell, una per valore
+        """
+        
+        (_, _, _, config, column_func), = self.get_format_plan((column_name,), locale=locale)
+        return column_func(values, column_name, config)
+    
+    def iter_format_table_data(self, rows, columns, visible_columns=None, key_columns=None, locale=None):
+        """
+        Formatta le righe una alla volta (per il rendering in streaming)
+        
+        Il piano di formattazione viene risolto una volta sola e poi
+        applicato riga per riga, solo sulle colonne visibili.
+        
+        Args:
+            rows: Iterabile di tuple (righe della query)
+            columns: Nomi colonna, nell'ordine delle tuple
+            visible_columns: Colonne da formattare (default: tutte)
+            key_columns: Colonne chiave (primary key) da associare a ogni riga (opzionale)
+            locale: Codice lingua per numeri e date (default: DEFAULT_LOCALE)
+        
+        Yields:
+            tuple: Riga formattata (FormattedCell per ogni colonna visibile);
+                   FormattedRow con la chiave se key_columns è presente nel risultato
+        """
+        
+        plan = self.get_format_plan(tuple(columns), tuple(visible_columns or columns), locale)
+        
+        key_indexes = None
+        if key_columns and all(col in columns for col in key_columns):
+            key_indexes = [list(columns).index(col) for col in key_columns]
         
         for row in rows:
-            formatted_row = {}
+            cells = []
             
-            for col_name, value in row.items():
-                # Trova metadati colonna
-                col_meta = self._get_column_metadata(col_name)
-                
-                # Determina formatter
-                formatter_type = self._get_formatter_for_column(col_name, col_meta)
-                
-                # Applica formattazione
-                formatted_row[col_name] = SmartFormatter.format_value(
-                    value, 
-                    formatter_type,
-                    col_name,
-                    self.overrides.get('columns', {}).get(col_name)
-                )
+            for index, col_name, func, config, _ in plan:
+                value = row[index]
+                if value is None or value == '':
+                    cells.append(EMPTY_CELL)
+                else:
+                    cells.append(func(value, col_name, config))
             
-            formatted_rows.append(formatted_row)
+            if key_indexes is None:
+                yield tuple(cells)
+            else:
+                yield FormattedRow(cells, row_key(row[i] for i in key_indexes))
+    
+    def get_format_plan(self, columns, visible_columns=None, locale=None):
+        """
+        Restituisce il piano di formattazione compilato per le colonne date
+        
+        Il piano è compilato una volta per lingua: i formatter contengono
+        già separatori e formato date, senza ricerche per cella.
+        
+        Args:
+            columns: Tupla di nomi colonna, nell'ordine delle righe
+            visible_columns: Tupla delle colonne da formattare (default: tutte)
+            locale: Codice lingua (default: DEFAULT_LOCALE)
+        
+        Returns:
+            tuple: ((indice, nome colonna, formatter valore, config, formatter colonna), ...)
+        """
+        
+        key = (columns, visible_columns or columns, locale)
+        plan = self._plans.get(key)
+        
+        if plan is None:
+            plan = self._compile_plan(*key)
+            self._plans[key] = plan
         
-        return formatted_rows
+        return plan
+    
+    def _compile_plan(self, columns, visible_columns, locale=None):
+        """Risolve formatter e config di ogni colonna una volta sola"""
+        
+        formatters = SmartFormatter.get_formatter_set(locale)
+        column_overrides = self.overrides.get('columns', {})
+        index = {name: i for i, name in enumerate(columns)}
+        plan = []
+        
+        for col_name in visible_columns:
+            col_meta = self._get_column_metadata(col_name)
+            formatter_type = self._get_formatter_for_column(col_name, col_meta)
+            
+            func, column_func = formatters.get(formatter_type, formatters['text'])
+            
+            plan.append((
+                index[col_name],
+                col_name,
+                func,
+                column_overrides.get(col_name),
+                column_func
+            ))
+        
+        return tuple(plan)
     
     def _get_column_metadata(self, column_name):
         """Ottiene metadati della colonna dallo schema"""
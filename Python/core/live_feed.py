@@ -0,0 +1,273 @@
+"""
+Live Feed - Aggiornamenti live delle viste tramite Server-Sent Events
+"""
+
+import json
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Subscriber:
+    """Client collegato a un feed (coda eventi dedicata)"""
+    
+    __slots__ = ('queue', 'closed')
+    
+    def __init__(self, max_pending):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+
+class LiveFeed:
+    """
+    Interroga periodicamente il database per una vista e invia ai client
+    solo le righe inserite, modificate o rimosse
+    
+    Un solo thread di polling per feed serve tutti i client collegati:
+    parte con il primo client e si ferma quando l'ultimo si disconnette.
+    Il loader restituisce (colonne, [(chiave riga, celle)]); il confronto
+    con lo snapshot precedente avviene per chiave (primary key).
+    """
+    
+    # Eventi in coda per client prima di disconnetterlo (il client si ricollega)
+    MAX_PENDING = 100
+    
+    # Secondi tra due keep-alive quando non ci sono modifiche
+    HEARTBEAT = 15
+    
+    # Attesa prima della riconnessione automatica del browser (ms)
+    RETRY_MS = 3000
+    
+    def __init__(self, key, loader, interval):
+        self.key = key
+        self.loader = loader
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._stopped = threading.Event()
+        
+        self._columns = None
+        self._snapshot = None   # chiave riga -> celle, nell'ordine della query
+        self.polls = 0
+    
+    def stream(self):
+        """
+        Generatore di eventi SSE per un client
+        
+        Il primo evento ('snapshot') contiene tutte le righe, i successivi
+        ('delta') solo le differenze.
+        """
+        
+        subscriber = self._subscribe()
+        
+        try:
+            yield f"retry: {self.RETRY_MS}\n\n"
+            
+            while True:
+                try:
+                    message = subscriber.queue.get(timeout=self.HEARTBEAT)
+                except queue.Empty:
+                    if subscriber.closed:
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._unsubscribe(subscriber)
+    
+    def stop(self):
+        """Ferma il polling e chiude i client (il browser si ricollega al nuovo feed)"""
+        
+        self._stopped.set()
+        
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        
+        for subscriber in subscribers:
+            self._close(subscriber)
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'polls': self.polls,
+                'rows': len(self._snapshot) if self._snapshot is not None else None,
+                'interval': self.interval
+            }
+    
+    def _subscribe(self):
+        subscriber = _Subscriber(self.MAX_PENDING)
+        
+        with self._lock:
+            self._subscribers.add(subscriber)
+            
+            # Feed già attivo: il nuovo client riceve subito lo stato corrente
+            if self._snapshot is not None:
+                subscriber.queue.put_nowait(self._snapshot_message())
+            
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'live-feed-{self.key}', daemon=True
+                )
+                self._thread.start()
+        
+        return subscriber
+    
+    def _unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def _run(self):
+        """Ciclo di polling (un thread per feed)"""
+        
+        logger.info(f"Live feed {self.key} started (every {self.interval}s)")
+        
+        while not self._stopped.is_set():
+            try:
+                columns, rows = self.loader()
+            except Exception as e:
+                logger.warning(f"Live feed {self.key} poll failed: {e}")
+                self._publish(self._message('poll_error', {'error': str(e)}))
+            else:
+                self._apply(columns, rows)
+            
+            if self._stopped.wait(self.interval):
+                break
+            
+            # Nessun client: il thread termina (riparte con il prossimo client)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._snapshot = None
+                    logger.info(f"Live feed {self.key} idle, polling stopped")
+                    return
+        
+        with self._lock:
+            self._thread = None
+    
+    def _apply(self, columns, rows):
+        """Confronta il risultato con lo snapshot e pubblica le differenze"""
+        
+        current = dict(rows)
+        
+        with self._lock:
+            self.polls += 1
+            previous = self._snapshot
+            columns = list(columns)
+            
+            # Primo poll o colonne cambiate (rescan/override): snapshot completo
+            if previous is None or columns != self._columns:
+                self._columns = columns
+                self._snapshot = current
+                message = self._snapshot_message()
+            else:
+                self._snapshot = current
+                message = self._delta_message(previous, current)
+        
+        if message is not None:
+            self._publish(message)
+    
+    def _delta_message(self, previous, current):
+        inserted = []
+        updated = []
+        
+        for key, cells in current.items():
+            old_cells = previous.get(key)
+            if old_cells is None:
+                inserted.append({'key': key, 'cells': cells})
+            elif old_cells != cells:
+                updated.append({'key': key, 'cells': cells})
+        
+        removed = [key for key in previous if key not in current]
+        
+        order_changed = [key for key in previous if key in current] != [
+            key for key in current if key in previous
+        ]
+        
+        if not (inserted or updated or removed or order_changed):
+            return None
+        
+        return self._message('delta', {
+            'inserted': inserted,
+            'updated': updated,
+            'removed': removed,
+            'order': list(current)
+        })
+    
+    def _snapshot_message(self):
+        return self._message('snapshot', {
+            'columns': self._columns,
+            'rows': [{'key': key, 'cells': cells} for key, cells in self._snapshot.items()]
+        })
+    
+    def _message(self, event, data):
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+        return f"event: {event}\ndata: {payload}\n\n"
+    
+    def _publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                # Client troppo lento: lo disconnette, alla riconnessione riceve uno snapshot
+                logger.warning(f"Live feed {self.key}: dropping slow client")
+                self._unsubscribe(subscriber)
+                subscriber.closed = True
+    
+    def _close(self, subscriber):
+        subscriber.closed = True
+        try:
+            subscriber.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class LiveFeedManager:
+    """Registro dei feed attivi (uno per tabella/vista)"""
+    
+    def __init__(self):
+        self._feeds = {}
+        self._lock = threading.Lock()
+    
+    def get_feed(self, key, loader_factory, interval):
+        """
+        Restituisce il feed di una vista, creandolo se necessario
+        
+        Args:
+            key: Chiave della vista
+            loader_factory: Callable che crea il loader (solo alla creazione)
+            interval: Secondi tra due interrogazioni del database
+        """
+        
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is None:
+                feed = LiveFeed(key, loader_factory(), interval)
+                self._feeds[key] = feed
+            return feed
+    
+    def reset(self):
+        """Ferma tutti i feed (schema o override ricaricati)"""
+        
+        with self._lock:
+            feeds = list(self._feeds.values())
+            self._feeds.clear()
+        
+        for feed in feeds:
+            feed.stop()
+    
+    def get_stats(self):
+        with self._lock:
+            feeds = dict(self._feeds)
+        return {key: feed.get_stats() for key, feed in feeds.items()}
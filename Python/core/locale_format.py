@@ -0,0 +1,81 @@
+"""
+Locale Format - Regole di formattazione per lingua (separatori numerici e date)
+"""
+
+
+# Formato date predefinito (ISO, ordinabile)
+ISO_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Lingua usata se quella richiesta non ha regole
+DEFAULT_LOCALE = 'it'
+
+
+class LocaleFormat:
+    """
+    Regole di formattazione di una lingua
+    
+    I numeri vengono formattati con il formato inglese di Python
+    ('1,234.5') e convertiti con una sola translate() nei separatori
+    della lingua.
+    """
+    
+    __slots__ = ('code', 'thousands_separator', 'decimal_separator', 'datetime_format', 'separators')
+    
+    def __init__(self, code, thousands_separator='.', decimal_separator=',', datetime_format=ISO_DATETIME_FORMAT):
+        self.code = code
+        self.thousands_separator = thousands_separator
+        self.decimal_separator = decimal_separator
+        self.datetime_format = datetime_format
+        
+        # Tabella di conversione dal formato inglese (None: già nel formato della lingua)
+        if (thousands_separator, decimal_separator) == (',', '.'):
+            self.separators = None
+        else:
+            self.separators = str.maketrans({',': thousands_separator, '.': decimal_separator})
+    
+    @classmethod
+    def from_config(cls, code, rules=None):
+        """
+        Crea le regole di una lingua dalla sezione `format` del file di traduzione
+        
+        Args:
+            code: Codice lingua (es. 'it', 'en')
+            rules: dict con thousands_separator, decimal_separator, datetime_format (opzionali)
+        """
+        
+        rules = rules or {}
+        return cls(
+            code,
+            rules.get('thousands_separator', '.'),
+            rules.get('decimal_separator', ','),
+            rules.get('datetime_format', ISO_DATETIME_FORMAT)
+        )
+    
+    def localize(self, formatted):
+        """Converte un numero nel formato inglese di Python nei separatori della lingua"""
+        
+        return formatted if self.separators is None else formatted.translate(self.separators)
+
+
+# Codice lingua -> regole (italiano sempre disponibile)
+LOCALES = {
+    DEFAULT_LOCALE: LocaleFormat(DEFAULT_LOCALE)
+}
+
+
+def register_locale(code, rules=None):
+    """
+    Registra (o sostituisce) le regole di formattazione di una lingua
+    
+    Returns:
+        LocaleFormat: Regole registrate
+    """
+    
+    LOCALES[code] = LocaleFormat.from_config(code, rules)
+    return LOCALES[code]
+
+
+def get_locale(code=None):
+    """Regole di una lingua (quelle di DEFAULT_LOCALE se sconosciuta)"""
+    
+    return LOCALES.get(code) or LOCALES[DEFAULT_LOCALE]
@@ -2,53 +2,956 @@
 Query Builder - Costruisce query SQL dinamiche basate su configurazione
 """
 
+import base64
+import json
+import logging
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
 from sqlalchemy import text
+from .result_set import ResultSet
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Namespace dei piani di esecuzione XML di SQL Server
+SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
 
 
 class QueryBuilder:
     """Costruisce query SQL dinamiche"""
     
-    def __init__(self, engine):
+    # Operatori dei filtri strutturati (suffisso nel parametro: colonna__gte=...)
+    FILTER_OPERATORS = {
+        'eq': '=',
+        'ne': '<>',
+        'gt': '>',
+        'gte': '>=',
+        'lt': '<',
+        'lte': '<=',
+        'prefix': 'LIKE'
+    }
+    
+    # Tipi testuali su cui ?q= cerca per prefisso (LIKE 'valore%', sargable)
+    TEXT_TYPES = ('CHAR', 'TEXT', 'NCHAR', 'NVARCHAR', 'VARCHAR')
+    
+    # Parole chiave dopo le quali un placeholder del template sarebbe un nome di tabella/colonna
+    TEMPLATE_IDENTIFIER_CONTEXT = re.compile(
+        r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE|EXEC|EXECUTE|ORDER\s+BY|GROUP\s+BY)$', re.IGNORECASE
+    )
+    
+    # Costrutti text() memorizzati (uno per forma di query)
+    MAX_STATEMENTS = 512
+    
+    def __init__(self, engine, coalesce=True, lock_dir=None):
         self.engine = engine
+        
+        # Coalescenza di query identiche concorrenti (opzionale anche tra processi)
+        self.single_flight = SingleFlight(lock_dir) if coalesce else None
+        
+        # Finestre di righe aggiornate in modo incrementale (tabelle con `incremental`)
+        self._windows = OrderedDict()
+        self._windows_lock = threading.Lock()
+        
+        # Query SQL -> text() già analizzato (limiti e valori sono parametri)
+        self._statements = OrderedDict()
+        self._statements_lock = threading.Lock()
     
-    def build_table_query(self, table_name, schema, config=None):
+    def build_table_query(self, table_name, schema, config=None, page=None, cursor=None,
+                          offset=None, filters=None, unlimited=False, search=None):
         """
         Costruisce query per visualizzare una tabella
         
+        Senza paginazione usa SELECT TOP. Con `page` > 1 o `offset` usa
+        OFFSET/FETCH, con `cursor` usa la modalità keyset (seek dopo l'ultimo
+        valore di ORDER BY/PK), il cui costo non dipende dalla profondità della pagina.
+        Viene sempre letta una riga in più per sapere se esiste una pagina successiva.
+        
+        Limiti, offset e valori sono parametri: il testo della query dipende
+        solo da tabella e configurazione, quindi SQL Server riusa lo stesso piano
+        per ogni ?limit= o pagina.
+        
         Args:
             table_name: Nome tabella
             schema: Metadati tabella
             config: Configurazione override (opzionale)
+            page: Numero pagina per paginazione OFFSET/FETCH (opzionale)
+            cursor: Cursore keyset generato da encode_cursor (opzionale)
+            offset: Righe da saltare (alternativa a page, opzionale)
+            filters: Filtri [(colonna, operatore, valore)] da parse_filters (opzionale)
+            unlimited: Se True legge tutte le righe (export), senza TOP né paginazione
+            search: Testo cercato (?q=) sulle colonne indicizzate (opzionale)
         
         Returns:
-            str: Query SQL
+            tuple: (query SQL, parametri)
         """
         
         config = config or {}
+        params = {}
         
         # Colonne da selezionare
         columns = self._get_columns_list(schema, config)
-        columns_str = ', '.join(columns)
         
-        # Limit
+        # Limit (+1 per rilevare la pagina successiva)
         limit = config.get('default_limit', 100)
+        fetch = limit + 1
         
         # Order by
         order_by = self._get_order_by(schema, config)
         
         # Where clause
         where_clause = self._get_where_clause(config)
+        conditions = [f"({where_clause})"] if where_clause else []
+        
+        # Filtri strutturati con parametri (colonne già validate sullo schema)
+        for i, (col, operator, value) in enumerate(filters or []):
+            conditions.append(f"{col} {self.FILTER_OPERATORS[operator]} :filter_{i}")
+            params[f"filter_{i}"] = value
+        
+        # Ricerca testuale (?q=) sulle colonne indicizzate
+        if search:
+            search_predicate = self._build_search_predicate(schema, config, search, params)
+            if search_predicate:
+                conditions.append(search_predicate)
+        
+        # Ordinamento univoco (ORDER BY + PK) quando disponibile
+        ordering = self.get_keyset_columns(schema, config, allow_nullable=True)
+        if ordering:
+            order_by = ', '.join(f"{col} {d}" for col, d in ordering)
+        
+        # Keyset: seek dopo i valori del cursore (solo colonne NOT NULL)
+        if cursor:
+            keyset = self.get_keyset_columns(schema, config)
+            if not keyset:
+                raise ValueError(f"Keyset pagination not available for {table_name}")
+            
+            cursor_data = self.decode_cursor(cursor)
+            if len(cursor_data['values']) != len(keyset):
+                raise ValueError("Invalid pagination cursor")
+            
+            # Pagina precedente: ordinamento invertito, righe riordinate dal chiamante
+            if cursor_data['direction'] == 'prev':
+                keyset = [(col, self._invert_direction(d)) for col, d in keyset]
+            
+            conditions.append(self._build_seek_predicate(keyset, cursor_data['values'], params))
+            order_by = ', '.join(f"{col} {d}" for col, d in keyset)
+        
+        # Le colonne chiave servono per generare i cursori e per la finestra incrementale
+        if ordering:
+            columns = columns + [col for col, _ in ordering if col not in columns]
+        
+        columns_str = ', '.join(columns)
         
         # Costruisci query
-        query = f"SELECT TOP {limit} {columns_str} FROM {table_name}"
+        if cursor:
+            offset = None
+        elif page and page > 1:
+            offset = (page - 1) * limit
+        use_offset = bool(offset) and not unlimited
         
-        if where_clause:
-            query += f" WHERE {where_clause}"
+        if use_offset or unlimited:
+            query = f"SELECT {columns_str} FROM {table_name}"
+        else:
+            query = f"SELECT TOP (:top_n) {columns_str} FROM {table_name}"
+            params['top_n'] = fetch
+        
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
         
         if order_by:
             query += f" ORDER BY {order_by}"
         
-        return query
+        if use_offset:
+            query += " OFFSET :offset_rows ROWS FETCH NEXT :fetch_rows ROWS ONLY"
+            params['offset_rows'] = offset
+            params['fetch_rows'] = fetch
+        
+        return query, params
+    
+    def paginate(self, rows, schema, config=None, page=None, cursor=None):
+        """
+        Applica il limite alle righe lette e calcola i link di navigazione
+        
+        Args:
+            rows: ResultSet restituito dalla query di build_table_query
+            schema: Metadati tabella
+            config: Configurazione override (opzionale)
+            page: Numero pagina richiesto (opzionale)
+            cursor: Cursore keyset richiesto (opzionale)
+        
+        Returns:
+            tuple: (ResultSet della pagina, dict con info di paginazione)
+        """
+        
+        config = config or {}
+        limit = config.get('default_limit', 100)
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        # Pagina precedente letta in ordine inverso
+        if self._cursor_direction(cursor) == 'prev':
+            rows = rows[::-1]
+        
+        pagination = self._new_pagination(limit)
+        self._fill_pagination(pagination, rows, rows.columns, has_more, schema, config, page, cursor)
+        
+        return rows, pagination
+    
+    def paginate_stream(self, rows, schema, config=None, page=None, cursor=None):
+        """
+        Versione streaming di paginate: restituisce un generatore e un dict
+        di paginazione che viene completato quando il generatore è esaurito
+        
+        Le pagine 'prev' vanno invertite, quindi solo in quel caso la pagina
+        (al massimo `default_limit` righe) viene bufferizzata.
+        
+        Returns:
+            tuple: (generatore di righe, dict con info di paginazione)
+        """
+        
+        config = config or {}
+        limit = config.get('default_limit', 100)
+        pagination = self._new_pagination(limit)
+        
+        def generate():
+            first_row = last_row = None
+            has_more = False
+            
+            try:
+                if self._cursor_direction(cursor) == 'prev':
+                    page_rows = []
+                    for row in rows:
+                        if len(page_rows) == limit:
+                            has_more = True
+                            break
+                        page_rows.append(row)
+                    page_rows.reverse()
+                    yield from page_rows
+                    if page_rows:
+                        first_row, last_row = page_rows[0], page_rows[-1]
+                else:
+                    count = 0
+                    for row in rows:
+                        if count == limit:
+                            has_more = True
+                            break
+                        if first_row is None:
+                            first_row = row
+                        last_row = row
+                        count += 1
+                        yield row
+            finally:
+                # Rilascia il cursore anche se non è stato letto fino in fondo
+                if hasattr(rows, 'close'):
+                    rows.close()
+            
+            edge_rows = [first_row, last_row] if first_row is not None else []
+            self._fill_pagination(pagination, edge_rows, rows.columns, has_more, schema, config, page, cursor)
+        
+        return generate(), pagination
+    
+    @staticmethod
+    def _new_pagination(limit):
+        return {
+            'limit': limit,
+            'page': None,
+            'next_page': None,
+            'prev_page': None,
+            'next_cursor': None,
+            'prev_cursor': None
+        }
+    
+    def _cursor_direction(self, cursor):
+        return self.decode_cursor(cursor)['direction'] if cursor else None
+    
+    def _fill_pagination(self, pagination, rows, columns, has_more, schema, config, page, cursor):
+        """Calcola link prev/next dalla prima e dall'ultima riga della pagina"""
+        
+        keyset = self.get_keyset_columns(schema, config)
+        
+        # Modalità OFFSET/FETCH (esplicita o keyset non disponibile)
+        if not cursor and (page or not keyset):
+            page = page or 1
+            pagination['page'] = page
+            pagination['prev_page'] = page - 1 if page > 1 else None
+            pagination['next_page'] = page + 1 if has_more else None
+            return
+        
+        direction = self._cursor_direction(cursor)
+        
+        if rows:
+            has_prev = has_more if direction == 'prev' else direction == 'next'
+            has_next = has_more if direction != 'prev' else True
+            
+            if has_prev:
+                pagination['prev_cursor'] = self.encode_cursor(rows[0], columns, keyset, 'prev')
+            if has_next:
+                pagination['next_cursor'] = self.encode_cursor(rows[-1], columns, keyset, 'next')
+    
+    def parse_filters(self, schema, args, exclude=(), indexed_only=False, ignore_unknown=False):
+        """
+        Converte i parametri della query string in filtri tipizzati
+        
+        `colonna=valore` è un filtro di uguaglianza, `colonna__gte=valore`
+        (gt, gte, lt, lte, ne) un filtro di intervallo, `colonna__prefix=valore`
+        una ricerca per prefisso (LIKE 'valore%'). I valori vengono convertiti
+        nel tipo della colonna indicato dallo schema.
+        
+        Args:
+            schema: Metadati tabella
+            args: Parametri (MultiDict o dict)
+            exclude: Parametri riservati da ignorare (limit, fields, ...)
+            indexed_only: Accetta solo colonne indicizzate (vedi get_indexed_columns)
+            ignore_unknown: Ignora i parametri che non sono colonne (pagine HTML:
+                            utm_*, cache-buster, ...) invece di rifiutarli
+        
+        Returns:
+            list: [(colonna, operatore, valore), ...]
+        
+        Raises:
+            ValueError: Colonna sconosciuta, operatore o valore non valido
+        """
+        
+        column_types = {col['name'].lower(): (col['name'], col.get('type', '')) for col in schema.get('columns', [])}
+        indexed = self.get_indexed_columns(schema) if indexed_only else None
+        filters = []
+        
+        for key in args:
+            if key in exclude:
+                continue
+            
+            name, _, operator = key.partition('__')
+            operator = operator or 'eq'
+            
+            column = column_types.get(name.lower())
+            if column is None:
+                if ignore_unknown:
+                    continue
+                raise ValueError(f"Unknown column: {name}")
+            if operator not in self.FILTER_OPERATORS:
+                raise ValueError(f"Unknown filter operator: {operator}")
+            
+            column_name, column_type = column
+            if indexed is not None and column_name not in indexed:
+                raise ValueError(f"Column {column_name} is not indexed and cannot be filtered")
+            
+            values = args.getlist(key) if hasattr(args, 'getlist') else [args[key]]
+            
+            for raw in values:
+                if operator == 'prefix':
+                    value = self._like_prefix(raw)
+                else:
+                    value = self.coerce_value(column_type, raw)
+                filters.append((column_name, operator, value))
+        
+        return filters
+    
+    def build_cell_query(self, table_name, schema, column, key_values):
+        """
+        Query che legge una sola cella tramite primary key (popup delle celle espandibili)
+        
+        Args:
+            table_name: Nome tabella
+            schema: Metadati tabella
+            column: Colonna da leggere (già validata sullo schema)
+            key_values: Valori di primary key, nell'ordine di schema['primary_keys']
+        
+        Returns:
+            tuple: (query SQL, parametri)
+        
+        Raises:
+            ValueError: Tabella senza primary key o chiave non valida
+        """
+        
+        primary_keys = schema.get('primary_keys') or []
+        if not primary_keys or len(key_values) != len(primary_keys):
+            raise ValueError("Invalid row key")
+        
+        column_types = {col['name']: col.get('type', '') for col in schema.get('columns', [])}
+        conditions = []
+        params = {}
+        
+        for i, (pk, value) in enumerate(zip(primary_keys, key_values)):
+            # Chiavi serializzate come testo (date, decimali) tornano al tipo della colonna
+            if isinstance(value, str):
+                value = self.coerce_value(column_types.get(pk, ''), value)
+            conditions.append(f"{pk} = :key_{i}")
+            params[f"key_{i}"] = value
+        
+        return f"SELECT {column} FROM {table_name} WHERE {' AND '.join(conditions)}", params
+    
+    def parse_sort(self, schema, sort):
+        """
+        Converte ?sort=colonna (o -colonna per DESC) in una clausola ORDER BY
+        
+        Sono ordinabili solo le colonne indicizzate, così l'ordinamento
+        usa un indice invece di un sort dell'intera tabella.
+        
+        Returns:
+            str: Clausola ORDER BY (es. "IMP_TIME DESC")
+        
+        Raises:
+            ValueError: Colonna sconosciuta o non indicizzata
+        """
+        
+        direction = 'ASC'
+        name = sort.strip()
+        if name.startswith('-'):
+            direction = 'DESC'
+            name = name[1:]
+        
+        indexed = {col.lower(): col for col in self.get_indexed_columns(schema)}
+        column = indexed.get(name.lower())
+        if column is None:
+            raise ValueError(f"Column {name} is not indexed and cannot be sorted")
+        
+        return f"{column} {direction}"
+    
+    def get_indexed_columns(self, schema):
+        """
+        Colonne utilizzabili da un indice per seek e ordinamento
+        
+        Sono la prima colonna di ogni indice e la prima primary key
+        (le colonne successive di un indice composto non bastano da sole).
+        
+        Returns:
+            list: Nomi colonna, senza duplicati
+        """
+        
+        columns = []
+        
+        primary_keys = schema.get('primary_keys') or []
+        if primary_keys:
+            columns.append(primary_keys[0])
+        
+        for index in schema.get('indexes') or []:
+            if index.get('columns') and index['columns'][0] not in columns:
+                columns.append(index['columns'][0])
+        
+        return columns
+    
+    def get_default_order_column(self, schema):
+        """
+        Colonna dell'ORDER BY predefinito, scelta tra quelle servite da un indice
+        
+        Preferenze: primary key, prima colonna di un indice univoco, di un
+        indice qualsiasi. Solo sulle tabelle heap senza indici si ripiega sulla
+        prima colonna (TOP N richiede allora scan e sort dell'intera tabella).
+        """
+        
+        primary_keys = schema.get('primary_keys') or []
+        if primary_keys:
+            return primary_keys[0]
+        
+        indexes = [index for index in schema.get('indexes') or [] if index.get('columns')]
+        for index in sorted(indexes, key=lambda index: not index.get('unique')):
+            return index['columns'][0]
+        
+        return schema['columns'][0]['name'] if schema.get('columns') else '*'
+    
+    def check_index_usage(self, schema, config):
+        """
+        Verifica che ordinamento, filtri e colonna incrementale configurati
+        nello YAML siano supportati da un indice
+        
+        Returns:
+            list: Avvisi per le colonne senza indice (vuota se tutto è coperto)
+        """
+        
+        config = config or {}
+        indexed = {col.lower() for col in self.get_indexed_columns(schema)}
+        column_names = [col['name'] for col in schema.get('columns', [])]
+        warnings = []
+        
+        if config.get('order_by'):
+            keyset = self._parse_order_by(config['order_by'])
+            if keyset and keyset[0][0].lower() not in indexed:
+                warnings.append(f"order_by column {keyset[0][0]} has no supporting index (scan + sort)")
+        
+        for expression in config.get('filters', []):
+            columns = [
+                col for col in column_names
+                if re.search(rf'\b{re.escape(col)}\b', expression, re.IGNORECASE)
+            ]
+            if columns and not any(col.lower() in indexed for col in columns):
+                warnings.append(f"filter '{expression}' uses no indexed column")
+        
+        settings = self.get_incremental_settings(schema, config)
+        if settings and settings['column'].lower() not in indexed:
+            warnings.append(f"incremental column {settings['column']} has no supporting index")
+        
+        return warnings
+    
+    def get_query_plan(self, query, params=None):
+        """
+        Piano di esecuzione stimato (SHOWPLAN_XML) di una query, senza eseguirla
+        
+        Returns:
+            str: Piano XML di SQL Server
+        """
+        
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+            try:
+                row = conn.execute(self._statement(query), params or {}).fetchone()
+            finally:
+                conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+        
+        return row[0] if row else None
+    
+    @staticmethod
+    def summarize_plan(plan_xml):
+        """
+        Riassume un piano XML negli operatori fisici con righe e costo stimati
+        
+        Returns:
+            list: [{'operator', 'object', 'estimated_rows', 'estimated_cost'}, ...]
+        """
+        
+        operators = []
+        
+        for rel_op in ET.fromstring(plan_xml).iter(f'{SHOWPLAN_NS}RelOp'):
+            target = rel_op.find(f'./*/{SHOWPLAN_NS}Object')
+            operators.append({
+                'operator': rel_op.get('PhysicalOp'),
+                'object': '.'.join(
+                    target.get(part).strip('[]') for part in ('Table', 'Index') if target.get(part)
+                ) if target is not None else None,
+                'estimated_rows': float(rel_op.get('EstimateRows', 0)),
+                'estimated_cost': float(rel_op.get('EstimatedTotalSubtreeCost', 0))
+            })
+        
+        return operators
+    
+    def get_search_columns(self, schema, config, search):
+        """
+        Colonne su cui ?q= può cercare il testo dato
+        
+        Prefisso sulle colonne testuali indicizzate, uguaglianza su quelle
+        intere se il testo è un numero. Le colonne possono essere limitate
+        con `search_columns` nello YAML.
+        
+        Returns:
+            list: [(colonna, 'text'|'int'), ...] (vuota se nessuna colonna è compatibile)
+        """
+        
+        column_types = {col['name']: (col.get('type') or '').upper() for col in schema.get('columns', [])}
+        columns = self.get_indexed_columns(schema)
+        
+        if (config or {}).get('search_columns'):
+            columns = [col for col in columns if col in config['search_columns']]
+        
+        search_columns = []
+        
+        for col in columns:
+            # Tipo base: 'NVARCHAR(50)', 'VARCHAR COLLATE Latin1_General_CI_AS' -> NVARCHAR, VARCHAR
+            base_type = re.split(r'[\s(]', column_types.get(col, ''), maxsplit=1)[0]
+            
+            if base_type in self.TEXT_TYPES:
+                search_columns.append((col, 'text'))
+            elif 'INT' in base_type and search.isdigit():
+                search_columns.append((col, 'int'))
+        
+        return search_columns
+    
+    def _build_search_predicate(self, schema, config, search, params):
+        """Predicato per ?q= sulle colonne di get_search_columns (None se nessuna)"""
+        
+        terms = []
+        
+        for col, kind in self.get_search_columns(schema, config, search):
+            if kind == 'text':
+                params['search_text'] = self._like_prefix(search)
+                terms.append(f"{col} LIKE :search_text")
+            else:
+                params['search_int'] = int(search)
+                terms.append(f"{col} = :search_int")
+        
+        if not terms:
+            return None
+        
+        return f"({' OR '.join(terms)})"
+    
+    @staticmethod
+    def _like_prefix(value):
+        """Pattern LIKE per prefisso con i caratteri speciali di SQL Server neutralizzati"""
+        
+        for char in ('[', '%', '_'):
+            value = value.replace(char, f'[{char}]')
+        return f"{value}%"
+    
+    @staticmethod
+    def coerce_value(column_type, raw):
+        """
+        Converte un valore testuale nel tipo della colonna
+        
+        Raises:
+            ValueError: Valore non compatibile con il tipo
+        """
+        
+        column_type = (column_type or '').upper()
+        
+        try:
+            if column_type == 'BIT':
+                if raw.lower() not in ('0', '1', 'true', 'false'):
+                    raise ValueError(raw)
+                return raw.lower() in ('1', 'true')
+            
+            if 'INT' in column_type:
+                return int(raw)
+            
+            if any(t in column_type for t in ('DECIMAL', 'NUMERIC', 'MONEY')):
+                return Decimal(raw)
+            
+            if any(t in column_type for t in ('FLOAT', 'REAL')):
+                return float(raw)
+            
+            if 'DATETIME' in column_type:
+                return datetime.fromisoformat(raw)
+            
+            if column_type == 'DATE':
+                return date.fromisoformat(raw)
+            
+            # rowversion (TIMESTAMP in SQL Server) e colonne binarie: valore esadecimale
+            if column_type == 'TIMESTAMP' or 'BINARY' in column_type:
+                return bytes.fromhex(raw)
+        except (ValueError, ArithmeticError):
+            raise ValueError(f"Invalid value for {column_type}: {raw}")
+        
+        return raw
+    
+    def get_keyset_columns(self, schema, config=None, allow_nullable=False):
+        """
+        Determina le colonne per la paginazione keyset
+        
+        Usa l'ORDER BY effettivo e aggiunge le primary key come tie-breaker,
+        così che l'ordinamento sia univoco. Per il seek dei cursori le colonne
+        di ORDER BY devono essere NOT NULL: `col > :v` escluderebbe le righe con
+        NULL (che SQL Server ordina per prime), quindi in quel caso si ripiega
+        su OFFSET/FETCH.
+        
+        Args:
+            schema: Metadati tabella
+            config: Configurazione override (opzionale)
+            allow_nullable: Ammette colonne nullable (ordinamento univoco e finestra
+                            incrementale, che non usano il seek)
+        
+        Returns:
+            list: [(colonna, 'ASC'|'DESC'), ...] o None se non applicabile
+        """
+        
+        config = config or {}
+        nullable = {col['name']: col.get('nullable', True) for col in schema.get('columns', [])}
+        
+        keyset = self._parse_order_by(self._get_order_by(schema, config))
+        if not keyset or any(col not in nullable for col, _ in keyset):
+            return None
+        
+        if not allow_nullable and any(nullable[col] for col, _ in keyset):
+            return None
+        
+        # Tie-breaker: primary key nella stessa direzione dell'ultima colonna
+        primary_keys = schema.get('primary_keys', [])
+        if not primary_keys:
+            return None
+        
+        ordered = {col for col, _ in keyset}
+        last_direction = keyset[-1][1]
+        keyset.extend((pk, last_direction) for pk in primary_keys if pk not in ordered)
+        
+        return keyset
+    
+    @staticmethod
+    def encode_cursor(row, columns, keyset, direction):
+        """Serializza i valori chiave di una riga (tupla) in un cursore opaco"""
+        
+        columns = list(columns)
+        values = [QueryBuilder._encode_cursor_value(row[columns.index(col)]) for col, _ in keyset]
+        payload = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decodifica un cursore generato da encode_cursor"""
+        
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            direction = payload['d']
+            values = [QueryBuilder._decode_cursor_value(v) for v in payload['v']]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid pagination cursor: {e}")
+        
+        if direction not in ('next', 'prev'):
+            raise ValueError("Invalid pagination cursor direction")
+        
+        return {'direction': direction, 'values': values}
+    
+    @staticmethod
+    def _encode_cursor_value(value):
+        """Codifica un valore mantenendo il tipo per il binding SQL"""
+        
+        if isinstance(value, datetime):
+            return {'t': 'dt', 'v': value.isoformat()}
+        if isinstance(value, date):
+            return {'t': 'd', 'v': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'t': 'dec', 'v': str(value)}
+        if isinstance(value, (bytes, bytearray)):
+            return {'t': 'b', 'v': bytes(value).hex()}
+        return value
+    
+    @staticmethod
+    def _decode_cursor_value(value):
+        """Ricostruisce un valore codificato da _encode_cursor_value"""
+        
+        if not isinstance(value, dict):
+            return value
+        
+        decoders = {
+            'dt': datetime.fromisoformat,
+            'd': date.fromisoformat,
+            'dec': Decimal,
+            'b': bytes.fromhex
+        }
+        return decoders[value['t']](value['v'])
+    
+    @staticmethod
+    def _parse_order_by(order_by):
+        """Scompone una clausola ORDER BY in [(colonna, direzione), ...]"""
+        
+        keyset = []
+        
+        for part in (order_by or '').split(','):
+            tokens = part.split()
+            if not tokens:
+                continue
+            
+            direction = 'ASC'
+            if tokens[-1].upper() in ('ASC', 'DESC'):
+                direction = tokens.pop().upper()
+            
+            # Solo nomi colonna semplici (niente espressioni)
+            if len(tokens) != 1:
+                return None
+            
+            keyset.append((tokens[0].strip('[]'), direction))
+        
+        return keyset
+    
+    @staticmethod
+    def _invert_direction(direction):
+        return 'ASC' if direction == 'DESC' else 'DESC'
+    
+    @staticmethod
+    def _build_seek_predicate(keyset, values, params):
+        """
+        Costruisce il predicato keyset per ordinamenti multi-colonna:
+        (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ...
+        """
+        
+        disjuncts = []
+        
+        for i, (col, direction) in enumerate(keyset):
+            operator = '<' if direction == 'DESC' else '>'
+            terms = [f"{prev_col} = :seek_{j}" for j, (prev_col, _) in enumerate(keyset[:i])]
+            terms.append(f"{col} {operator} :seek_{i}")
+            disjuncts.append(f"({' AND '.join(terms)})")
+            params[f"seek_{i}"] = values[i]
+        
+        return f"({' OR '.join(disjuncts)})"
+    
+    def get_incremental_settings(self, schema, config=None):
+        """
+        Legge la configurazione `incremental` di una tabella
+        
+        Esempio nello YAML:
+            incremental:
+              column: IMP_ID        # colonna monotona o rowversion
+              full_refresh: 300     # secondi tra due ricariche complete
+              max_rows: 1000        # oltre questo numero di novità: ricarica completa
+        
+        Returns:
+            dict: Impostazioni normalizzate o None se non applicabile
+        """
+        
+        settings = (config or {}).get('incremental')
+        if not settings:
+            return None
+        
+        if isinstance(settings, str):
+            settings = {'column': settings}
+        
+        column = settings.get('column')
+        known_columns = {col['name'] for col in schema.get('columns', [])}
+        
+        # Servono la colonna watermark e un ordinamento univoco (PK) per il merge
+        if column not in known_columns or not self.get_keyset_columns(schema, config, allow_nullable=True):
+            logger.warning(f"Incremental fetch disabled for {schema.get('name')}: invalid column or no primary key")
+            return None
+        
+        limit = (config or {}).get('default_limit', 100)
+        
+        return {
+            'column': column,
+            'full_refresh': settings.get('full_refresh', 300),
+            'max_rows': settings.get('max_rows', max(1000, limit * 10))
+        }
+    
+    def fetch_window(self, table_name, schema, config=None):
+        """
+        Restituisce la prima pagina di una tabella aggiornandola in modo incrementale
+        
+        La prima chiamata (e ogni `full_refresh` secondi) esegue la query
+        completa; le successive leggono solo le righe con watermark maggiore
+        dell'ultimo letto e le uniscono alla finestra in memoria per primary key.
+        Il costo di un aggiornamento dipende quindi dalle righe nuove, non
+        dalla dimensione della finestra. Righe eliminate (o che non rispettano
+        più i filtri) spariscono alla ricarica completa successiva.
+        
+        Senza configurazione `incremental` equivale a execute_query sulla
+        query di build_table_query.
+        
+        Returns:
+            ResultSet: stesse colonne e righe (limit + 1) di build_table_query
+        """
+        
+        config = config or {}
+        query, params = self.build_table_query(table_name, schema, config)
+        
+        settings = self.get_incremental_settings(schema, config)
+        if settings is None:
+            return self.execute_query(query, params)
+        
+        key = self._query_key(query, params)
+        
+        with self._windows_lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = IncrementalWindow(
+                    self.get_keyset_columns(schema, config, allow_nullable=True),
+                    config.get('default_limit', 100) + 1,
+                    schema['primary_keys']
+                )
+                self._windows[key] = window
+                while len(self._windows) > IncrementalWindow.MAX_WINDOWS:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+        
+        with window.lock:
+            if not window.needs_full_refresh(settings['full_refresh']):
+                changes, watermark = self.fetch_changes(table_name, schema, config, window.watermark, settings)
+                if changes is not None:
+                    window.merge(changes, watermark, settings['column'])
+                    return window.result()
+            
+            # Watermark letto prima della finestra: le righe inserite nel frattempo
+            # vengono rilette al prossimo aggiornamento (il merge per PK è idempotente)
+            watermark = self._read_max_watermark(table_name, config, settings['column'])
+            window.load(self._execute(query, params), watermark)
+            return window.result()
+    
+    def fetch_changes(self, table_name, schema, config, watermark, settings=None):
+        """
+        Legge le righe con watermark maggiore di quello indicato
+        
+        Il watermark può essere tenuto dal server (fetch_window) o dal client
+        (vedi encode_watermark/decode_watermark).
+        
+        Returns:
+            tuple: (ResultSet ordinato per watermark, nuovo watermark) oppure
+                   (None, None) se le novità superano `max_rows`
+        """
+        
+        config = config or {}
+        settings = settings or self.get_incremental_settings(schema, config)
+        if settings is None:
+            raise ValueError(f"Incremental fetch not configured for {table_name}")
+        
+        column = settings['column']
+        max_rows = settings['max_rows']
+        
+        columns = self._get_columns_list(schema, config)
+        ordering = self.get_keyset_columns(schema, config, allow_nullable=True) or []
+        columns = columns + [col for col, _ in ordering if col not in columns]
+        if column not in columns:
+            columns.append(column)
+        
+        conditions = []
+        where_clause = self._get_where_clause(config)
+        if where_clause:
+            conditions.append(f"({where_clause})")
+        
+        params = {'top_n': max_rows + 1}
+        if watermark is not None:
+            conditions.append(f"{column} > :watermark")
+            params['watermark'] = watermark
+        
+        query = f"SELECT TOP (:top_n) {', '.join(columns)} FROM {table_name}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += f" ORDER BY {column} ASC"
+        
+        rows = self.execute_query(query, params)
+        if len(rows) > max_rows:
+            return None, None
+        
+        if rows:
+            watermark = rows[-1][rows.index[column]]
+        
+        return rows, watermark
+    
+    def _read_max_watermark(self, table_name, config, column):
+        """Valore massimo della colonna watermark (rispettando i filtri)"""
+        
+        query = f"SELECT MAX({column}) AS watermark FROM {table_name}"
+        where_clause = self._get_where_clause(config)
+        if where_clause:
+            query += f" WHERE {where_clause}"
+        
+        return self._execute(query, {})[0][0]
+    
+    @staticmethod
+    def encode_watermark(watermark):
+        """Serializza un watermark (anche rowversion binaria) per il client"""
+        
+        if isinstance(watermark, (bytes, bytearray)):
+            value = {'t': 'bin', 'v': bytes(watermark).hex()}
+        else:
+            value = QueryBuilder._encode_cursor_value(watermark)
+        
+        payload = json.dumps(value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_watermark(token):
+        """Decodifica un watermark generato da encode_watermark"""
+        
+        try:
+            value = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            if isinstance(value, dict) and value.get('t') == 'bin':
+                return bytes.fromhex(value['v'])
+            return QueryBuilder._decode_cursor_value(value)
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid watermark: {e}")
+    
+    def get_window_stats(self):
+        """Statistiche delle finestre incrementali in memoria"""
+        
+        with self._windows_lock:
+            windows = list(self._windows.values())
+        
+        return {
+            'windows': len(windows),
+            'full_loads': sum(w.stats['full_loads'] for w in windows),
+            'incremental_loads': sum(w.stats['incremental_loads'] for w in windows),
+            'rows_fetched': sum(w.stats['rows_fetched'] for w in windows)
+        }
     
     def build_custom_query(self, view_config):
         """
@@ -58,16 +961,16 @@ class QueryBuilder:
             view_config: Configurazione vista custom
         
         Returns:
-            str/callable: Query SQL o callable per stored procedure
+            tuple: (query SQL o callable per stored procedure, parametri)
         """
         
         query_type = view_config.get('query_type', 'sql')
         
         if query_type == 'stored_procedure':
-            return self._build_stored_procedure_call(view_config)
+            return self._build_stored_procedure_call(view_config), {}
         
         elif query_type == 'sql':
-            return view_config.get('query')
+            return view_config.get('query'), {}
         
         elif query_type == 'template':
             return self._build_from_template(view_config)
@@ -79,29 +982,105 @@ class QueryBuilder:
         """
         Esegue una query e restituisce risultati
         
+        Richieste concorrenti con la stessa query e gli stessi parametri
+        attendono un'unica esecuzione e ne condividono il ResultSet.
+        
         Args:
             query: Query SQL o callable
             params: Parametri per la query
         
         Returns:
-            tuple: (rows, columns)
+            ResultSet: colonne e righe (tuple), da non modificare
         """
         
         params = params or {}
         
+        if self.single_flight is None:
+            return self._execute(query, params)
+        
+        return self.single_flight.do(
+            self._query_key(query, params),
+            lambda: self._execute(query, params)
+        )
+    
+    def _execute(self, query, params):
+        """Esegue la query su una connessione del pool"""
+        
         with self.engine.connect() as conn:
             # Se è una callable (stored procedure)
             if callable(query):
                 result = query(conn, params)
             else:
                 # Query SQL normale
-                result = conn.execute(text(query), params)
-            
-            # Converti risultati
-            columns = list(result.keys())
-            rows = [dict(row._mapping) for row in result]
+                result = conn.execute(self._statement(query), params)
             
-            return rows, columns
+            # Converti risultati (righe come tuple, colonne una sola volta)
+            return ResultSet(result.keys(), [tuple(row) for row in result])
+    
+    def _statement(self, query):
+        """
+        Costrutto text() di una query, creato una volta per forma di query
+        
+        Evita di rianalizzare il testo SQL a ogni richiesta; la chiave è il
+        testo stesso, che con i parametri legati non cambia tra richieste.
+        """
+        
+        with self._statements_lock:
+            statement = self._statements.get(query)
+            if statement is not None:
+                self._statements.move_to_end(query)
+                return statement
+        
+        statement = text(query)
+        
+        with self._statements_lock:
+            self._statements[query] = statement
+            while len(self._statements) > self.MAX_STATEMENTS:
+                self._statements.popitem(last=False)
+        
+        return statement
+    
+    def stream_query(self, query, params=None, batch_size=500):
+        """
+        Esegue una query restituendo le righe in streaming (fetchmany)
+        
+        La connessione resta aperta finché il risultato non viene esaurito
+        o chiuso: va sempre consumato o chiuso con close().
+        
+        Args:
+            query: Query SQL o callable
+            params: Parametri per la query
+            batch_size: Righe lette dal cursore per ogni fetchmany
+        
+        Returns:
+            StreamingResult: oggetto iterabile con attributo columns
+        """
+        
+        params = params or {}
+        conn = self.engine.connect().execution_options(stream_results=True)
+        
+        try:
+            if callable(query):
+                result = query(conn, params)
+            else:
+                result = conn.execute(self._statement(query), params)
+        except Exception:
+            conn.close()
+            raise
+        
+        return StreamingResult(conn, result, batch_size)
+    
+    @staticmethod
+    def _query_key(query, params):
+        """Chiave normalizzata di query + parametri"""
+        
+        if callable(query):
+            sql = getattr(query, 'cache_key', repr(query))
+        else:
+            sql = re.sub(r'\s+', ' ', query).strip()
+        
+        params_key = sorted((k, repr(v)) for k, v in params.items())
+        return f"{sql}|{params_key}"
     
     def _get_columns_list(self, schema, config):
         """Determina quali colonne selezionare"""
@@ -127,14 +1106,8 @@ class QueryBuilder:
         if 'order_by' in config:
             return config['order_by']
         
-        # Default: primary key DESC
-        primary_keys = schema.get('primary_keys', [])
-        if primary_keys:
-            return f"{primary_keys[0]} DESC"
-        
-        # Fallback: prima colonna
-        first_col = schema['columns'][0]['name'] if schema.get('columns') else '*'
-        return f"{first_col} DESC"
+        # Default: colonna servita da un indice (primary key o indice) DESC
+        return f"{self.get_default_order_column(schema)} DESC"
     
     def _get_where_clause(self, config):
         """Costruisce WHERE clause"""
@@ -188,19 +1161,207 @@ class QueryBuilder:
             
             final_query = '; '.join(query_parts)
             
-            return conn.execute(text(final_query), all_params)
+            return conn.execute(self._statement(final_query), all_params)
+        
+        # Chiave stabile per la cache risultati
+        call_procedure.cache_key = f"EXEC {proc_name} {sorted(params.items())}"
         
         return call_procedure
     
     def _build_from_template(self, view_config):
-        """Costruisce query da template"""
+        """
+        Costruisce query da template
+        
+        I placeholder {nome} diventano parametri :nome, così i valori non
+        entrano nel testo SQL:
+            '{nome}'        -> :nome
+            {nome}          -> :nome
+            TOP {nome}      -> TOP (:nome)
+            '%{nome}%'      -> CONCAT('%', :nome, '%')  (placeholder dentro una stringa)
+        
+        Vengono passati solo i parametri usati dal template. La vista viene
+        validata alla registrazione (vedi ViewGenerator._add_custom_view).
+        
+        Raises:
+            ValueError: Placeholder usato come nome di tabella/colonna (non legabile)
+        """
         
         template = view_config.get('query_template')
         params = view_config.get('parameters', {})
         
-        # Sostituisci placeholders
-        query = template
-        for key, value in params.items():
-            query = query.replace(f"{{{key}}}", str(value))
+        if not params:
+            return template, {}
+        
+        names = '|'.join(re.escape(str(key)) for key in params)
+        placeholder = re.compile(r'\{(' + names + r')\}')
+        used = set()
+        
+        def bind_top(match):
+            used.add(match.group(1))
+            return f'TOP (:{match.group(1)})'
+        
+        # TOP accetta un parametro solo tra parentesi
+        query = re.sub(
+            r'\bTOP\s*(?:\(\s*)?\{(' + names + r')\}(?:\s*\))?',
+            bind_top,
+            template,
+            flags=re.IGNORECASE
+        )
+        
+        def bind(match):
+            literal = match.group('literal')
+            
+            # Placeholder fuori dalle stringhe: deve occupare la posizione di un valore
+            if literal is None:
+                name = match.group('name')
+                before = query[:match.start()].rstrip()
+                after = query[match.end():].lstrip()
+                if after.startswith('.') or before.endswith('.') or self.TEMPLATE_IDENTIFIER_CONTEXT.search(before):
+                    raise ValueError(
+                        f"Template placeholder {{{name}}} is used as an identifier: only values can be parameters"
+                    )
+                used.add(name)
+                return f':{name}'
+            
+            parts = placeholder.split(literal[1:-1])
+            if len(parts) == 1:
+                return literal
+            used.update(parts[1::2])
+            
+            # '{nome}': il parametro sostituisce l'intera stringa
+            if parts[0] == '' and parts[-1] == '' and len(parts) == 3:
+                return f':{parts[1]}'
+            
+            # Testo e placeholder nella stessa stringa: concatenazione lato database
+            pieces = []
+            for i, part in enumerate(parts):
+                if i % 2:
+                    pieces.append(f':{part}')
+                elif part:
+                    pieces.append(f"'{part}'")
+            return f"CONCAT({', '.join(pieces)})"
+        
+        query = re.sub(
+            r"(?P<literal>'(?:[^']|'')*')|\{(?P<name>" + names + r")\}",
+            bind,
+            query
+        )
+        
+        return query, {key: value for key, value in params.items() if str(key) in used}
+
+
+class StreamingResult:
+    """Risultato di una query letto a blocchi dal cursore del database"""
+    
+    def __init__(self, conn, result, batch_size=500):
+        self.conn = conn
+        self.result = result
+        self.batch_size = batch_size
+        self.columns = list(result.keys())
+    
+    def __iter__(self):
+        try:
+            while True:
+                batch = self.result.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield tuple(row)
+        finally:
+            self.close()
+    
+    def close(self):
+        """Rilascia cursore e connessione (idempotente)"""
+        
+        if self.conn is None:
+            return
+        
+        try:
+            self.result.close()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+
+class IncrementalWindow:
+    """
+    Prima pagina di una tabella tenuta in memoria e aggiornata per differenza
+    
+    Le righe sono indicizzate per primary key; dopo ogni merge vengono
+    riordinate secondo l'ordinamento della query e tagliate a `size`.
+    """
+    
+    # Finestre conservate al massimo (LRU)
+    MAX_WINDOWS = 64
+    
+    def __init__(self, keyset, size, key_columns):
+        self.keyset = keyset
+        self.size = size
+        
+        # Identità delle righe: solo primary key (il keyset serve per l'ordinamento,
+        # una riga con colonna di ordinamento modificata deve sostituire la precedente)
+        self.key_columns = key_columns
+        self.lock = threading.Lock()
+        
+        self.columns = None
+        self.index = None
+        self.rows = {}
+        self.watermark = None
+        self.loaded_at = None
+        self.stats = {'full_loads': 0, 'incremental_loads': 0, 'rows_fetched': 0}
+    
+    def needs_full_refresh(self, full_refresh):
+        if self.loaded_at is None:
+            return True
+        return bool(full_refresh) and time.monotonic() - self.loaded_at >= full_refresh
+    
+    def load(self, result, watermark):
+        """Sostituisce la finestra con il risultato della query completa"""
+        
+        self.columns = result.columns
+        self.index = result.index
+        self.rows = {self._row_key(row): row for row in result}
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+        
+        self.stats['full_loads'] += 1
+        self.stats['rows_fetched'] += len(result)
+    
+    def merge(self, changes, watermark, column):
+        """Unisce le righe nuove/modificate (sostituite per primary key)"""
+        
+        self.stats['incremental_loads'] += 1
+        
+        if not changes:
+            return
+        
+        # Proietta le righe sulle colonne della finestra
+        positions = [changes.index[col] for col in self.columns]
+        for row in changes:
+            row = tuple(row[i] for i in positions)
+            self.rows[self._row_key(row)] = row
+        
+        self.watermark = watermark
+        self.stats['rows_fetched'] += len(changes)
+        
+        # Righe uscite dalla finestra: non servono più
+        ordered = self._sorted_rows()[:self.size]
+        self.rows = {self._row_key(row): row for row in ordered}
+    
+    def result(self):
+        return ResultSet(self.columns, self._sorted_rows()[:self.size])
+    
+    def _row_key(self, row):
+        return tuple(row[self.index[col]] for col in self.key_columns)
+    
+    def _sorted_rows(self):
+        """Ordina come ORDER BY del keyset (NULL primi in ASC, come SQL Server)"""
+        
+        rows = list(self.rows.values())
+        
+        # Ordinamenti stabili dalla colonna meno significativa
+        for col, direction in reversed(self.keyset):
+            i = self.index[col]
+            rows.sort(key=lambda row: (row[i] is not None, row[i]), reverse=direction == 'DESC')
         
-        return query
\ No newline at end of file
+        return rows
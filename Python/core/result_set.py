@@ -0,0 +1,43 @@
+"""
+Result Set - Rappresentazione compatta dei risultati delle query
+"""
+
+
+class ResultSet:
+    """
+    Risultato di una query in forma compatta
+    
+    I nomi colonna sono conservati una sola volta, le righe sono tuple
+    nello stesso ordine delle colonne.
+    """
+    
+    __slots__ = ('columns', 'rows', 'index')
+    
+    def __init__(self, columns, rows):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.index = {name: i for i, name in enumerate(self.columns)}
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __iter__(self):
+        return iter(self.rows)
+    
+    def __getitem__(self, item):
+        # Slice: nuovo ResultSet con le stesse colonne
+        if isinstance(item, slice):
+            return ResultSet(self.columns, self.rows[item])
+        return self.rows[item]
+    
+    def column(self, name):
+        """Restituisce tutti i valori di una colonna"""
+        
+        i = self.index[name]
+        return [row[i] for row in self.rows]
+    
+    def to_dicts(self):
+        """Converte le righe in dizionari (solo per compatibilità)"""
+        
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
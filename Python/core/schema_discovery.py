@@ -3,9 +3,14 @@ Schema Discovery Engine - Estrae automaticamente metadati dal database
 """
 
 import json
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from sqlalchemy import inspect, text
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy import types as sqltypes
+from .schema_store import SchemaStore
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,12 +19,67 @@ logger = logging.getLogger(__name__)
 class SchemaDiscovery:
     """Scansiona il database ed estrae metadati strutturali"""
     
-    def __init__(self, engine, metadata_dir='metadata'):
+    # Query set-based sui cataloghi SQL Server (schema di default)
+    CATALOG_COLUMNS_SQL = """
+        SELECT t.name AS table_name, c.name AS column_name, ty.name AS type_name,
+               bt.name AS base_type_name, c.max_length, c.precision, c.scale, c.collation_name,
+               c.is_nullable, c.is_identity, dc.definition AS default_definition
+        FROM sys.tables t
+        JOIN sys.columns c ON c.object_id = t.object_id
+        JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+        LEFT JOIN sys.types bt ON bt.user_type_id = c.system_type_id
+        LEFT JOIN sys.default_constraints dc ON dc.object_id = c.default_object_id
+        WHERE t.schema_id = SCHEMA_ID() {table_filter}
+        ORDER BY t.name, c.column_id
+    """
+    
+    CATALOG_INDEXES_SQL = """
+        SELECT t.name AS table_name, i.index_id, i.name AS index_name,
+               i.is_unique, i.is_primary_key, c.name AS column_name
+        FROM sys.tables t
+        JOIN sys.indexes i ON i.object_id = t.object_id
+        JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE t.schema_id = SCHEMA_ID() AND i.type <> 0 AND ic.is_included_column = 0 {table_filter}
+        ORDER BY t.name, i.name, ic.key_ordinal
+    """
+    
+    CATALOG_FOREIGN_KEYS_SQL = """
+        SELECT t.name AS table_name, fk.name AS fk_name,
+               pc.name AS column_name, rt.name AS referenced_table, rc.name AS referenced_column
+        FROM sys.tables t
+        JOIN sys.foreign_keys fk ON fk.parent_object_id = t.object_id
+        JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+        JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+        JOIN sys.tables rt ON rt.object_id = fkc.referenced_object_id
+        JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+        WHERE t.schema_id = SCHEMA_ID() {table_filter}
+        ORDER BY t.name, fk.name, fkc.constraint_column_id
+    """
+    
+    # Data ultima modifica (ALTER, indici) delle tabelle per la scansione incrementale
+    MODIFY_DATES_SQL = """
+        SELECT t.name AS table_name, t.modify_date
+        FROM sys.tables t
+        WHERE t.schema_id = SCHEMA_ID()
+    """
+    
+    def __init__(self, engine, metadata_dir='metadata', scan_workers=1, backend='auto'):
         self.engine = engine
         self.metadata_dir = Path(metadata_dir)
         self.metadata_dir.mkdir(exist_ok=True)
         
-        self.schema_file = self.metadata_dir / 'db_schema.json'
+        # Thread paralleli per la scansione (ognuno con connessione e inspector propri)
+        self.scan_workers = max(1, scan_workers)
+        
+        # Backend metadati: 'catalog' (query bulk su sys.*, solo SQL Server),
+        # 'inspector' (SQLAlchemy, tutti i dialetti) o 'auto'
+        self.backend = backend
+        
+        # Cache binaria con indice per tabella (db_schema.json: formato precedente)
+        self.schema_file = self.metadata_dir / 'db_schema.bin'
+        self.legacy_schema_file = self.metadata_dir / 'db_schema.json'
+        self.schema_store = SchemaStore(self.schema_file)
         self.scan_info_file = self.metadata_dir / 'last_scan.json'
     
     def scan_database(self, force=False):
@@ -42,30 +102,194 @@ class SchemaDiscovery:
                 return self.load_cached_schema()
         
         logger.info("🔍 Starting database scan...")
-        inspector = inspect(self.engine)
+        started = time.perf_counter()
+        
+        schema, timings, backend = self._extract_tables()
+        
+        # Salva schema
+        self._save_schema(schema, timings, time.perf_counter() - started, backend)
+        
+        logger.info(f"✅ Database scan completed: {len(schema)} tables processed")
+        return schema
+    
+    def rescan_incremental(self):
+        """
+        Riscansiona solo le tabelle nuove o modificate
+        
+        Confronta sys.tables.modify_date con quella salvata nella cache (db_schema.bin):
+        estrae di nuovo le tabelle nuove o alterate, rimuove quelle eliminate
+        e mantiene le altre. Senza SQL Server o senza schema in cache esegue
+        una scansione completa.
+        
+        Returns:
+            tuple: (schema aggiornato, dict con le differenze)
+        """
+        
+        if self.engine.dialect.name != 'mssql' or not self.schema_file.exists():
+            logger.info("Incremental rescan not available, running full scan")
+            schema = self.scan_database(force=True)
+            return schema, {'mode': 'full', 'added': list(schema), 'modified': [], 'removed': []}
+        
+        logger.info("🔍 Starting incremental database scan...")
+        started = time.perf_counter()
+        
+        cached = self.load_cached_schema()
+        with self.engine.connect() as conn:
+            modify_dates = self._read_modify_dates(conn)
+        
+        added = [name for name in modify_dates if name not in cached]
+        modified = [
+            name for name, modify_date in modify_dates.items()
+            if name in cached and cached[name].get('modify_date') != modify_date
+        ]
+        removed = [name for name in cached if name not in modify_dates]
+        
+        changed, timings, backend = self._extract_tables(added + modified, modify_dates)
+        
+        # Mantiene le tabelle invariate, nell'ordine di sys.tables
         schema = {}
+        for name in sorted(modify_dates):
+            if name in changed:
+                schema[name] = changed[name]
+            elif name in cached:
+                schema[name] = cached[name]
+        
+        diff = {
+            'mode': 'incremental',
+            'added': added,
+            'modified': modified,
+            'removed': removed,
+            'unchanged': len(schema) - len(changed)
+        }
+        
+        # Salva sempre: aggiorna anche la data di validità della cache
+        self._save_schema(schema, timings, time.perf_counter() - started, backend or 'incremental')
+        
+        logger.info(
+            f"✅ Incremental scan: {len(added)} added, {len(modified)} modified, "
+            f"{len(removed)} removed"
+        )
+        return schema, diff
+    
+    def _extract_tables(self, table_names=None, modify_dates=None):
+        """
+        Estrae i metadati delle tabelle indicate (o di tutte)
+        
+        Returns:
+            tuple: (schema, tempi per tabella, backend usato)
+        """
+        
+        if table_names is not None and not table_names:
+            return {}, {}, None
+        
+        # Metadati bulk dai cataloghi (SQL Server), altrimenti Inspector per tabella
+        catalog = None
+        if self._use_catalog_backend():
+            try:
+                catalog = self._read_catalog(table_names)
+            except Exception as e:
+                logger.warning(f"Catalog discovery failed, falling back to inspector: {e}")
         
         # Ottieni lista tabelle
-        table_names = inspector.get_table_names()
+        if table_names is None:
+            if catalog is not None:
+                table_names = list(catalog)
+            else:
+                table_names = inspect(self.engine).get_table_names()
         logger.info(f"Found {len(table_names)} tables")
         
-        for table_name in table_names:
+        results, timings = self._scan_tables(table_names, catalog)
+        
+        # Data modifica per le scansioni incrementali successive
+        if modify_dates is None and self.engine.dialect.name == 'mssql':
             try:
-                schema[table_name] = self._extract_table_metadata(
-                    inspector, table_name
-                )
-                logger.debug(f"✓ Scanned {table_name}")
+                with self.engine.connect() as conn:
+                    modify_dates = self._read_modify_dates(conn)
             except Exception as e:
-                logger.error(f"✗ Error scanning {table_name}: {e}")
-                continue
+                logger.warning(f"Could not read table modify dates: {e}")
         
-        # Salva schema
-        self._save_schema(schema)
+        if modify_dates:
+            for name, metadata in results.items():
+                metadata['modify_date'] = modify_dates.get(name)
         
-        logger.info(f"✅ Database scan completed: {len(schema)} tables processed")
-        return schema
+        # Stesso ordine della scansione sequenziale
+        schema = {name: results[name] for name in table_names if name in results}
+        
+        return schema, timings, 'catalog' if catalog is not None else 'inspector'
     
-    def _extract_table_metadata(self, inspector, table_name):
+    def _read_modify_dates(self, conn):
+        """Restituisce nome tabella -> modify_date (ISO)"""
+        
+        return {
+            row['table_name']: row['modify_date'].isoformat()
+            for row in conn.execute(text(self.MODIFY_DATES_SQL)).mappings()
+        }
+    
+    def _scan_tables(self, table_names, catalog=None):
+        """
+        Estrae i metadati delle tabelle con un pool di thread limitato
+        
+        Ogni worker apre una propria connessione e un proprio inspector
+        e preleva le tabelle da una coda condivisa. Se `catalog` contiene
+        già i metadati (backend catalog) i worker leggono solo i dati di esempio.
+        
+        Returns:
+            tuple: (dict tabella -> metadati, dict tabella -> millisecondi)
+        """
+        
+        pending = queue.Queue()
+        for table_name in table_names:
+            pending.put(table_name)
+        
+        results = {}
+        timings = {}
+        
+        def worker():
+            with self.engine.connect() as conn:
+                inspector = inspect(conn)
+                
+                while True:
+                    try:
+                        table_name = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    
+                    started = time.perf_counter()
+                    try:
+                        if catalog is not None:
+                            results[table_name] = self._complete_catalog_metadata(
+                                catalog[table_name], conn
+                            )
+                        else:
+                            results[table_name] = self._extract_table_metadata(
+                                inspector, table_name, conn
+                            )
+                        logger.debug(f"✓ Scanned {table_name}")
+                    except Exception as e:
+                        logger.error(f"✗ Error scanning {table_name}: {e}")
+                    finally:
+                        # Chiude la transazione implicita (anche dopo errori)
+                        conn.rollback()
+                        timings[table_name] = round((time.perf_counter() - started) * 1000, 1)
+        
+        workers = min(self.scan_workers, len(table_names)) or 1
+        
+        if workers == 1:
+            worker()
+        else:
+            logger.info(f"Scanning with {workers} parallel workers")
+            threads = [
+                threading.Thread(target=worker, name=f'schema-scan-{i}', daemon=True)
+                for i in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        return results, timings
+    
+    def _extract_table_metadata(self, inspector, table_name, conn=None):
         """Estrae metadati completi di una singola tabella"""
         
         metadata = {
@@ -79,21 +303,13 @@ class SchemaDiscovery:
         
         # Estrai colonne con dettagli
         for column in inspector.get_columns(table_name):
-            col_info = {
-                'name': column['name'],
-                'type': str(column['type']),
-                'nullable': column['nullable'],
-                'default': str(column.get('default')) if column.get('default') else None,
-                'autoincrement': column.get('autoincrement', False)
-            }
-            
-            # Aggiungi hint per formatter basato sul nome
-            col_info['suggested_formatter'] = self._suggest_formatter(
-                column['name'], 
-                str(column['type'])
-            )
-            
-            metadata['columns'].append(col_info)
+            metadata['columns'].append(self._build_column_info(
+                column['name'],
+                str(column['type']),
+                column['nullable'],
+                column.get('default'),
+                column.get('autoincrement', False)
+            ))
         
         # Estrai primary keys
         pk_constraint = inspector.get_pk_constraint(table_name)
@@ -118,12 +334,174 @@ class SchemaDiscovery:
         
         # Ottieni sample data per analisi
         try:
-            metadata['sample_data'] = self._get_sample_data(table_name)
+            metadata['sample_data'] = self._get_sample_data(table_name, conn=conn)
         except Exception as e:
             logger.warning(f"Could not get sample data for {table_name}: {e}")
         
         return metadata
     
+    def _use_catalog_backend(self):
+        """Determina se usare le query bulk sui cataloghi"""
+        
+        if self.backend == 'inspector':
+            return False
+        
+        is_mssql = self.engine.dialect.name == 'mssql'
+        if self.backend == 'catalog' and not is_mssql:
+            logger.warning(f"Catalog discovery not available for {self.engine.dialect.name}, using inspector")
+        
+        return is_mssql
+    
+    def _read_catalog(self, table_names=None):
+        """
+        Legge colonne, PK, FK e indici di tutte le tabelle con tre query
+        sui cataloghi sys.* e costruisce lo stesso dict del percorso Inspector
+        (senza sample_data)
+        
+        Args:
+            table_names: Limita la lettura a queste tabelle (opzionale)
+        
+        Returns:
+            dict: nome tabella -> metadati, in ordine di nome
+        """
+        
+        catalog = {}
+        params = {}
+        
+        def catalog_query(sql):
+            if table_names is None:
+                return text(sql.format(table_filter=''))
+            return text(sql.format(table_filter='AND t.name IN :table_names')).bindparams(
+                bindparam('table_names', expanding=True)
+            )
+        
+        if table_names is not None:
+            params['table_names'] = list(table_names)
+        
+        with self.engine.connect() as conn:
+            for row in conn.execute(catalog_query(self.CATALOG_COLUMNS_SQL), params).mappings():
+                metadata = catalog.setdefault(row['table_name'], {
+                    'name': row['table_name'],
+                    'columns': [],
+                    'primary_keys': [],
+                    'foreign_keys': [],
+                    'indexes': [],
+                    'sample_data': None
+                })
+                
+                type_str = self._catalog_type_string(
+                    row['type_name'], row['base_type_name'], row['max_length'],
+                    row['precision'], row['scale'], row['collation_name']
+                )
+                metadata['columns'].append(self._build_column_info(
+                    row['column_name'],
+                    type_str,
+                    bool(row['is_nullable']),
+                    row['default_definition'],
+                    bool(row['is_identity'])
+                ))
+            
+            # Indici e primary key (colonne in ordine di chiave)
+            indexes = {}
+            for row in conn.execute(catalog_query(self.CATALOG_INDEXES_SQL), params).mappings():
+                metadata = catalog.get(row['table_name'])
+                if metadata is None:
+                    continue
+                
+                if row['is_primary_key']:
+                    metadata['primary_keys'].append(row['column_name'])
+                    continue
+                
+                key = (row['table_name'], row['index_id'])
+                index = indexes.get(key)
+                if index is None:
+                    index = {
+                        'name': row['index_name'],
+                        'columns': [],
+                        'unique': bool(row['is_unique'])
+                    }
+                    indexes[key] = index
+                    metadata['indexes'].append(index)
+                index['columns'].append(row['column_name'])
+            
+            # Foreign key (come nel percorso Inspector: prima colonna del vincolo)
+            seen_fks = set()
+            for row in conn.execute(catalog_query(self.CATALOG_FOREIGN_KEYS_SQL), params).mappings():
+                metadata = catalog.get(row['table_name'])
+                key = (row['table_name'], row['fk_name'])
+                if metadata is None or key in seen_fks:
+                    continue
+                
+                seen_fks.add(key)
+                metadata['foreign_keys'].append({
+                    'column': row['column_name'],
+                    'referenced_table': row['referenced_table'],
+                    'referenced_column': row['referenced_column']
+                })
+        
+        return catalog
+    
+    def _complete_catalog_metadata(self, metadata, conn):
+        """Aggiunge i dati di esempio ai metadati letti dai cataloghi"""
+        
+        metadata = dict(metadata)
+        
+        try:
+            metadata['sample_data'] = self._get_sample_data(metadata['name'], conn=conn)
+        except Exception as e:
+            logger.warning(f"Could not get sample data for {metadata['name']}: {e}")
+        
+        return metadata
+    
+    def _catalog_type_string(self, type_name, base_type_name, max_length, precision, scale, collation):
+        """
+        Ricostruisce il tipo come lo restituisce l'Inspector SQL Server
+        (stesse regole di lunghezza/precisione del dialetto mssql)
+        """
+        
+        # Tipo utente (es. sysname) o, in mancanza, tipo base
+        ischema_names = self.engine.dialect.ischema_names
+        if type_name not in ischema_names:
+            type_name = base_type_name
+        
+        coltype = ischema_names.get(type_name)
+        if coltype is None:
+            return str(sqltypes.NULLTYPE)
+        
+        kwargs = {}
+        length = max_length if max_length != -1 else None
+        
+        if type_name in ('binary', 'varbinary'):
+            kwargs['length'] = length
+        elif type_name in ('char', 'varchar'):
+            kwargs['length'] = length
+        elif type_name in ('nchar', 'nvarchar'):
+            kwargs['length'] = max_length // 2 if max_length != -1 else None
+        
+        if type_name in ('char', 'varchar', 'nchar', 'nvarchar', 'text', 'ntext') and collation:
+            kwargs['collation'] = collation
+        
+        numeric_base = getattr(sqltypes, 'NumericCommon', sqltypes.Numeric)
+        if issubclass(coltype, numeric_base):
+            kwargs['precision'] = precision
+            if not issubclass(coltype, sqltypes.Float):
+                kwargs['scale'] = scale
+        
+        return str(coltype(**kwargs))
+    
+    def _build_column_info(self, name, type_str, nullable, default, autoincrement):
+        """Costruisce i metadati di una colonna (comune ai due backend)"""
+        
+        return {
+            'name': name,
+            'type': type_str,
+            'nullable': nullable,
+            'default': str(default) if default else None,
+            'autoincrement': autoincrement,
+            # Aggiungi hint per formatter basato sul nome
+            'suggested_formatter': self._suggest_formatter(name, type_str)
+        }
+    
     def _suggest_formatter(self, column_name, column_type):
         """Suggerisce un formatter basato su nome e tipo colonna"""
         
@@ -162,31 +540,37 @@ class SchemaDiscovery:
         # Default
         return 'text'
     
-    def _get_sample_data(self, table_name, limit=5):
+    def _get_sample_data(self, table_name, limit=5, conn=None):
         """Ottiene dati di esempio per analisi pattern"""
         
-        with self.engine.connect() as conn:
-            result = conn.execute(
-                text(f"SELECT TOP {limit} * FROM {table_name}")
-            )
-            
-            sample = []
-            for row in result:
-                sample.append(dict(row._mapping))
-            
-            return sample
+        if conn is None:
+            with self.engine.connect() as conn:
+                return self._get_sample_data(table_name, limit, conn)
+        
+        result = conn.execute(
+            text(f"SELECT TOP {limit} * FROM {table_name}")
+        )
+        
+        sample = []
+        for row in result:
+            sample.append(dict(row._mapping))
+        
+        return sample
     
-    def _save_schema(self, schema):
-        """Salva schema su file JSON"""
+    def _save_schema(self, schema, timings=None, duration=None, backend=None):
+        """Salva schema nella cache binaria"""
         
-        with open(self.schema_file, 'w', encoding='utf-8') as f:
-            json.dump(schema, f, indent=2, ensure_ascii=False, default=str)
+        self.schema_store.save(schema)
         
         # Salva info scan
         scan_info = {
             'timestamp': datetime.now().isoformat(),
             'tables_count': len(schema),
-            'total_columns': sum(len(t['columns']) for t in schema.values())
+            'total_columns': sum(len(t['columns']) for t in schema.values()),
+            'workers': self.scan_workers,
+            'backend': backend,
+            'duration_seconds': round(duration, 2) if duration is not None else None,
+            'table_timings_ms': timings or {}
         }
         
         with open(self.scan_info_file, 'w', encoding='utf-8') as f:
@@ -195,21 +579,40 @@ class SchemaDiscovery:
         logger.info(f"Schema saved to {self.schema_file}")
     
     def load_cached_schema(self):
-        """Carica schema dalla cache"""
+        """
+        Carica schema dalla cache
+        
+        Lo schema è memorizzato in-process finché il file non cambia:
+        il dict restituito è condiviso e non va modificato.
+        """
         
         if not self.schema_file.exists():
+            if self.legacy_schema_file.exists():
+                return self._migrate_legacy_schema()
             raise FileNotFoundError(
                 "Schema cache not found. Run scan_database() first."
             )
         
-        with open(self.schema_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.schema_store.load()
     
     def get_table_info(self, table_name):
-        """Ottieni info di una singola tabella dalla cache"""
+        """Ottieni info di una singola tabella dalla cache (lettura del solo blocco della tabella)"""
+        
+        if not self.schema_file.exists():
+            return self.load_cached_schema().get(table_name)
+        
+        return self.schema_store.get_table(table_name)
+    
+    def _migrate_legacy_schema(self):
+        """Converte db_schema.json (formato precedente) nella cache binaria"""
+        
+        logger.info(f"Migrating {self.legacy_schema_file} to binary schema cache")
+        
+        with open(self.legacy_schema_file, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
         
-        schema = self.load_cached_schema()
-        return schema.get(table_name)
+        self.schema_store.save(schema)
+        return self.schema_store.load()
     
     def get_scan_info(self):
         """Ottieni informazioni sull'ultimo scan"""
@@ -0,0 +1,145 @@
+"""
+Schema Store - Cache binaria dello schema con indice per tabella
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import threading
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaStore:
+    """
+    Salva lo schema in un file binario compatto con un indice per tabella
+    
+    Formato del file:
+        MAGIC | offset indice (uint64) | blocchi pickle per tabella | indice
+    
+    L'indice (nome tabella -> offset, lunghezza) permette di leggere i
+    metadati di una sola tabella con una lettura memory-mapped, senza
+    deserializzare l'intero schema. Schema completo e indice vengono
+    memorizzati in-process e ricaricati solo se il file cambia (mtime/size).
+    """
+    
+    MAGIC = b'SYSCHM01'
+    HEADER = struct.Struct('<8sQ')
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._schema_memo = None   # (firma file, schema)
+        self._index_memo = None    # (firma file, indice)
+    
+    def save(self, schema):
+        """
+        Scrive lo schema (scrittura atomica: file temporaneo + rename)
+        
+        Args:
+            schema: dict nome tabella -> metadati
+        """
+        
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        index = {}
+        
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, 0))
+            
+            for table_name, metadata in schema.items():
+                blob = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+                index[table_name] = (f.tell(), len(blob))
+                f.write(blob)
+            
+            index_offset = f.tell()
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, index_offset))
+        
+        os.replace(tmp_path, self.path)
+        
+        with self._lock:
+            self._schema_memo = None
+            self._index_memo = None
+    
+    def load(self):
+        """
+        Carica lo schema completo (memorizzato finché il file non cambia)
+        
+        Returns:
+            dict: Schema condiviso tra i chiamanti (non va modificato)
+        """
+        
+        signature = self._signature()
+        
+        with self._lock:
+            if self._schema_memo is not None and self._schema_memo[0] == signature:
+                return self._schema_memo[1]
+        
+        with self._open() as mm:
+            index = self._read_index(mm)
+            schema = {
+                table_name: pickle.loads(mm[offset:offset + length])
+                for table_name, (offset, length) in index.items()
+            }
+        
+        with self._lock:
+            self._schema_memo = (signature, schema)
+            self._index_memo = (signature, index)
+        
+        return schema
+    
+    def get_table(self, table_name):
+        """
+        Carica i metadati di una sola tabella
+        
+        Usa lo schema già in memoria se aggiornato, altrimenti legge solo
+        il blocco della tabella tramite l'indice.
+        
+        Returns:
+            dict: Metadati della tabella o None
+        """
+        
+        signature = self._signature()
+        
+        with self._lock:
+            if self._schema_memo is not None and self._schema_memo[0] == signature:
+                return self._schema_memo[1].get(table_name)
+            index_memo = self._index_memo
+        
+        with self._open() as mm:
+            if index_memo is not None and index_memo[0] == signature:
+                index = index_memo[1]
+            else:
+                index = self._read_index(mm)
+                with self._lock:
+                    self._index_memo = (signature, index)
+            
+            entry = index.get(table_name)
+            if entry is None:
+                return None
+            
+            offset, length = entry
+            return pickle.loads(mm[offset:offset + length])
+    
+    def _signature(self):
+        """Firma del file (mtime, dimensione) per invalidare la memoria"""
+        
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def _read_index(self, mm):
+        magic, index_offset = self.HEADER.unpack_from(mm, 0)
+        
+        if magic != self.MAGIC:
+            raise ValueError(f"Invalid schema cache file: {self.path}")
+        
+        return pickle.loads(mm[index_offset:])
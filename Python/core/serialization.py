@@ -0,0 +1,52 @@
+"""
+Serialization - Serializzazione JSON delle risposte API
+"""
+
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # Fallback sul modulo json standard
+    orjson = None
+
+
+def _default(value):
+    """Tipi non gestiti nativamente: date ISO, Decimal come stringa, binari in esadecimale"""
+    
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(payload):
+    """
+    Serializza in JSON (bytes UTF-8) usando orjson se installato
+    
+    Args:
+        payload: Dati da serializzare
+    
+    Returns:
+        bytes: Documento JSON
+    """
+    
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """Risposta Flask con corpo JSON (payload o bytes già serializzati)"""
+    
+    body = payload if isinstance(payload, bytes) else dumps(payload)
+    return Response(body, status=status, mimetype='application/json')
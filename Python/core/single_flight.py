@@ -0,0 +1,201 @@
+"""
+Single Flight - Coalescenza di esecuzioni identiche concorrenti
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo coalescenza tra thread
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Esecuzione in corso condivisa tra i thread in attesa"""
+    
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Esegue una sola volta le chiamate identiche concorrenti
+    
+    Le richieste con la stessa chiave arrivate mentre un'esecuzione è in
+    corso attendono quella e ne condividono il risultato. Con `lock_dir`
+    la coalescenza vale anche tra processi worker: un lock file per chiave
+    serializza le esecuzioni e il risultato viene condiviso su file.
+    """
+    
+    # Secondi senza utilizzo dopo i quali i file in lock_dir vengono eliminati
+    STALE_AFTER = 3600
+    
+    # Secondi minimi tra due pulizie di lock_dir
+    SWEEP_INTERVAL = 600
+    
+    def __init__(self, lock_dir=None):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executions': 0, 'coalesced': 0}
+        
+        self._last_sweep = 0
+        self.lock_dir = None
+        if lock_dir:
+            if fcntl is None:
+                logger.warning("Cross-process query coalescing not supported on this platform")
+            else:
+                self.lock_dir = Path(lock_dir)
+                self.lock_dir.mkdir(parents=True, exist_ok=True)
+    
+    def do(self, key, func):
+        """
+        Esegue func() o attende l'esecuzione identica già in corso
+        
+        Args:
+            key: Chiave (stringa) che identifica la chiamata
+            func: Callable senza argomenti
+        
+        Returns:
+            Risultato di func() (condiviso: non va modificato)
+        """
+        
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.stats['coalesced'] += 1
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            if self.lock_dir is not None:
+                call.result = self._do_across_processes(key, func)
+            else:
+                call.result = func()
+            self.stats['executions'] += 1
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+    
+    def _do_across_processes(self, key, func):
+        """
+        Coalescenza tra processi tramite lock file e risultato su disco
+        
+        Chi trova il lock occupato lascia un file `.wait` prima di attenderlo:
+        il risultato viene scritto su disco solo se qualcuno attende, e
+        l'ultimo lettore lo elimina. I lock file rimasti vengono rimossi
+        periodicamente (vedi _sweep).
+        """
+        
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        lock_path = self.lock_dir / f"{digest}.lock"
+        result_path = self.lock_dir / f"{digest}.result"
+        wait_path = None
+        
+        started = time.time()
+        self._sweep(started)
+        
+        with open(lock_path, 'a+b') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Esecuzione in corso in un altro processo: segnala l'attesa
+                wait_path = self.lock_dir / f"{digest}.{os.getpid()}-{threading.get_ident()}.wait"
+                wait_path.touch()
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            
+            try:
+                os.utime(lock_path)
+                
+                if wait_path is not None:
+                    wait_path.unlink(missing_ok=True)
+                    result = self._read_shared_result(digest, result_path, started)
+                    if result is not None:
+                        self.stats['coalesced'] += 1
+                        return result[0]
+                
+                result = func()
+                
+                if self._has_waiters(digest):
+                    self._write_shared_result(result_path, result)
+                
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _has_waiters(self, digest):
+        return any(self.lock_dir.glob(f"{digest}.*.wait"))
+    
+    def _read_shared_result(self, digest, result_path, started):
+        """
+        Risultato scritto da un altro processo dopo l'inizio dell'attesa
+        
+        Returns:
+            tuple: (risultato,) o None se non disponibile
+        """
+        
+        try:
+            if result_path.stat().st_mtime < started:
+                return None
+            with open(result_path, 'rb') as f:
+                result = (pickle.load(f),)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read shared query result: {e}")
+            return None
+        
+        # Ultimo lettore: il file non serve più
+        if not self._has_waiters(digest):
+            result_path.unlink(missing_ok=True)
+        
+        return result
+    
+    def _write_shared_result(self, result_path, result):
+        tmp_path = result_path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, result_path)
+        except Exception as e:
+            logger.warning(f"Could not share query result: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _sweep(self, now):
+        """Elimina lock, risultati e marker non usati da STALE_AFTER secondi (al più ogni SWEEP_INTERVAL)"""
+        
+        with self._lock:
+            if now - self._last_sweep < self.SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        
+        for path in self.lock_dir.iterdir():
+            try:
+                if now - path.stat().st_mtime > self.STALE_AFTER:
+                    path.unlink()
+            except OSError:
+                continue
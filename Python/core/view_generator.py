@@ -2,152 +2,800 @@
 View Generator - Genera automaticamente viste e route Flask per ogni tabella
 """
 
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, abort, Response, stream_with_context
 from .query_builder import QueryBuilder
-from .formatters import TableFormatter
+from .formatters import TableFormatter, SmartFormatter, EMPTY_CELL, row_key
+from .live_feed import LiveFeedManager
+from .serialization import dumps, json_response
+from .exporters import EXPORT_FORMATS
+from markupsafe import escape
+from urllib.parse import urlencode
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class TableDefinition:
+    """Schema, override e formatter di una tabella, risolti una sola volta"""
+    
+    __slots__ = ('name', 'schema', 'override', 'formatter')
+    
+    def __init__(self, name, schema, override):
+        self.name = name
+        self.schema = schema
+        self.override = override
+        
+        # Senza primary key le celle non si rileggono da /api/cell: contenuto espandibile incluso
+        formatter_override = override
+        if not schema.get('primary_keys'):
+            column_overrides = {col['name']: None for col in schema.get('columns', [])}
+            column_overrides.update(override.get('columns') or {})
+            formatter_override = {
+                **override,
+                'columns': {
+                    col: {'lazy': False, **(col_config or {})}
+                    for col, col_config in column_overrides.items()
+                }
+            }
+        
+        self.formatter = TableFormatter(schema, formatter_override)
+
+
+class ViewRegistry:
+    """
+    Definizioni di tabelle e viste servite dal dispatcher
+    
+    Rescan e reload degli override creano un nuovo registro che sostituisce
+    quello attivo; le richieste in corso completano con il registro letto
+    all'inizio. Dopo la costruzione il registro si limita a memorizzare
+    le definizioni risolte alla prima richiesta.
+    """
+    
+    def __init__(self, schema, overrides, lazy=False):
+        self.schema = schema
+        self.overrides = overrides
+        self.lazy = lazy
+        
+        # Route path -> ('table', nome tabella) | ('view', nome vista)
+        self.routes = {}
+        
+        # Nome minuscolo -> nome tabella (route lazy /table/<name> e API)
+        self.table_index = {}
+        
+        # Definizioni tabella materializzate alla prima richiesta
+        self.tables = {}
+        
+        # TableFormatter (con piani compilati) riusati tra le richieste
+        self.formatters = {}
+
+
 class ViewGenerator:
     """Genera dinamicamente viste Flask per tabelle del database"""
     
-    def __init__(self, app, engine, schema, overrides=None):
+    # Numero di frammenti del template accumulati prima di ogni invio in streaming
+    STREAM_BUFFER_SIZE = 50
+    
+    # Endpoint unico che smista le richieste verso tabelle e viste
+    DISPATCH_ENDPOINT = 'dynamic_view'
+    
+    # Endpoint Server-Sent Events per gli aggiornamenti live (/live/<route>)
+    LIVE_ENDPOINT = 'dynamic_live'
+    
+    # Secondi di default tra due interrogazioni dei feed live
+    DEFAULT_LIVE_INTERVAL = 5
+    
+    # Endpoint API JSON per tabella (/api/table/<nome>)
+    API_ENDPOINT = 'dynamic_api'
+    
+    # Parametri riservati dell'API (gli altri sono filtri sulle colonne)
+    API_RESERVED_ARGS = ('limit', 'offset', 'cursor', 'fields')
+    
+    # Righe massime per richiesta API (sovrascrivibile con `api_max_limit`)
+    DEFAULT_API_MAX_LIMIT = 1000
+    
+    # Export in streaming di tabelle e viste (/export/<route>?format=csv|ndjson|parquet)
+    EXPORT_ENDPOINT = 'dynamic_export'
+    EXPORT_RESERVED_ARGS = ('format', 'formatted', 'fields')
+    
+    # Righe lette dal cursore per ogni fetchmany durante l'export
+    EXPORT_BATCH_SIZE = 2000
+    
+    # Contenuto completo delle celle espandibili, caricato al click (/api/cell/<nome>)
+    CELL_ENDPOINT = 'dynamic_cell'
+    
+    # Parametri riservati delle pagine tabella (gli altri sono filtri su colonne indicizzate)
+    TABLE_RESERVED_ARGS = ('limit', 'page', 'cursor', 'stream', 'sort', 'q')
+    
+    def __init__(self, app, engine, schema=None, overrides=None, cache_manager=None, locale_getter=None):
         self.app = app
         self.engine = engine
-        self.schema = schema
-        self.overrides = overrides or {}
-        self.query_builder = QueryBuilder(engine)
+        self.cache_manager = cache_manager
+        self.registry = None
+        
+        # Lingua della richiesta per numeri e date (None: formato di default)
+        self.locale_getter = locale_getter
+        
+        global_config = (overrides or {}).get('global') or {}
+        self.query_builder = QueryBuilder(
+            engine,
+            coalesce=global_config.get('coalesce_queries', True),
+            lock_dir=global_config.get('coalesce_lock_dir')
+        )
+        
+        # Un feed (un solo polling del database) per tabella/vista live
+        self.live_feeds = LiveFeedManager()
+        
+        self._register_dispatcher()
+        
+        if schema is not None:
+            self.load(schema, overrides)
+    
+    @property
+    def schema(self):
+        return self.registry.schema if self.registry else {}
+    
+    @property
+    def overrides(self):
+        return self.registry.overrides if self.registry else {}
+    
+    def load(self, schema, overrides=None):
+        """
+        Costruisce il registro di tabelle e viste e lo rende attivo
+        
+        Le route esistenti non vengono toccate: il nuovo registro sostituisce
+        il precedente con un solo assegnamento, quindi rescan e reload
+        degli override hanno effetto senza riavviare l'app.
+        
+        Args:
+            schema: Schema del database
+            overrides: Override tabelle/viste/globali
+        
+        Returns:
+            ViewRegistry: registro attivo
+        """
+        
+        overrides = overrides or {}
+        lazy = bool(overrides.get('global', {}).get('lazy_routes', False))
+        registry = ViewRegistry(schema, overrides, lazy=lazy)
+        
+        self._add_table_routes(registry)
+        
+        for view_name, view_config in registry.overrides.get('views', {}).items():
+            self._add_custom_view(registry, view_name, view_config)
+        
+        self._check_indexes(registry)
+        
+        previous = self.registry
+        self.registry = registry
+        
+        # Risultati formattati e feed live con schema/override precedenti non più validi
+        if previous is not None:
+            self.live_feeds.reset()
+            if self.cache_manager is not None:
+                self.cache_manager.invalidate_results()
+        
+        logger.info(f"✅ Route registry loaded: {len(registry.routes)} routes")
+        return registry
+    
+    def _check_indexes(self, registry):
+        """Segnala ordinamenti, filtri e colonne incrementali configurati senza un indice"""
+        
+        for table_name, table_override in registry.overrides.get('tables', {}).items():
+            if table_name not in registry.schema or not table_override:
+                continue
+            
+            for warning in self.query_builder.check_index_usage(registry.schema[table_name], table_override):
+                logger.warning(f"⚠️  {table_name}: {warning}")
+    
+    def explain_table(self, table_key):
+        """
+        Piano di esecuzione stimato della query di una pagina tabella
+        
+        Accetta gli stessi parametri della pagina (limit, page, cursor, sort, q, filtri).
+        
+        Returns:
+            dict: Query, parametri, avvisi sugli indici, operatori e piano XML
+        
+        Raises:
+            KeyError: Tabella sconosciuta
+            ValueError: Parametri non validi
+        """
+        
+        registry = self.registry
+        table_name = registry.table_index.get(table_key.lower()) if registry else None
+        
+        if table_name is None or self._should_skip_table(table_name, registry.overrides):
+            raise KeyError(table_key)
+        
+        definition = self.get_table_definition(registry, table_name)
+        runtime_config, page, cursor, _, search, filters = self._parse_table_args(
+            definition.schema, definition.override
+        )
+        
+        query, params = self.query_builder.build_table_query(
+            table_name,
+            definition.schema,
+            runtime_config,
+            page=page,
+            cursor=cursor,
+            filters=filters,
+            search=search
+        )
+        plan = self.query_builder.get_query_plan(query, params)
+        
+        return {
+            'table': table_name,
+            'query': query,
+            'params': params,
+            'index_warnings': self.query_builder.check_index_usage(definition.schema, definition.override),
+            'operators': self.query_builder.summarize_plan(plan) if plan else [],
+            'plan': plan
+        }
     
-    def register_all_table_routes(self):
-        """Registra automaticamente route per tutte le tabelle"""
+    def _register_dispatcher(self):
+        """Registra (una sola volta per app) le route che smistano tutte le viste"""
+        
+        rules = (
+            ('/<path:route_path>', self.DISPATCH_ENDPOINT, self._dispatch),
+            ('/live/<path:route_path>', self.LIVE_ENDPOINT, self._dispatch_live),
+            ('/api/table/<table_key>', self.API_ENDPOINT, self._dispatch_api),
+            ('/export/<path:route_path>', self.EXPORT_ENDPOINT, self._dispatch_export),
+            ('/api/cell/<table_key>', self.CELL_ENDPOINT, self._dispatch_cell)
+        )
+        
+        for rule, endpoint, view_func in rules:
+            if endpoint in self.app.view_functions:
+                self.app.view_functions[endpoint] = view_func
+            else:
+                self.app.add_url_rule(rule, endpoint=endpoint, view_func=view_func)
+    
+    def _dispatch(self, route_path):
+        """Risolve il path sul registro attivo e genera la vista"""
+        
+        registry = self.registry
+        kind, name = self._resolve_target(registry, route_path)
+        
+        if kind == 'table':
+            return self._render_table(registry, name)
+        return self._render_custom_view(registry, name)
+    
+    def _dispatch_live(self, route_path):
+        """Stream SSE con le differenze di righe di una tabella/vista"""
+        
+        registry = self.registry
+        kind, name = self._resolve_target(registry, route_path)
+        locale = self._request_locale()
+        
+        if kind == 'table':
+            config = self.get_table_definition(registry, name).override
+            loader_factory = lambda: self._live_table_loader(registry, name, locale)
+        else:
+            config = registry.overrides['views'][name]
+            loader_factory = lambda: self._live_view_loader(registry, name, locale)
+        
+        global_config = registry.overrides.get('global', {})
+        interval = config.get('live_interval', global_config.get('live_interval', self.DEFAULT_LIVE_INTERVAL))
         
-        logger.info("🔧 Registering dynamic routes for all tables...")
+        # Un feed per lingua: le celle inviate sono già formattate
+        feed_key = f'{kind}:{name}' if locale is None else f'{kind}:{name}:{locale}'
+        feed = self.live_feeds.get_feed(feed_key, loader_factory, max(1, interval))
+        
+        response = Response(feed.stream(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def _resolve_target(self, registry, route_path):
+        """Restituisce ('table'|'view', nome) per un path (404 se sconosciuto)"""
+        
+        if registry is None:
+            abort(404)
+        
+        path = f'/{route_path}'
+        target = registry.routes.get(path)
+        
+        if target is None and registry.lazy:
+            target = self._resolve_lazy_route(registry, path)
+        
+        if target is None:
+            abort(404)
+        
+        return target
+    
+    def _live_table_loader(self, registry, table_name, locale=None):
+        """Loader del feed live di una tabella: prima pagina, righe per primary key"""
+        
+        definition = self.get_table_definition(registry, table_name)
+        table_schema = definition.schema
+        config = definition.override
+        
+        def load():
+            rows, _ = self.query_builder.paginate(
+                self.query_builder.fetch_window(table_name, table_schema, config), table_schema, config
+            )
+            visible = self._get_visible_columns(rows.columns, table_schema, config, config)
+            formatted = definition.formatter.format_table_data(rows, rows.columns, visible, locale=locale)
+            
+            key_columns = table_schema.get('primary_keys') or []
+            return visible, self._live_rows(rows, formatted, key_columns)
+        
+        return load
+    
+    def _live_view_loader(self, registry, view_name, locale=None):
+        """Loader del feed live di una vista custom (chiave: `live_key` nello YAML)"""
+        
+        view_config = registry.overrides['views'][view_name]
+        query, params = self.query_builder.build_custom_query(view_config)
+        
+        def load():
+            rows = self.query_builder.execute_query(query, params)
+            formatted = self._format_custom_rows(registry, view_name, view_config, rows, locale=locale)
+            return rows.columns, self._live_rows(rows, formatted, view_config.get('live_key') or [])
+        
+        return load
+    
+    def _live_rows(self, rows, formatted_rows, key_columns):
+        """
+        Associa a ogni riga formattata la sua chiave
+        
+        Senza colonne chiave (o se non sono nel risultato) la chiave è
+        l'intera riga: una modifica diventa rimozione + inserimento.
+        """
+        
+        if key_columns and all(col in rows.index for col in key_columns):
+            key_indexes = [rows.index[col] for col in key_columns]
+        else:
+            key_indexes = range(len(rows.columns))
+        
+        live_rows = []
+        
+        for row, formatted in zip(rows, formatted_rows):
+            key = row_key(row[i] for i in key_indexes)
+            
+            cells = []
+            for cell in formatted:
+                if hasattr(cell, 'to_dict'):
+                    cell_data = cell.to_dict()
+                    del cell_data['raw']
+                else:
+                    cell_data = {'value': cell}
+                cells.append(cell_data)
+            
+            live_rows.append((key, cells))
+        
+        return live_rows
+    
+    def _add_table_routes(self, registry):
+        """
+        Aggiunge al registro le route di tutte le tabelle
+        
+        In modalità lazy registra subito solo le route personalizzate
+        (`route` negli override) e un indice dei nomi: le route /table/<name>
+        vengono risolte alla prima richiesta.
+        """
         
         registered_count = 0
+        table_overrides = registry.overrides.get('tables', {})
+        
+        registry.table_index = {name.lower(): name for name in registry.schema}
+        
+        if registry.lazy:
+            for table_name, table_override in table_overrides.items():
+                if table_name in registry.schema and 'route' in (table_override or {}):
+                    self._add_route(registry, table_override['route'], ('table', table_name))
+                    registered_count += 1
+            
+            logger.info(
+                f"✅ Lazy routing: {len(registry.table_index)} tables indexed, "
+                f"{registered_count} custom routes registered"
+            )
+            return
         
-        for table_name, table_schema in self.schema.items():
+        for table_name in registry.schema:
             try:
                 # Skip tabelle di sistema
-                if self._should_skip_table(table_name):
+                if self._should_skip_table(table_name, registry.overrides):
                     continue
                 
-                # Registra route
-                self._register_table_route(table_name, table_schema)
+                # Determina route path
+                table_override = table_overrides.get(table_name, {})
+                route_path = table_override.get('route', f'/table/{table_name.lower()}')
+                
+                self._add_route(registry, route_path, ('table', table_name))
                 registered_count += 1
                 
                 logger.debug(f"✓ Registered route for {table_name}")
-                
+            
             except Exception as e:
                 logger.error(f"✗ Error registering {table_name}: {e}")
         
         logger.info(f"✅ Registered {registered_count} dynamic table routes")
     
-    def register_custom_view(self, view_name, view_config):
-        """Registra una vista custom (query complessa/stored procedure)"""
+    def _add_custom_view(self, registry, view_name, view_config):
+        """Aggiunge al registro una vista custom (query complessa/stored procedure)"""
+        
+        # Configurazione non valida (es. placeholder del template usato come nome): errore all'avvio
+        try:
+            self.query_builder.build_custom_query(view_config)
+        except ValueError as e:
+            logger.error(f"✗ Error registering custom view {view_name}: {e}")
+            return
         
         route_path = view_config.get('route', f'/{view_name}')
+        self._add_route(registry, route_path, ('view', view_name))
         
-        @self.app.route(route_path)
-        def custom_view():
-            try:
-                # Costruisci query
-                query = self.query_builder.build_custom_query(view_config)
-                
-                # Esegui query
-                rows, columns = self.query_builder.execute_query(query)
-                
-                # Formattazione (se specificata)
-                if 'column_overrides' in view_config:
-                    formatter = TableFormatter(
-                        {'columns': [{'name': c} for c in columns]},
-                        view_config.get('column_overrides', {})
-                    )
-                    formatted_rows = formatter.format_table_data(rows)
-                else:
-                    formatted_rows = rows
-                
-                # Render template
-                template = view_config.get('template', 'dynamic_custom_view.html')
-                
-                return render_template(
-                    template,
-                    dati=formatted_rows,
-                    colonne=columns,
-                    view_name=view_name,
-                    view_config=view_config
-                )
-                
-            except Exception as e:
-                logger.error(f"Error in custom view {view_name}: {e}")
-                return f"Error loading view: {str(e)}", 500
+        logger.info(f"✓ Registered custom view: {view_name} at {route_path}")
+    
+    def _resolve_lazy_route(self, registry, path):
+        """Risolve /table/<name> dall'indice dei nomi e memorizza la route"""
         
-        # Imposta nome funzione univoco
-        custom_view.__name__ = f'custom_view_{view_name}'
+        prefix = '/table/'
+        if not path.startswith(prefix):
+            return None
         
-        logger.info(f"✓ Registered custom view: {view_name} at {route_path}")
+        table_name = registry.table_index.get(path[len(prefix):])
+        if table_name is None or self._should_skip_table(table_name, registry.overrides):
+            return None
+        
+        # Le tabelle con route personalizzata non rispondono al path di default
+        table_override = registry.overrides.get('tables', {}).get(table_name) or {}
+        if 'route' in table_override:
+            return None
+        
+        target = ('table', table_name)
+        registry.routes[path] = target
+        
+        logger.debug(f"✓ Materialized route for {table_name}")
+        return target
     
-    def _register_table_route(self, table_name, table_schema):
-        """Registra una route per una singola tabella"""
+    def get_table_definition(self, registry, table_name):
+        """
+        Restituisce la definizione di una tabella, creata alla prima richiesta
+        
+        Override e TableFormatter (con i suoi piani compilati) vengono
+        risolti una volta sola per registro.
+        """
         
-        # Carica override se esiste
-        table_override = self.overrides.get('tables', {}).get(table_name, {})
+        definition = registry.tables.get(table_name)
         
-        # Determina route path
-        route_path = table_override.get('route', f'/table/{table_name.lower()}')
+        if definition is None:
+            table_override = registry.overrides.get('tables', {}).get(table_name) or {}
+            definition = TableDefinition(table_name, registry.schema[table_name], table_override)
+            registry.tables[table_name] = definition
         
-        # Crea view function
-        @self.app.route(route_path)
-        def table_view():
+        return definition
+    
+    def _add_route(self, registry, route_path, target):
+        """Registra un path nel registro (segnala i duplicati)"""
+        
+        existing = registry.routes.get(route_path)
+        if existing is not None and existing != target:
+            logger.warning(f"Route {route_path} of {target[1]} overrides {existing[1]}")
+        
+        registry.routes[route_path] = target
+    
+    def _render_custom_view(self, registry, view_name):
+        """Genera una vista custom"""
+        
+        view_config = registry.overrides['views'][view_name]
+        locale = self._request_locale()
+        
+        try:
+            # Costruisci query
+            query, params = self.query_builder.build_custom_query(view_config)
+            
+            template = view_config.get('template', 'dynamic_custom_view.html')
+            context = {
+                'view_name': view_name,
+                'view_config': view_config,
+                'live_url': self._live_url(view_config)
+            }
+            
+            # Streaming: righe dal cursore direttamente al template (senza cache)
+            if self._use_streaming(view_config):
+                result = self.query_builder.stream_query(query, params)
+                context['dati'] = self._format_custom_rows(
+                    registry, view_name, view_config, result, streaming=True, locale=locale
+                )
+                context['colonne'] = result.columns
+                return self._stream_template(template, result, **context)
+            
+            def load():
+                result = self.query_builder.execute_query(query, params)
+                return self._format_custom_rows(registry, view_name, view_config, result, locale=locale), result.columns
+            
+            # Esegui query (o usa la cache risultati, una voce per lingua)
+            context['dati'], context['colonne'] = self._load_cached(
+                registry, view_name, query, params, view_config, load, variant=locale
+            )
+            
+            return render_template(template, **context)
+        
+        except Exception as e:
+            logger.error(f"Error in custom view {view_name}: {e}")
+            return f"Error loading view: {str(e)}", 500
+    
+    def _render_table(self, registry, table_name):
+        """Genera la vista di una singola tabella"""
+        
+        definition = self.get_table_definition(registry, table_name)
+        table_schema = definition.schema
+        table_override = definition.override
+        formatter = definition.formatter
+        locale = self._request_locale()
+        
+        try:
+            # Parametri dalla query string
             try:
-                # Parametri dalla query string
-                limit = request.args.get('limit', table_override.get('default_limit', 100), type=int)
-                page = request.args.get('page', 1, type=int)
-                
-                # Aggiorna config con parametri runtime
-                runtime_config = {**table_override}
-                runtime_config['default_limit'] = limit
-                
-                # Costruisci query
-                query = self.query_builder.build_table_query(
-                    table_name, 
-                    table_schema, 
-                    runtime_config
+                runtime_config, page, cursor, sort, search, filters = self._parse_table_args(
+                    table_schema, table_override
                 )
+            except ValueError as e:
+                # Il messaggio può contenere testo della query string: va escapato
+                return f"Invalid request: {escape(str(e))}", 400
+            
+            # Costruisci query
+            query, params = self.query_builder.build_table_query(
+                table_name, 
+                table_schema, 
+                runtime_config,
+                page=page,
+                cursor=cursor,
+                filters=filters,
+                search=search
+            )
+            
+            # Finestra incrementale e feed live valgono solo per la vista predefinita
+            default_view = not (page or cursor or sort or search or filters)
+            
+            # Chiave di riga (data-key) per live feed e popup caricati al click
+            key_columns = table_schema.get('primary_keys') or None
+            
+            # Esegui query e paginazione (limite e cursori prev/next)
+            if self._use_streaming(table_override):
+                # Streaming: righe dal cursore direttamente al template (senza cache)
+                result = self.query_builder.stream_query(query, params)
+                rows, pagination = self.query_builder.paginate_stream(
+                    result,
+                    table_schema,
+                    runtime_config,
+                    page=page,
+                    cursor=cursor
+                )
+                visible_columns = self._get_visible_columns(
+                    result.columns, table_schema, table_override, runtime_config
+                )
+                formatted_rows = formatter.iter_format_table_data(
+                    rows, result.columns, visible_columns, key_columns, locale
+                )
+            else:
+                result = None
                 
-                # Esegui query
-                rows, columns = self.query_builder.execute_query(query)
-                
-                # Formattazione intelligente
-                formatter = TableFormatter(table_schema, table_override)
-                formatted_rows = formatter.format_table_data(rows)
-                
-                # Filtra colonne nascoste
-                visible_columns = [
-                    col for col in columns 
-                    if col not in table_override.get('hide_columns', [])
-                ]
+                def load():
+                    # Prima pagina: aggiornamento incrementale se configurato (`incremental`)
+                    if default_view:
+                        rows = self.query_builder.fetch_window(table_name, table_schema, runtime_config)
+                    else:
+                        rows = self.query_builder.execute_query(query, params)
+                    
+                    page_rows, page_info = self.query_builder.paginate(
+                        rows,
+                        table_schema,
+                        runtime_config,
+                        page=page,
+                        cursor=cursor
+                    )
+                    visible = self._get_visible_columns(
+                        page_rows.columns, table_schema, table_override, runtime_config
+                    )
+                    return (
+                        formatter.format_table_data(page_rows, page_rows.columns, visible, key_columns, locale),
+                        visible,
+                        page_info
+                    )
                 
-                # Render template
-                return render_template(
-                    'dynamic_table.html',
-                    table_name=table_name,
-                    display_name=table_override.get('display_name', table_name),
-                    dati=formatted_rows,
-                    colonne=visible_columns,
-                    schema=table_schema,
-                    config=table_override
+                # Formattazione intelligente (o cache risultati, una voce per lingua)
+                formatted_rows, visible_columns, pagination = self._load_cached(
+                    registry, table_name, query, params, table_override, load, variant=locale
                 )
-                
-            except Exception as e:
-                logger.error(f"Error in table view {table_name}: {e}")
-                return f"Error loading table: {str(e)}", 500
+            
+            context = {
+                'table_name': table_name,
+                'display_name': table_override.get('display_name', table_name),
+                'dati': formatted_rows,
+                'colonne': visible_columns,
+                'schema': table_schema,
+                'config': table_override,
+                'pagination': pagination,
+                'pagination_args': self._pagination_args(),
+                'sort_args': self._pagination_args(exclude=('page', 'cursor', 'sort')),
+                'sortable_columns': self.query_builder.get_indexed_columns(table_schema),
+                'sort': sort,
+                'search': search,
+                'live_url': self._live_url(table_override) if default_view else None,
+                'cell_url': f'/api/cell/{table_name.lower()}' if key_columns else None
+            }
+            
+            # Render template
+            if result is not None:
+                return self._stream_template('dynamic_table.html', result, **context)
+            
+            return render_template('dynamic_table.html', **context)
+        
+        except Exception as e:
+            logger.error(f"Error in table view {table_name}: {e}")
+            return f"Error loading table: {str(e)}", 500
+    
+    def _parse_table_args(self, table_schema, table_override):
+        """
+        Legge i parametri di una pagina tabella dalla query string
+        
+        Ordinamento, ricerca e filtri vengono eseguiti in SQL e sono
+        ammessi solo sulle colonne indicizzate.
+        
+        Returns:
+            tuple: (config runtime, page, cursor, sort, search, filtri)
+        
+        Raises:
+            ValueError: Colonna non indicizzata, valore non valido o ricerca
+                        senza colonne compatibili
+        """
+        
+        limit = request.args.get('limit', table_override.get('default_limit', 100), type=int)
+        page = request.args.get('page', type=int)
+        cursor = request.args.get('cursor')
+        sort = request.args.get('sort', '').strip()
+        search = request.args.get('q', '').strip()
+        
+        # Aggiorna config con parametri runtime
+        runtime_config = {**table_override}
+        runtime_config['default_limit'] = limit
+        
+        if sort:
+            runtime_config['order_by'] = self.query_builder.parse_sort(table_schema, sort)
+        
+        # Parametri che non sono colonne (utm_*, cache-buster, ...) vengono ignorati
+        filters = self.query_builder.parse_filters(
+            table_schema, request.args, exclude=self.TABLE_RESERVED_ARGS, indexed_only=True, ignore_unknown=True
+        )
+        
+        # Ricerca non applicabile: errore invece di righe non filtrate
+        if search and not self.query_builder.get_search_columns(table_schema, runtime_config, search):
+            raise ValueError(
+                f"search '{search}' cannot be applied: no indexed text column "
+                f"(or integer column for numeric terms) to search"
+            )
+        
+        return runtime_config, page, cursor, sort, search, filters
+    
+    def get_formatter(self, registry, key, schema, overrides):
+        """
+        Restituisce il TableFormatter di una tabella/vista, creato una volta sola
+        
+        Il formatter conserva i piani di formattazione compilati, quindi
+        la risoluzione dei formatter per colonna avviene solo alla prima richiesta.
+        I formatter appartengono al registro: un reload li ricrea.
+        """
+        
+        formatter = registry.formatters.get(key)
+        
+        if formatter is None:
+            formatter = TableFormatter(schema, overrides)
+            registry.formatters[key] = formatter
+        
+        return formatter
+    
+    def _get_visible_columns(self, columns, table_schema, table_override, runtime_config):
+        """Filtra colonne nascoste (e colonne chiave aggiunte per il keyset)"""
+        
+        selected_columns = self.query_builder._get_columns_list(table_schema, runtime_config)
+        hide_columns = table_override.get('hide_columns', [])
+        
+        return [col for col in columns if col in selected_columns and col not in hide_columns]
+    
+    def _format_custom_rows(self, registry, view_name, view_config, result, streaming=False, locale=None):
+        """Formatta le righe di una vista custom (se ha column_overrides)"""
+        
+        if 'column_overrides' not in view_config:
+            return result
+        
+        # Righe non rileggibili per primary key: celle espandibili con contenuto incluso
+        column_overrides = {
+            col: {'lazy': False, **(col_config or {})}
+            for col, col_config in view_config.get('column_overrides', {}).items()
+        }
+        
+        formatter = self.get_formatter(
+            registry,
+            f'view:{view_name}',
+            {'columns': []},
+            {'columns': column_overrides}
+        )
+        
+        if streaming:
+            return formatter.iter_format_table_data(result, result.columns, locale=locale)
+        return formatter.format_table_data(result, result.columns, locale=locale)
+    
+    def _load_cached(self, registry, view_name, query, params, config, loader, variant=None):
+        """
+        Restituisce il risultato di loader() usando la cache risultati
+        
+        La cache è attiva solo se la tabella/vista (o la config globale)
+        definisce `cache_ttl` in secondi.
+        """
+        
+        cache_ttl = config.get('cache_ttl', registry.overrides.get('global', {}).get('cache_ttl', 0))
+        
+        if not cache_ttl or self.cache_manager is None:
+            return loader()
+        
+        key = self.cache_manager.make_result_key(view_name, query, params, variant)
+        cached = self.cache_manager.get_result(key)
+        
+        if cached is not None:
+            return cached
+        
+        value = loader()
+        self.cache_manager.set_result(key, value, cache_ttl)
+        return value
+    
+    def _request_locale(self):
+        """Lingua della richiesta corrente (None senza locale_getter)"""
+        
+        return self.locale_getter() if self.locale_getter else None
+    
+    def _live_url(self, config, page=None, cursor=None):
+        """URL del feed live (solo con `live: true` e sulla prima pagina)"""
+        
+        if not config.get('live') or page or cursor:
+            return None
+        return f'/live{request.path}'
+    
+    def _pagination_args(self, exclude=('page', 'cursor')):
+        """Parametri della richiesta da conservare nei link di paginazione (limit, sort, q, filtri)"""
+        
+        args = [
+            (key, value) for key, value in request.args.items(multi=True)
+            if key not in exclude
+        ]
+        return f"&{urlencode(args)}" if args else ''
+    
+    def _use_streaming(self, config):
+        """
+        Determina se la risposta va generata in streaming
+        
+        Attivabile per tabella/vista con `streaming: true` nello YAML
+        o per singola richiesta con ?stream=1 (?stream=0 lo disattiva).
+        """
+        
+        stream_arg = request.args.get('stream', type=int)
+        if stream_arg is not None:
+            return bool(stream_arg)
+        
+        return bool(config.get('streaming', False))
+    
+    def _stream_template(self, template_name, result, **context):
+        """
+        Renderizza un template in streaming con risposta chunked
+        
+        Le righe vengono lette dal cursore, formattate e inviate al client
+        a blocchi, senza mai materializzare l'intera pagina in memoria.
+        Il cursore viene chiuso a fine risposta o alla disconnessione del client.
+        """
         
-        # Imposta nome funzione univoco (importante per Flask)
-        table_view.__name__ = f'table_view_{table_name.lower()}'
+        app = self.app
+        app.update_template_context(context)
+        template = app.jinja_env.get_template(template_name)
+        
+        stream = template.stream(context)
+        stream.enable_buffering(self.STREAM_BUFFER_SIZE)
+        
+        response = Response(stream_with_context(stream), mimetype='text/html')
+        response.call_on_close(result.close)
+        return response
     
-    def _should_skip_table(self, table_name):
+    def _should_skip_table(self, table_name, overrides):
         """Determina se una tabella deve essere skippata"""
         
         # Skip tabelle di sistema
@@ -158,47 +806,296 @@ class ViewGenerator:
                 return True
         
         # Check blacklist globale
-        blacklist = self.overrides.get('global', {}).get('skip_tables', [])
+        blacklist = overrides.get('global', {}).get('skip_tables', [])
         if table_name in blacklist:
             return True
         
         return False
     
-    def generate_api_endpoint(self, table_name, table_schema):
-        """Genera endpoint API REST per una tabella"""
+    def _dispatch_api(self, table_key):
+        """
+        API JSON di una tabella
         
-        api_path = f'/api/table/{table_name.lower()}'
+        Parametri:
+            fields=a,b          colonne da restituire
+            <col>=v             filtro di uguaglianza (valore tipizzato dallo schema)
+            <col>__gte=v        filtri di intervallo: gt, gte, lt, lte, ne
+            limit, offset       paginazione OFFSET/FETCH
+            cursor              paginazione keyset (next_cursor/prev_cursor della risposta)
+        """
         
-        @self.app.route(api_path)
-        def api_table():
-            try:
-                # Parametri
-                limit = request.args.get('limit', 100, type=int)
-                offset = request.args.get('offset', 0, type=int)
-                
-                # Costruisci query con paginazione
-                query = self.query_builder.build_table_query(
-                    table_name, 
-                    table_schema,
-                    {'default_limit': limit}
+        registry = self.registry
+        table_name = registry.table_index.get(table_key.lower()) if registry else None
+        
+        if table_name is None or self._should_skip_table(table_name, registry.overrides):
+            return json_response({'error': f'Unknown table: {table_key}'}, 404)
+        
+        definition = self.get_table_definition(registry, table_name)
+        table_schema = definition.schema
+        table_override = definition.override
+        
+        global_config = registry.overrides.get('global', {})
+        max_limit = table_override.get('api_max_limit', global_config.get('api_max_limit', self.DEFAULT_API_MAX_LIMIT))
+        
+        try:
+            limit = request.args.get('limit', table_override.get('default_limit', 100), type=int)
+            offset = request.args.get('offset', 0, type=int)
+            cursor = request.args.get('cursor')
+            
+            if limit < 1 or offset < 0:
+                raise ValueError("limit must be positive and offset not negative")
+            
+            runtime_config = {**table_override}
+            runtime_config['default_limit'] = min(limit, max_limit)
+            
+            fields = request.args.get('fields')
+            if fields:
+                runtime_config['show_columns'] = self._parse_fields(table_schema, table_override, fields)
+            
+            filters = self.query_builder.parse_filters(
+                table_schema, request.args, exclude=self.API_RESERVED_ARGS
+            )
+            
+            query, params = self.query_builder.build_table_query(
+                table_name,
+                table_schema,
+                runtime_config,
+                cursor=cursor,
+                offset=offset,
+                filters=filters
+            )
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        
+        def load():
+            rows, pagination = self.query_builder.paginate(
+                self.query_builder.execute_query(query, params),
+                table_schema,
+                runtime_config,
+                cursor=cursor
+            )
+            
+            # Solo colonne richieste (senza colonne chiave aggiunte per il keyset)
+            columns = self._get_visible_columns(rows.columns, table_schema, table_override, runtime_config)
+            positions = [rows.index[col] for col in columns]
+            
+            page_info = {
+                'limit': pagination['limit'],
+                'next_cursor': pagination['next_cursor'],
+                'prev_cursor': pagination['prev_cursor']
+            }
+            if not cursor:
+                has_more = bool(pagination['next_cursor'] or pagination['next_page'])
+                page_info['offset'] = offset
+                page_info['next_offset'] = offset + pagination['limit'] if has_more else None
+            
+            # Serializzato una volta sola (anche per la cache risultati)
+            return dumps({
+                'table': table_name,
+                'columns': columns,
+                'data': [[row[i] for i in positions] for row in rows],
+                'count': len(rows),
+                'pagination': page_info
+            })
+        
+        try:
+            body = self._load_cached(registry, table_name, query, params, table_override, load, variant='api')
+        except Exception as e:
+            logger.error(f"Error in table API {table_name}: {e}")
+            return json_response({'error': str(e)}, 500)
+        
+        return json_response(body)
+    
+    def _dispatch_export(self, route_path):
+        """
+        Esporta tutte le righe di una tabella/vista in streaming
+        
+        Le righe passano dal cursore server-side al client a blocchi, senza
+        materializzare il risultato: la memoria resta costante anche con
+        milioni di righe. Per le tabelle valgono ?fields= e i filtri dell'API
+        (es. ?IMP_TIME__gte=2024-05-01T00:00:00); ?formatted=1 applica il
+        piano di formattazione della vista.
+        """
+        
+        registry = self.registry
+        kind, name = self._resolve_target(registry, route_path)
+        
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return json_response({'error': f'Unknown export format: {export_format}'}, 400)
+        
+        writer, mimetype, extension = EXPORT_FORMATS[export_format]
+        formatted = request.args.get('formatted', 0, type=int) == 1
+        
+        try:
+            if kind == 'table':
+                result, columns, rows, column_types = self._export_table_rows(registry, name, formatted)
+            else:
+                result, columns, rows, column_types = self._export_view_rows(registry, name, formatted)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        except Exception as e:
+            logger.error(f"Error exporting {name}: {e}")
+            return json_response({'error': str(e)}, 500)
+        
+        try:
+            chunks = writer(columns, rows, column_types)
+            # Il primo blocco verifica il formato (es. pyarrow assente) prima di rispondere
+            first_chunk = next(chunks)
+        except RuntimeError as e:
+            result.close()
+            return json_response({'error': str(e)}, 501)
+        except Exception:
+            result.close()
+            raise
+        
+        def generate():
+            yield first_chunk
+            yield from chunks
+        
+        response = Response(generate(), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}.{extension}"'
+        response.call_on_close(result.close)
+        return response
+    
+    def _export_table_rows(self, registry, table_name, formatted):
+        """
+        Cursore, righe (proiettate sulle colonne visibili) e tipi SQL per l'export di una tabella
+        
+        I tipi servono allo schema Parquet; i valori formattati sono testo, quindi senza tipi.
+        """
+        
+        definition = self.get_table_definition(registry, table_name)
+        table_schema = definition.schema
+        table_override = definition.override
+        
+        runtime_config = {**table_override}
+        fields = request.args.get('fields')
+        if fields:
+            runtime_config['show_columns'] = self._parse_fields(table_schema, table_override, fields)
+        
+        filters = self.query_builder.parse_filters(
+            table_schema, request.args, exclude=self.EXPORT_RESERVED_ARGS
+        )
+        
+        query, params = self.query_builder.build_table_query(
+            table_name, table_schema, runtime_config, filters=filters, unlimited=True
+        )
+        
+        result = self.query_builder.stream_query(query, params, batch_size=self.EXPORT_BATCH_SIZE)
+        columns = self._get_visible_columns(result.columns, table_schema, table_override, runtime_config)
+        
+        if formatted:
+            rows = self._export_formatted(
+                definition.formatter.iter_format_table_data(
+                    result, result.columns, columns, locale=self._request_locale()
                 )
-                
-                # Esegui
-                rows, columns = self.query_builder.execute_query(query)
-                
-                return jsonify({
-                    'table': table_name,
-                    'columns': columns,
-                    'data': rows,
-                    'count': len(rows)
-                })
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
+            )
+            return result, columns, rows, None
+        
+        positions = [result.columns.index(col) for col in columns]
+        rows = ([row[i] for i in positions] for row in result)
+        column_types = {col['name']: col.get('type') for col in table_schema.get('columns', [])}
+        
+        return result, columns, rows, column_types
+    
+    def _export_view_rows(self, registry, view_name, formatted):
+        """Cursore e righe per l'export di una vista custom (colonne senza tipi SQL)"""
+        
+        view_config = registry.overrides['views'][view_name]
+        query, params = self.query_builder.build_custom_query(view_config)
+        
+        result = self.query_builder.stream_query(query, params, batch_size=self.EXPORT_BATCH_SIZE)
+        
+        rows = result
+        if formatted and 'column_overrides' in view_config:
+            rows = self._export_formatted(
+                self._format_custom_rows(
+                    registry, view_name, view_config, result, streaming=True, locale=self._request_locale()
+                )
+            )
+        
+        return result, result.columns, rows, None
+    
+    @staticmethod
+    def _export_formatted(formatted_rows):
+        """Valori leggibili delle celle formattate (testo completo, celle vuote come '')"""
+        
+        for cells in formatted_rows:
+            yield [
+                '' if cell is EMPTY_CELL
+                else cell.raw if cell.is_expandable and not cell.full_content
+                else (cell.full_content or cell.full_text or cell.value)
+                for cell in cells
+            ]
+    
+    def _dispatch_cell(self, table_key):
+        """
+        Contenuto completo di una cella espandibile (XML/JSON), formattato
+        
+        Parametri:
+            key         chiave della riga (JSON dei valori di primary key, attributo data-key)
+            column      colonna da leggere
+        
+        La cella viene letta tramite primary key; il documento formattato è
+        in cache per hash del contenuto, quindi una modifica della riga non
+        restituisce mai un contenuto vecchio.
+        """
+        
+        registry = self.registry
+        table_name = registry.table_index.get(table_key.lower()) if registry else None
+        
+        if table_name is None or self._should_skip_table(table_name, registry.overrides):
+            return json_response({'error': f'Unknown table: {table_key}'}, 404)
+        
+        definition = self.get_table_definition(registry, table_name)
+        table_schema = definition.schema
+        column = request.args.get('column', '')
+        
+        known_columns = {col['name'] for col in table_schema.get('columns', [])}
+        if column not in known_columns or column in definition.override.get('hide_columns', []):
+            return json_response({'error': f'Unknown column: {column}'}, 404)
+        
+        try:
+            key_values = json.loads(request.args.get('key', ''))
+            if not isinstance(key_values, list):
+                raise ValueError("Invalid row key")
+            query, params = self.query_builder.build_cell_query(table_name, table_schema, column, key_values)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        
+        try:
+            rows = self.query_builder.execute_query(query, params)
+        except Exception as e:
+            logger.error(f"Error loading cell {table_name}.{column}: {e}")
+            return json_response({'error': str(e)}, 500)
+        
+        if not rows:
+            return json_response({'error': 'Row not found'}, 404)
+        
+        value = rows[0][0]
+        column_config = definition.override.get('columns', {}).get(column)
+        content = None if value is None else SmartFormatter.pretty_print(value, column, column_config)
+        
+        return json_response({'table': table_name, 'column': column, 'content': content})
+    
+    def _parse_fields(self, table_schema, table_override, fields):
+        """Valida ?fields= sulle colonne visibili della tabella"""
+        
+        available = {
+            col.lower(): col
+            for col in self.query_builder._get_columns_list(table_schema, table_override)
+        }
         
-        api_table.__name__ = f'api_table_{table_name.lower()}'
+        columns = []
+        for field in fields.split(','):
+            column = available.get(field.strip().lower())
+            if column is None:
+                raise ValueError(f"Unknown field: {field.strip()}")
+            if column not in columns:
+                columns.append(column)
         
-        logger.debug(f"✓ Registered API endpoint: {api_path}")
+        return columns
 
 
 class MenuGenerator:
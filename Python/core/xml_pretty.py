@@ -0,0 +1,355 @@
+"""
+XML Pretty - Indentazione XML in streaming con limiti di dimensione e profondità
+"""
+
+import xml.dom.minidom
+from xml.parsers import expat
+from xml.sax.saxutils import escape, quoteattr
+
+try:
+    from lxml import etree
+except ImportError:  # Backend lxml non disponibile
+    etree = None
+
+
+# Byte di input letti al massimo, misurati in UTF-8 per il testo (oltre: output troncato)
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+# Livelli di annidamento mostrati (i livelli più profondi vengono compressi)
+DEFAULT_MAX_DEPTH = 64
+
+# Dimensione dei blocchi passati al tokenizer
+FEED_CHUNK = 64 * 1024
+
+# Blocchi più piccoli per l'anteprima (si ferma appena ha abbastanza righe)
+PREVIEW_CHUNK = 512
+
+INDENT = '  '
+
+
+class XmlFormatError(ValueError):
+    """Documento XML non valido (messaggio con riga e colonna dell'errore)"""
+
+
+class _Budget(Exception):
+    """Interrompe il tokenizer quando l'anteprima ha abbastanza righe"""
+
+
+class _StreamIndenter:
+    """
+    Indenta un documento XML a partire dagli eventi di expat
+    
+    Non costruisce alcun albero: ogni tag viene scritto appena letto,
+    quindi la memoria usata non dipende dalla dimensione del documento.
+    Gli elementi con solo testo restano su una riga (<a>testo</a>), quelli
+    vuoti diventano <a/>. Oltre `max_depth` livelli il contenuto viene
+    sostituito da un commento.
+    """
+    
+    def __init__(self, max_depth, declaration=True, max_lines=None):
+        self.max_depth = max_depth
+        self.declaration = declaration
+        self.max_lines = max_lines
+        
+        self.lines = []
+        self.depth = 0
+        self.open_tag = None     # tag aperto in attesa di '>' o '/>'
+        self.text = []
+        self.in_cdata = False
+        self.skipped = 0         # profondità dentro un sotto-albero compresso
+    
+    def attach(self, parser):
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.XmlDeclHandler = self.xml_decl
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.data
+        parser.CommentHandler = self.comment
+        parser.ProcessingInstructionHandler = self.pi
+        parser.StartCdataSectionHandler = self.start_cdata
+        parser.EndCdataSectionHandler = self.end_cdata
+    
+    def xml_decl(self, version, encoding, standalone):
+        if not self.declaration:
+            return
+        
+        decl = f'<?xml version="{version or "1.0"}"'
+        if encoding:
+            decl += f' encoding="{encoding}"'
+        if standalone != -1:
+            decl += f' standalone="{"yes" if standalone else "no"}"'
+        self._emit(0, decl + '?>')
+    
+    def start(self, name, attributes):
+        if self.skipped:
+            self.skipped += 1
+            return
+        
+        self._close_open_tag()
+        self._flush_text()
+        
+        # Oltre la profondità massima: sotto-albero compresso in un commento
+        if self.depth >= self.max_depth:
+            self.skipped = 1
+            self._emit(self.depth, '<!-- ... -->')
+            return
+        
+        attrs = ''.join(
+            f' {attributes[i]}={quoteattr(attributes[i + 1])}' for i in range(0, len(attributes), 2)
+        )
+        self.open_tag = (name, f'<{name}{attrs}')
+        self.depth += 1
+    
+    def end(self, name):
+        if self.skipped:
+            self.skipped -= 1
+            return
+        
+        if self.open_tag is not None:
+            _, start = self.open_tag
+            text = ''.join(self.text).strip()
+            self.open_tag = None
+            self.text = []
+            self.depth -= 1
+            self._emit(self.depth, f'{start}>{text}</{name}>' if text else f'{start}/>')
+            return
+        
+        self._flush_text()
+        self.depth -= 1
+        self._emit(self.depth, f'</{name}>')
+    
+    def data(self, data):
+        if not self.skipped:
+            self.text.append(data if self.in_cdata else escape(data))
+    
+    def comment(self, data):
+        if self.skipped:
+            return
+        self._close_open_tag()
+        self._flush_text()
+        self._emit(self.depth, f'<!--{data}-->')
+    
+    def pi(self, target, data):
+        if self.skipped:
+            return
+        self._close_open_tag()
+        self._flush_text()
+        self._emit(self.depth, f'<?{target} {data}?>' if data else f'<?{target}?>')
+    
+    def start_cdata(self):
+        if not self.skipped:
+            self.in_cdata = True
+            self.text.append('<![CDATA[')
+    
+    def end_cdata(self):
+        if not self.skipped:
+            self.in_cdata = False
+            self.text.append(']]>')
+    
+    def finish(self):
+        """Chiude il tag rimasto aperto (documento troncato) e scrive il testo in sospeso"""
+        
+        if self.open_tag is not None:
+            self._emit(self.depth - 1, self.open_tag[1] + '>')
+            self.open_tag = None
+        self._flush_text()
+    
+    def _close_open_tag(self):
+        if self.open_tag is not None:
+            self._emit(self.depth - 1, self.open_tag[1] + '>')
+            self.open_tag = None
+    
+    def _flush_text(self):
+        text = ''.join(self.text).strip()
+        self.text = []
+        if text:
+            self._emit(self.depth, text)
+    
+    def _emit(self, depth, line):
+        self.lines.append(INDENT * depth + line)
+        if self.max_lines is not None and len(self.lines) >= self.max_lines:
+            raise _Budget()
+
+
+def _read_head(document, max_bytes):
+    """
+    Primi max_bytes byte di un documento
+    
+    Il testo già decodificato viene codificato in UTF-8 (solo la parte che
+    può rientrare nel limite), così max_bytes vale in byte anche con caratteri
+    multi-byte; la codifica dichiarata nel prologo va allora ignorata.
+    
+    Returns:
+        tuple: (bytes letti, codifica da imporre al parser o None, True se il documento continua)
+    """
+    
+    if isinstance(document, str):
+        head = document[:max_bytes + 1].encode('utf-8')
+        return head[:max_bytes], 'utf-8', len(head) > max_bytes
+    
+    return bytes(document[:max_bytes]), None, len(document) > max_bytes
+
+
+def _syntax_error(e):
+    """XmlFormatError con la posizione dell'errore di expat (riga e colonna da 1)"""
+    
+    return XmlFormatError(f"Invalid XML at line {e.lineno}, column {e.offset + 1}: {expat.ErrorString(e.code)}")
+
+
+def _format_stream(document, max_bytes, max_depth):
+    """Backend in streaming (expat): legge al massimo max_bytes"""
+    
+    data, encoding, truncated = _read_head(document, max_bytes)
+    
+    indenter = _StreamIndenter(max_depth)
+    parser = expat.ParserCreate(encoding)
+    indenter.attach(parser)
+    
+    try:
+        for start in range(0, len(data), FEED_CHUNK):
+            parser.Parse(data[start:start + FEED_CHUNK], False)
+        if not truncated:
+            parser.Parse(b'', True)
+    except expat.ExpatError as e:
+        raise _syntax_error(e)
+    
+    indenter.finish()
+    
+    if truncated:
+        indenter.lines.append(f'<!-- ... truncated after {max_bytes} bytes -->')
+    
+    return '\n'.join(indenter.lines)
+
+
+def _format_lxml(document, max_bytes, max_depth):
+    """Backend lxml (C): parse completo, usato solo entro il limite di byte"""
+    
+    data, encoding, truncated = _read_head(document, max_bytes)
+    if truncated:
+        return _format_stream(document, max_bytes, max_depth)
+    
+    parser = etree.XMLParser(
+        encoding=encoding, remove_blank_text=True, resolve_entities=False, no_network=True
+    )
+    
+    try:
+        root = etree.fromstring(data, parser)
+    except etree.XMLSyntaxError as e:
+        raise XmlFormatError(f"Invalid XML: {e}")
+    
+    # Profondità massima: i figli degli elementi all'ultimo livello diventano un commento
+    collapsed = []
+    depth = 0
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        if event == 'end':
+            depth -= 1
+            continue
+        depth += 1
+        if depth == max_depth and len(element):
+            collapsed.append(element)
+    
+    for element in collapsed:
+        for child in list(element):
+            element.remove(child)
+        element.text = None
+        element.append(etree.Comment(' ... '))
+    
+    return etree.tostring(root, pretty_print=True, encoding='unicode').rstrip('\n')
+
+
+def _format_minidom(document, max_bytes, max_depth):
+    """Backend minidom (DOM completo): riferimento per i benchmark, senza limiti"""
+    
+    try:
+        return xml.dom.minidom.parseString(document).toprettyxml(indent=INDENT)
+    except expat.ExpatError as e:
+        raise _syntax_error(e)
+
+
+# Nome backend -> funzione (document, max_bytes, max_depth) -> str
+BACKENDS = {
+    'stream': _format_stream,
+    'minidom': _format_minidom
+}
+
+if etree is not None:
+    BACKENDS['lxml'] = _format_lxml
+
+
+def get_backend(name='auto'):
+    """
+    Restituisce la funzione di formattazione di un backend
+    
+    'auto' sceglie lxml se installato, altrimenti il backend in streaming.
+    
+    Raises:
+        ValueError: Backend sconosciuto o non installato
+    """
+    
+    if name == 'auto':
+        name = 'lxml' if 'lxml' in BACKENDS else 'stream'
+    
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown or unavailable XML backend: {name}")
+    
+    return backend
+
+
+def pretty_print_xml(document, max_bytes=DEFAULT_MAX_BYTES, max_depth=DEFAULT_MAX_DEPTH, backend='auto'):
+    """
+    Indenta un documento XML entro i limiti dati
+    
+    Args:
+        document: XML (str o bytes)
+        max_bytes: Byte letti al massimo (UTF-8 per il testo); oltre il documento viene troncato
+        max_depth: Livelli di annidamento mostrati
+        backend: 'auto', 'stream', 'lxml' o 'minidom'
+    
+    Returns:
+        str: Documento indentato
+    
+    Raises:
+        XmlFormatError: XML non valido
+    """
+    
+    return get_backend(backend)(document, max_bytes, max_depth)
+
+
+def preview_xml(document, lines=2, max_bytes=4096):
+    """
+    Prime righe indentate di un documento, senza analizzarlo tutto
+    
+    Il tokenizer riceve piccoli blocchi e si ferma appena ha prodotto
+    le righe richieste (al massimo max_bytes letti).
+    
+    Returns:
+        str: Anteprima, con '...' se il documento continua
+    
+    Raises:
+        XmlFormatError: XML non valido nella parte letta
+    """
+    
+    data, encoding, truncated = _read_head(document, max_bytes)
+    
+    indenter = _StreamIndenter(DEFAULT_MAX_DEPTH, declaration=False, max_lines=lines + 1)
+    parser = expat.ParserCreate(encoding)
+    indenter.attach(parser)
+    
+    try:
+        for start in range(0, len(data), PREVIEW_CHUNK):
+            parser.Parse(data[start:start + PREVIEW_CHUNK], False)
+        if not truncated:
+            parser.Parse(b'', True)
+        indenter.finish()
+    except _Budget:
+        pass
+    except expat.ExpatError as e:
+        raise _syntax_error(e)
+    
+    preview = '\n'.join(indenter.lines[:lines])
+    if len(indenter.lines) > lines or truncated:
+        preview += '...'
+    
+    return preview
@@ -0,0 +1,149 @@
+// ============================================
+// AGGIORNAMENTO LIVE DELLA TABELLA (Server-Sent Events)
+// ============================================
+// Il server invia uno snapshot iniziale e poi solo le righe inserite,
+// modificate o rimosse (chiave: primary key). Le righe vengono aggiornate
+// nel DOM senza ricaricare la pagina.
+
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.querySelector('.table-container[data-live-url]');
+    if (!container || !window.EventSource) return;
+
+    const table = container.querySelector('table');
+    const tbody = table.querySelector('tbody');
+    const source = new EventSource(container.dataset.liveUrl);
+
+    // Colonne dell'ultimo snapshot (data-column delle celle espandibili)
+    let columns = [];
+
+    // Snapshot: sostituisce tutte le righe (prima connessione o riconnessione)
+    source.addEventListener('snapshot', function(event) {
+        const data = JSON.parse(event.data);
+
+        columns = data.columns || [];
+        tbody.innerHTML = '';
+        data.rows.forEach(row => tbody.appendChild(createRow(row)));
+
+        renumberRows();
+        setLiveStatus(true);
+    });
+
+    // Delta: aggiorna solo le righe cambiate
+    source.addEventListener('delta', function(event) {
+        const data = JSON.parse(event.data);
+        const rowsByKey = new Map();
+
+        tbody.querySelectorAll('tr[data-key]').forEach(tr => {
+            rowsByKey.set(tr.dataset.key, tr);
+        });
+
+        data.removed.forEach(key => {
+            const tr = rowsByKey.get(key);
+            if (tr) tr.remove();
+            rowsByKey.delete(key);
+        });
+
+        data.updated.forEach(row => {
+            const tr = createRow(row, 'live-updated');
+            const current = rowsByKey.get(row.key);
+            if (current) current.replaceWith(tr);
+            rowsByKey.set(row.key, tr);
+        });
+
+        data.inserted.forEach(row => {
+            rowsByKey.set(row.key, createRow(row, 'live-inserted'));
+        });
+
+        // Riordina secondo l'ordine della query (appendChild sposta le righe esistenti)
+        data.order.forEach(key => {
+            const tr = rowsByKey.get(key);
+            if (tr) tbody.appendChild(tr);
+        });
+
+        renumberRows();
+        reapplySearch();
+    });
+
+    source.addEventListener('poll_error', function(event) {
+        console.warn('Live update failed:', JSON.parse(event.data).error);
+        setLiveStatus(false);
+    });
+
+    // Il browser si ricollega da solo: al ritorno arriva un nuovo snapshot
+    source.onerror = function() {
+        setLiveStatus(false);
+    };
+
+    // Riga con le stesse classi/attributi generati da dynamic_table.html
+    function createRow(row, highlightClass) {
+        const tr = document.createElement('tr');
+        tr.dataset.key = row.key;
+
+        if (hasRowNumbers()) {
+            tr.appendChild(createRowNumberCell(0));
+        }
+
+        row.cells.forEach((cell, index) => {
+            const td = document.createElement('td');
+            td.className = cell.css_class || '';
+
+            if (cell.full_text) td.title = cell.full_text;
+
+            // Contenuto completo caricato al click (xml-popup.js)
+            if (cell.is_expandable) {
+                td.dataset.column = columns[index] || '';
+                if (cell.full_content) td.dataset.fullContent = cell.full_content;
+                td.setAttribute('onclick', 'openXmlPopup(this)');
+                td.style.cursor = 'pointer';
+
+                const pre = document.createElement('pre');
+                pre.textContent = cell.value;
+                td.appendChild(pre);
+            } else {
+                td.textContent = cell.value === null || cell.value === undefined ? '' : cell.value;
+            }
+
+            if (typeof formatTableCell === 'function') formatTableCell(td);
+            tr.appendChild(td);
+        });
+
+        if (highlightClass) {
+            tr.classList.add(highlightClass);
+            setTimeout(() => tr.classList.remove(highlightClass), 3000);
+        }
+
+        return tr;
+    }
+
+    // Colonna # aggiunta da table-formatter.js
+    function hasRowNumbers() {
+        const firstHeader = table.querySelector('thead th');
+        return firstHeader && firstHeader.textContent === '#';
+    }
+
+    function renumberRows() {
+        if (!hasRowNumbers()) return;
+
+        tbody.querySelectorAll('tr').forEach((tr, index) => {
+            let numberCell = tr.querySelector('td.row-number');
+            if (!numberCell) {
+                numberCell = createRowNumberCell(0);
+                tr.insertBefore(numberCell, tr.firstChild);
+            }
+            numberCell.textContent = index + 1;
+        });
+    }
+
+    // Mantiene il filtro della ricerca rapida sulle righe nuove
+    function reapplySearch() {
+        const searchInput = document.getElementById('tableSearch');
+        if (searchInput && searchInput.value) {
+            searchInput.dispatchEvent(new Event('input'));
+        }
+    }
+
+    function setLiveStatus(connected) {
+        container.classList.toggle('live-connected', connected);
+        container.classList.toggle('live-disconnected', !connected);
+    }
+});
@@ -6,42 +6,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const rows = table.querySelectorAll('tbody tr');
     
     rows.forEach(row => {
-        const cells = row.querySelectorAll('td');
-        
-        cells.forEach((cell, index) => {
-            const text = cell.textContent.trim();
-            
-            // Formatta celle vuote o NULL/None
-            if (!text || text === 'NULL' || text === 'None' || text === 'null' || text === 'none') {
-                cell.innerHTML = '<span style="color: #666; font-style: italic;">—</span>';
-                cell.style.textAlign = 'center';
-            }
-            
-            // Formatta date e orari (colonne TIME)
-            if (cell.textContent.match(/\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}/)) {
-                const dateTime = cell.textContent.trim();
-                const [date, time] = dateTime.split(' ');
-                cell.innerHTML = `
-                    <div style="display: flex; flex-direction: column; gap: 2px;">
-                        <span style="color: #aaddff; font-weight: 500;">${date}</span>
-                        <span style="color: #888; font-size: 0.85rem;">${time}</span>
-                    </div>
-                `;
-            }
-            
-            // Formatta ID lunghi (colonne ID)
-            if (text.length > 15 && /^\d+$/.test(text)) {
-                cell.style.fontFamily = 'Courier New, monospace';
-                cell.style.fontSize = '0.85rem';
-                cell.style.letterSpacing = '0.5px';
-            }
-            
-            // Aggiungi tooltip per celle con testo lungo (esclusi XML)
-            if (text.length > 50 && !cell.classList.contains('campo-xml')) {
-                cell.title = text;
-                cell.style.cursor = 'help';
-            }
-        });
+        row.querySelectorAll('td').forEach(formatTableCell);
     });
 
     // Aggiungi numerazione righe (opzionale)
@@ -51,6 +16,42 @@ document.addEventListener('DOMContentLoaded', function() {
     addQuickSearch();
 });
 
+// Formatta una singola cella (usata anche per le righe aggiunte da live-table.js)
+function formatTableCell(cell) {
+    const text = cell.textContent.trim();
+    
+    // Formatta celle vuote o NULL/None
+    if (!text || text === 'NULL' || text === 'None' || text === 'null' || text === 'none') {
+        cell.innerHTML = '<span style="color: #666; font-style: italic;">—</span>';
+        cell.style.textAlign = 'center';
+    }
+    
+    // Formatta date e orari (colonne TIME)
+    if (cell.textContent.match(/\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}/)) {
+        const dateTime = cell.textContent.trim();
+        const [date, time] = dateTime.split(' ');
+        cell.innerHTML = `
+            <div style="display: flex; flex-direction: column; gap: 2px;">
+                <span style="color: #aaddff; font-weight: 500;">${date}</span>
+                <span style="color: #888; font-size: 0.85rem;">${time}</span>
+            </div>
+        `;
+    }
+    
+    // Formatta ID lunghi (colonne ID)
+    if (text.length > 15 && /^\d+$/.test(text)) {
+        cell.style.fontFamily = 'Courier New, monospace';
+        cell.style.fontSize = '0.85rem';
+        cell.style.letterSpacing = '0.5px';
+    }
+    
+    // Aggiungi tooltip per celle con testo lungo (esclusi XML)
+    if (text.length > 50 && !cell.classList.contains('campo-xml')) {
+        cell.title = text;
+        cell.style.cursor = 'help';
+    }
+}
+
 // Funzione per aggiungere numerazione righe
 function addRowNumbers() {
     const table = document.querySelector('table');
@@ -69,16 +70,38 @@ function addRowNumbers() {
     // Aggiungi numero a ogni riga
     const rows = tbody.querySelectorAll('tr');
     rows.forEach((row, index) => {
-        const numberCell = document.createElement('td');
-        numberCell.textContent = index + 1;
-        numberCell.style.textAlign = 'center';
-        numberCell.style.color = '#00aaff';
-        numberCell.style.fontWeight = '600';
-        numberCell.style.fontSize = '0.85rem';
-        row.insertBefore(numberCell, row.firstChild);
+        row.insertBefore(createRowNumberCell(index + 1), row.firstChild);
     });
 }
 
+// Cella con il numero di riga
+function createRowNumberCell(number) {
+    const numberCell = document.createElement('td');
+    numberCell.className = 'row-number';
+    numberCell.textContent = number;
+    numberCell.style.textAlign = 'center';
+    numberCell.style.color = '#00aaff';
+    numberCell.style.fontWeight = '600';
+    numberCell.style.fontSize = '0.85rem';
+    return numberCell;
+}
+
+// Ricarica la pagina con ?q= (ripartendo dalla prima pagina)
+function navigateWithSearch(term) {
+    const params = new URLSearchParams(window.location.search);
+    params.delete('page');
+    params.delete('cursor');
+    
+    if (term) {
+        params.set('q', term);
+    } else {
+        params.delete('q');
+    }
+    
+    const query = params.toString();
+    window.location.href = window.location.pathname + (query ? '?' + query : '');
+}
+
 // Funzione per aggiungere ricerca rapida
 function addQuickSearch() {
     const container = document.querySelector('.table-container');
@@ -136,7 +159,9 @@ function addQuickSearch() {
     const searchInput = document.getElementById('tableSearch');
     const clearBtn = document.getElementById('clearSearch');
     const table = container.querySelector('table');
-    const rows = table.querySelectorAll('tbody tr');
+    
+    // Righe lette a ogni ricerca (live-table.js può aggiungerne o rimuoverne)
+    const getRows = () => table.querySelectorAll('tbody tr');
     
     // Focus styling
     searchInput.addEventListener('focus', function() {
@@ -152,6 +177,7 @@ function addQuickSearch() {
     // Ricerca in tempo reale
     searchInput.addEventListener('input', function() {
         const searchTerm = this.value.toLowerCase();
+        const rows = getRows();
         let visibleCount = 0;
         
         rows.forEach(row => {
@@ -168,9 +194,28 @@ function addQuickSearch() {
         updateResultCount(visibleCount, rows.length);
     });
     
+    // Invio: ricerca sul server (SQL sulle colonne indicizzate) invece che sulle righe della pagina
+    const serverSearch = container.dataset.serverSearch;
+    if (serverSearch !== undefined) {
+        searchInput.value = serverSearch;
+        searchInput.title = 'Invio: cerca in tutta la tabella';
+        
+        searchInput.addEventListener('keydown', function(event) {
+            if (event.key !== 'Enter') return;
+            navigateWithSearch(this.value.trim());
+        });
+    }
+    
     // Pulsante cancella
     clearBtn.addEventListener('click', function() {
+        // Ricerca server attiva: ricarica la tabella senza filtro
+        if (serverSearch) {
+            navigateWithSearch('');
+            return;
+        }
+        
         searchInput.value = '';
+        const rows = getRows();
         rows.forEach(row => row.style.display = '');
         searchInput.focus();
         updateResultCount(rows.length, rows.length);
@@ -82,6 +82,58 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Mostra un contenuto nel popup
+    function showPopup(content) {
+        popupContent.textContent = content;
+        popup.classList.add('show');
+        popup.style.display = 'flex';
+        document.body.style.overflow = "hidden";
+    }
+
+    // ============================================
+    // CARICAMENTO AL CLICK DEL CONTENUTO COMPLETO
+    // ============================================
+    // Le celle di dynamic_table.html contengono solo un'anteprima: il
+    // documento formattato viene richiesto al server (/api/cell/<tabella>)
+    // tramite la chiave della riga (data-key) e la colonna (data-column).
+    function getCellUrl(cell) {
+        const container = cell.closest('.table-container[data-cell-url]');
+        const row = cell.closest('tr[data-key]');
+        if (!container || !row || !cell.dataset.column) return null;
+
+        return container.dataset.cellUrl +
+            '?key=' + encodeURIComponent(row.dataset.key) +
+            '&column=' + encodeURIComponent(cell.dataset.column);
+    }
+
+    window.openXmlPopup = function(cell) {
+        // Già caricato, incluso nella pagina o formattato localmente: nessuna richiesta
+        const content = cell.dataset.fullXml || cell.dataset.fullContent;
+        if (content) {
+            showPopup(content);
+            return;
+        }
+
+        const url = getCellUrl(cell);
+        if (!url) return;
+
+        showPopup('Caricamento...');
+
+        fetch(url)
+            .then(response => response.json().then(data => {
+                if (!response.ok) throw new Error(data.error || response.statusText);
+                return data;
+            }))
+            .then(data => {
+                cell.dataset.fullXml = data.content || '';
+                showPopup(cell.dataset.fullXml);
+            })
+            .catch(err => {
+                console.error('Errore nel caricamento del contenuto: ', err);
+                popupContent.textContent = 'Errore! ' + err.message;
+            });
+    };
+
     // Funzione per chiudere il popup
     function closePopup() {
         popup.classList.remove('show');
@@ -121,8 +173,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Trova tutte le celle XML e aggiungi gli event listener
-    const xmlCells = document.querySelectorAll('.campo-xml');
+    // Celle XML con il contenuto completo già nella pagina (senza data-column):
+    // formattazione lato client e popup immediato
+    const xmlCells = document.querySelectorAll('.campo-xml:not([data-column])');
     
     xmlCells.forEach(cell => {
         const pre = cell.querySelector('pre');
@@ -139,18 +192,13 @@ document.addEventListener('DOMContentLoaded', function() {
             pre.textContent = preview + (lines.length > 2 ? '...' : '');
         }
 
-        // Event listener per mostrare il popup
-        cell.addEventListener('click', function(e) {
-            e.stopPropagation();
-            const fullXml = this.dataset.fullXml;
-            
-            if (fullXml) {
-                popupContent.textContent = fullXml;
-                popup.classList.add('show');
-                popup.style.display = 'flex';
-                document.body.style.overflow = "hidden";
-            }
-        });
+        // Event listener per mostrare il popup (se la cella non usa già openXmlPopup)
+        if (!cell.hasAttribute('onclick')) {
+            cell.addEventListener('click', function(e) {
+                e.stopPropagation();
+                if (this.dataset.fullXml) showPopup(this.dataset.fullXml);
+            });
+        }
 
         // Aggiungi indicatore visivo al hover
         cell.style.cursor = 'pointer';
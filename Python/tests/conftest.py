@@ -0,0 +1,8 @@
+"""
+Configurazione pytest: i test importano i moduli `core` dalla directory Python/
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
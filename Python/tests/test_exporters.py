@@ -0,0 +1,102 @@
+"""
+Test degli export in streaming (schema Parquet dai tipi dello schema)
+"""
+
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from core import exporters
+from core.exporters import iter_csv, iter_ndjson, iter_parquet
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+COLUMNS = ['ID', 'AMOUNT', 'CREATED', 'NOTE', 'PAYLOAD']
+
+COLUMN_TYPES = {
+    'ID': 'INTEGER',
+    'AMOUNT': 'DECIMAL(18, 2)',
+    'CREATED': 'DATETIME',
+    'NOTE': 'NVARCHAR(50) COLLATE "Latin1_General_CI_AS"',
+    'PAYLOAD': 'VARBINARY(max)',
+}
+
+
+def read_parquet(chunks):
+    return pq.read_table(io.BytesIO(b''.join(chunks)))
+
+
+@pytest.mark.parametrize('sql_type, arrow_type', [
+    ('INTEGER', pa.int32()),
+    ('BIGINT', pa.int64()),
+    ('BIT', pa.bool_()),
+    ('DECIMAL(18, 2)', pa.decimal128(18, 2)),
+    ('NUMERIC(10)', pa.decimal128(10, 0)),
+    ('MONEY', pa.decimal128(19, 4)),
+    ('FLOAT(53)', pa.float64()),
+    ('DATETIME2', pa.timestamp('us')),
+    ('NVARCHAR(50) COLLATE "Latin1_General_CI_AS"', pa.string()),
+    ('UNIQUEIDENTIFIER', pa.string()),
+    (None, pa.string()),
+])
+def test_parquet_type(sql_type, arrow_type):
+    assert exporters.parquet_type(sql_type) == arrow_type
+
+
+def test_parquet_schema_does_not_depend_on_first_row_group(monkeypatch):
+    monkeypatch.setattr(exporters, 'PARQUET_ROW_GROUP', 2)
+    
+    # Primo row group con colonne tutte NULL, valori solo nei successivi
+    rows = [
+        (1, None, None, None, None),
+        (2, None, None, None, None),
+        (3, Decimal('12.50'), datetime(2025, 1, 2, 3, 4, 5), 'x', b'\x00\x01'),
+        (4, Decimal('-1.00'), None, 'y', None),
+        (5, None, datetime(2025, 6, 1), None, b''),
+    ]
+    
+    table = read_parquet(iter_parquet(COLUMNS, rows, COLUMN_TYPES))
+    
+    assert table.schema.types == [pa.int32(), pa.decimal128(18, 2), pa.timestamp('us'), pa.string(), pa.binary()]
+    assert table.num_rows == 5
+    assert table.column('AMOUNT').to_pylist() == [None, None, Decimal('12.50'), Decimal('-1.00'), None]
+    assert table.column('PAYLOAD').to_pylist()[2] == b'\x00\x01'
+
+
+def test_parquet_untyped_columns_are_strings():
+    rows = [(1, Decimal('1.5'), datetime(2025, 1, 2), 'x', b'\xff'), (None, None, None, None, None)]
+    
+    table = read_parquet(iter_parquet(COLUMNS, rows))
+    
+    assert set(table.schema.types) == {pa.string()}
+    assert table.to_pylist()[0] == {
+        'ID': '1', 'AMOUNT': '1.5', 'CREATED': '2025-01-02T00:00:00', 'NOTE': 'x', 'PAYLOAD': 'ff'
+    }
+
+
+def test_parquet_empty_export_keeps_schema():
+    table = read_parquet(iter_parquet(COLUMNS, [], COLUMN_TYPES))
+    
+    assert table.num_rows == 0
+    assert table.schema.names == COLUMNS
+    assert table.schema.field('AMOUNT').type == pa.decimal128(18, 2)
+
+
+def test_csv_and_ndjson_ignore_column_types():
+    rows = [(1, Decimal('1.50'), None, 'x', None)]
+    
+    assert ''.join(iter_csv(COLUMNS, rows, COLUMN_TYPES)) == 'ID,AMOUNT,CREATED,NOTE,PAYLOAD\r\n1,1.50,,x,\r\n'
+    assert b''.join(iter_ndjson(COLUMNS, rows, COLUMN_TYPES)).count(b'\n') == 1
+
+
+def test_parquet_casts_driver_values_of_another_type():
+    rows = [(1, '12.50', '2025-01-02 03:04:05', 'x', None)]
+    
+    table = read_parquet(iter_parquet(COLUMNS, rows, COLUMN_TYPES))
+    
+    assert table.column('AMOUNT').to_pylist() == [Decimal('12.50')]
+    assert table.column('CREATED').to_pylist() == [datetime(2025, 1, 2, 3, 4, 5)]
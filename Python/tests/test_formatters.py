@@ -0,0 +1,91 @@
+"""
+Test della formattazione per colonna (format_table_data) rispetto a quella per riga
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from core.formatters import EMPTY_CELL, SmartFormatter, TableFormatter
+from core.locale_format import register_locale
+
+
+SCHEMA = {
+    'columns': [
+        {'name': 'ID', 'suggested_formatter': 'monospace_id'},
+        {'name': 'QTY', 'suggested_formatter': 'number'},
+        {'name': 'PRICE', 'suggested_formatter': 'decimal'},
+        {'name': 'WEIGHT', 'suggested_formatter': 'decimal'},
+        {'name': 'CREATED', 'suggested_formatter': 'datetime'},
+        {'name': 'STATUS', 'suggested_formatter': 'status_badge'},
+        {'name': 'ENABLED', 'suggested_formatter': 'boolean'},
+        {'name': 'NOTE', 'suggested_formatter': 'text'},
+        {'name': 'XML', 'suggested_formatter': 'expandable_code'},
+    ]
+}
+
+OVERRIDES = {'columns': {'WEIGHT': {'decimals': 3}, 'NOTE': {'max_length': 5}}}
+
+COLUMNS = tuple(col['name'] for col in SCHEMA['columns'])
+
+ROWS = [
+    (1, 1500, Decimal('12.50'), 0.5, datetime(2025, 1, 2, 3, 4, 5), 'COMPL', 1, 'short', '<a><b>x</b></a>'),
+    (2, 1500, Decimal('12.50'), 0.5, datetime(2025, 1, 2, 3, 4, 5), 'WAIT', 0, 'a longer note', '{"a": 1}'),
+    (3, None, Decimal('12.5'), -0.0, None, 'ERR', 'yes', '', None),
+    (4, '7', Decimal('-0.00'), 0.0, datetime(999, 1, 1), 'OTHER', True, 'x', '<a>'),
+    (5, 'n/a', 'abc', float('nan'), '2025-01-01', '', False, None, 'plain text'),
+    (6, -3, Decimal('1234567.891'), 1e20, datetime(2025, 6, 7, 8, 9, 10, 500), 'COMPL', None, 'y', ''),
+]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def english_locale():
+    register_locale('en', {'thousands_separator': ',', 'decimal_separator': '.', 'datetime_format': '%d/%m/%Y %H:%M'})
+
+
+def as_dicts(rows):
+    return [[cell.to_dict() for cell in row] for row in rows]
+
+
+@pytest.mark.parametrize('locale', [None, 'it', 'en'])
+def test_columnar_and_streaming_formatting_match(locale):
+    formatter = TableFormatter(SCHEMA, OVERRIDES)
+    
+    columnar = formatter.format_table_data(ROWS, COLUMNS, key_columns=['ID'], locale=locale)
+    streamed = list(formatter.iter_format_table_data(ROWS, COLUMNS, key_columns=['ID'], locale=locale))
+    
+    assert as_dicts(columnar) == as_dicts(streamed)
+    assert [row.key for row in columnar] == [row.key for row in streamed] == [f'[{i}]' for i in range(1, 7)]
+
+
+def test_visible_columns_match():
+    formatter = TableFormatter(SCHEMA, OVERRIDES)
+    visible = ('PRICE', 'ID')
+    
+    columnar = formatter.format_table_data(ROWS, COLUMNS, visible)
+    streamed = list(formatter.iter_format_table_data(ROWS, COLUMNS, visible))
+    
+    assert as_dicts(columnar) == as_dicts(streamed)
+    assert [len(row) for row in columnar] == [2] * len(ROWS)
+
+
+def test_decimal_column_reuses_cells_for_repeated_values():
+    cells = SmartFormatter.format_column(
+        [Decimal('12.50'), Decimal('12.50'), Decimal('12.5'), 2.5, 2.5], 'decimal', locale='it'
+    )
+    
+    assert [cell.value for cell in cells] == ['12,50', '12,50', '12,50', '2,50', '2,50']
+    assert cells[0] is cells[1]
+    assert cells[3] is cells[4]
+    
+    # Stesso valore numerico, testo diverso: raw conservato
+    assert cells[2] is not cells[0] and cells[2].raw == Decimal('12.5')
+
+
+def test_decimal_column_falls_back_to_text():
+    cells = SmartFormatter.format_column(['abc', Decimal('NaN'), None], 'decimal', locale='it')
+    
+    assert cells[0].value == 'abc'
+    assert cells[1].value == 'nan'
+    assert cells[2] is EMPTY_CELL
@@ -0,0 +1,313 @@
+"""
+Test della paginazione keyset di QueryBuilder (cursori, pagine prev/next, fallback OFFSET)
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from core.query_builder import IncrementalWindow, QueryBuilder
+from core.result_set import ResultSet
+
+
+SCHEMA = {
+    'name': 'T',
+    'columns': [
+        {'name': 'ID', 'type': 'INT', 'nullable': False},
+        {'name': 'STATUS', 'type': 'NVARCHAR', 'nullable': False},
+        {'name': 'NOTE', 'type': 'NVARCHAR', 'nullable': True},
+    ],
+    'primary_keys': ['ID'],
+    'indexes': [],
+}
+
+# 25 righe, STATUS con valori ripetuti (tie-breaker sulla primary key)
+ROWS = [(i, f'S{i % 4}', None if i % 3 else f'n{i}') for i in range(1, 26)]
+
+
+@pytest.fixture
+def builder():
+    return QueryBuilder(None, coalesce=False)
+
+
+def run_page(builder, engine, config, cursor=None, page=None):
+    """Esegue la query di una pagina su SQLite e applica paginate"""
+    
+    query, params = builder.build_table_query('T', SCHEMA, config, page=page, cursor=cursor)
+    
+    # Dialetto SQLite: TOP e OFFSET/FETCH diventano LIMIT
+    if 'SELECT TOP (:top_n) ' in query:
+        query = query.replace('SELECT TOP (:top_n) ', 'SELECT ') + ' LIMIT :top_n'
+    query = query.replace(' OFFSET :offset_rows ROWS FETCH NEXT :fetch_rows ROWS ONLY',
+                          ' LIMIT :fetch_rows OFFSET :offset_rows')
+    
+    with engine.connect() as conn:
+        result = conn.execute(text(query), params)
+        rows = ResultSet(result.keys(), [tuple(row) for row in result])
+    
+    return builder.paginate(rows, SCHEMA, config, page=page, cursor=cursor)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE T (ID INTEGER PRIMARY KEY, STATUS TEXT NOT NULL, NOTE TEXT)'))
+        conn.execute(text('INSERT INTO T VALUES (:i, :s, :n)'), [{'i': i, 's': s, 'n': n} for i, s, n in ROWS])
+    return engine
+
+
+@pytest.mark.parametrize('value', [
+    42, 'WAIT', None, Decimal('12.50'), datetime(2025, 1, 2, 3, 4, 5), date(2025, 1, 2), b'\x00\x01'
+])
+def test_cursor_round_trip(builder, value):
+    keyset = [('ID', 'ASC')]
+    cursor = builder.encode_cursor((value,), ('ID',), keyset, 'next')
+    
+    decoded = builder.decode_cursor(cursor)
+    
+    assert decoded == {'direction': 'next', 'values': [value]}
+    assert type(decoded['values'][0]) is type(value)
+
+
+@pytest.mark.parametrize('cursor', ['x', 'e30=', 'eyJkIjoidXAiLCJ2IjpbXX0='])
+def test_decode_cursor_rejects_invalid(builder, cursor):
+    with pytest.raises(ValueError):
+        builder.decode_cursor(cursor)
+
+
+def test_keyset_adds_primary_key_tie_breaker(builder):
+    assert builder.get_keyset_columns(SCHEMA, {'order_by': 'STATUS DESC'}) == [('STATUS', 'DESC'), ('ID', 'DESC')]
+    assert builder.get_keyset_columns(SCHEMA, {'order_by': 'ID'}) == [('ID', 'ASC')]
+
+
+def test_keyset_disabled_for_nullable_order_by(builder):
+    assert builder.get_keyset_columns(SCHEMA, {'order_by': 'NOTE'}) is None
+    
+    # Metadati senza `nullable`: considerata nullable
+    schema = {**SCHEMA, 'columns': [{'name': 'ID'}]}
+    assert builder.get_keyset_columns(schema, {'order_by': 'ID'}) is None
+
+
+def test_keyset_disabled_without_primary_key(builder):
+    assert builder.get_keyset_columns({**SCHEMA, 'primary_keys': []}, {'order_by': 'STATUS'}) is None
+
+
+def test_seek_predicate_follows_direction(builder):
+    query, params = builder.build_table_query(
+        'T', SCHEMA, {'order_by': 'STATUS DESC'},
+        cursor=builder.encode_cursor(('S1', 5), ('STATUS', 'ID'), [('STATUS', 'DESC'), ('ID', 'DESC')], 'next')
+    )
+    
+    assert '((STATUS < :seek_0) OR (STATUS = :seek_0 AND ID < :seek_1))' in query
+    assert query.endswith('ORDER BY STATUS DESC, ID DESC')
+    assert params['seek_0'] == 'S1' and params['seek_1'] == 5
+    
+    # Pagina precedente: operatori e ordinamento invertiti
+    query, _ = builder.build_table_query(
+        'T', SCHEMA, {'order_by': 'STATUS DESC'},
+        cursor=builder.encode_cursor(('S1', 5), ('STATUS', 'ID'), [('STATUS', 'DESC'), ('ID', 'DESC')], 'prev')
+    )
+    
+    assert '((STATUS > :seek_0) OR (STATUS = :seek_0 AND ID > :seek_1))' in query
+    assert query.endswith('ORDER BY STATUS ASC, ID ASC')
+
+
+def test_cursor_rejected_without_keyset(builder):
+    cursor = builder.encode_cursor(('x', 1), ('NOTE', 'ID'), [('NOTE', 'ASC'), ('ID', 'ASC')], 'next')
+    
+    with pytest.raises(ValueError):
+        builder.build_table_query('T', SCHEMA, {'order_by': 'NOTE'}, cursor=cursor)
+
+
+def test_first_page_has_only_next_cursor(builder):
+    config = {'order_by': 'ID', 'default_limit': 3}
+    rows = ResultSet(('ID', 'STATUS', 'NOTE'), ROWS[:4])
+    
+    page, pagination = builder.paginate(rows, SCHEMA, config)
+    
+    assert [row[0] for row in page] == [1, 2, 3]
+    assert pagination['prev_cursor'] is None
+    assert builder.decode_cursor(pagination['next_cursor']) == {'direction': 'next', 'values': [3]}
+
+
+def test_last_page_has_no_next_cursor(builder):
+    config = {'order_by': 'ID', 'default_limit': 3}
+    cursor = builder.encode_cursor((22,), ('ID',), [('ID', 'ASC')], 'next')
+    rows = ResultSet(('ID', 'STATUS', 'NOTE'), ROWS[22:])
+    
+    page, pagination = builder.paginate(rows, SCHEMA, config, cursor=cursor)
+    
+    assert [row[0] for row in page] == [23, 24, 25]
+    assert pagination['next_cursor'] is None
+    assert builder.decode_cursor(pagination['prev_cursor']) == {'direction': 'prev', 'values': [23]}
+
+
+def test_prev_page_rows_are_reversed(builder):
+    config = {'order_by': 'ID', 'default_limit': 3}
+    cursor = builder.encode_cursor((4,), ('ID',), [('ID', 'ASC')], 'prev')
+    
+    # Query 'prev': righe lette in ordine inverso (3, 2, 1), nessuna riga in più
+    rows = ResultSet(('ID', 'STATUS', 'NOTE'), ROWS[2::-1])
+    page, pagination = builder.paginate(rows, SCHEMA, config, cursor=cursor)
+    
+    assert [row[0] for row in page] == [1, 2, 3]
+    assert pagination['prev_cursor'] is None
+    assert builder.decode_cursor(pagination['next_cursor'])['values'] == [3]
+
+
+def test_nullable_order_by_uses_page_numbers(builder):
+    rows = ResultSet(('ID', 'STATUS', 'NOTE'), ROWS[:4])
+    
+    _, pagination = builder.paginate(rows, SCHEMA, {'order_by': 'NOTE', 'default_limit': 3})
+    
+    assert pagination['page'] == 1 and pagination['next_page'] == 2
+    assert pagination['next_cursor'] is None and pagination['prev_cursor'] is None
+
+
+@pytest.mark.parametrize('order_by, full_order', [
+    ('ID', 'ID'),
+    ('ID DESC', 'ID DESC'),
+    ('STATUS', 'STATUS, ID'),
+    ('STATUS DESC', 'STATUS DESC, ID DESC'),
+])
+def test_cursor_walk_visits_every_row(builder, engine, order_by, full_order):
+    config = {'order_by': order_by, 'default_limit': 4}
+    
+    # Avanti fino all'ultima pagina
+    pages = []
+    page, pagination = run_page(builder, engine, config)
+    pages.append([row[0] for row in page])
+    while pagination['next_cursor']:
+        page, pagination = run_page(builder, engine, config, cursor=pagination['next_cursor'])
+        pages.append([row[0] for row in page])
+    
+    with engine.connect() as conn:
+        expected = [row[0] for row in conn.execute(text(f'SELECT ID FROM T ORDER BY {full_order}'))]
+    assert [row_id for ids in pages for row_id in ids] == expected
+    
+    # Indietro fino alla prima pagina: stesse pagine in ordine inverso
+    back = [pages[-1]]
+    while pagination['prev_cursor']:
+        page, pagination = run_page(builder, engine, config, cursor=pagination['prev_cursor'])
+        back.append([row[0] for row in page])
+    assert back[::-1] == pages
+
+
+def test_nullable_order_by_walk_keeps_null_rows(builder, engine):
+    config = {'order_by': 'NOTE', 'default_limit': 4}
+    
+    seen = []
+    page_number = 1
+    while page_number:
+        page, pagination = run_page(builder, engine, config, page=page_number)
+        seen.extend(row[0] for row in page)
+        page_number = pagination['next_page']
+    
+    assert sorted(seen) == list(range(1, 26))
+
+
+def test_nullable_order_by_keeps_unique_ordering(builder):
+    config = {'order_by': 'NOTE DESC', 'show_columns': ['NOTE'], 'default_limit': 3}
+    query, _ = builder.build_table_query('T', SCHEMA, config, page=2)
+    
+    # Tie-breaker sulla primary key anche senza cursori: pagine OFFSET deterministiche
+    assert query.startswith('SELECT NOTE, ID FROM T')
+    assert 'ORDER BY NOTE DESC, ID DESC OFFSET' in query
+
+
+def test_incremental_settings_accept_nullable_order_by(builder):
+    settings = builder.get_incremental_settings(SCHEMA, {'order_by': 'NOTE DESC', 'incremental': 'ID'})
+    
+    assert settings['column'] == 'ID'
+    assert builder.get_incremental_settings({**SCHEMA, 'primary_keys': []}, {'incremental': 'ID'}) is None
+    assert builder.get_incremental_settings(SCHEMA, {'incremental': 'MISSING'}) is None
+
+
+def make_window(size=3, keyset=(('NOTE', 'DESC'), ('ID', 'DESC'))):
+    window = IncrementalWindow(list(keyset), size, ['ID'])
+    window.load(ResultSet(('ID', 'NOTE'), [(1, 'a'), (2, 'b'), (3, 'c')]), 3)
+    return window
+
+
+def test_window_merge_replaces_rows_by_primary_key():
+    window = make_window()
+    
+    # Riga 1 con colonna di ordinamento modificata: sostituisce la precedente
+    window.merge(ResultSet(('NOTE', 'ID'), [('z', 1)]), 3, 'ID')
+    
+    assert list(window.result()) == [(1, 'z'), (3, 'c'), (2, 'b')]
+    assert window.stats == {'full_loads': 1, 'incremental_loads': 1, 'rows_fetched': 4}
+
+
+def test_window_merge_evicts_rows_beyond_size():
+    window = make_window()
+    
+    window.merge(ResultSet(('ID', 'NOTE', 'EXTRA'), [(4, 'd', 0), (5, 'e', 0)]), 5, 'ID')
+    
+    assert list(window.result()) == [(5, 'e'), (4, 'd'), (3, 'c')]
+    assert set(window.rows) == {(3,), (4,), (5,)}
+    assert window.watermark == 5
+
+
+def test_window_sorts_nulls_like_sql_server():
+    window = make_window(size=4)
+    window.merge(ResultSet(('ID', 'NOTE'), [(4, None)]), 4, 'ID')
+    
+    # DESC: NULL per ultimi
+    assert [row[0] for row in window.result()] == [3, 2, 1, 4]
+    
+    # ASC: NULL per primi
+    window.keyset = [('NOTE', 'ASC'), ('ID', 'ASC')]
+    assert [row[0] for row in window.result()] == [4, 1, 2, 3]
+
+
+def test_window_empty_merge_keeps_watermark():
+    window = make_window()
+    
+    window.merge(ResultSet(('ID', 'NOTE'), []), None, 'ID')
+    
+    assert window.watermark == 3
+    assert len(window.result()) == 3
+
+
+def template_view(template, **parameters):
+    return {'query_type': 'template', 'query_template': template, 'parameters': parameters}
+
+
+@pytest.mark.parametrize('template, expected', [
+    ("SELECT TOP {n} * FROM T", "SELECT TOP (:n) * FROM T"),
+    ("SELECT TOP ({n}) * FROM T", "SELECT TOP (:n) * FROM T"),
+    ("SELECT * FROM T WHERE STATUS = '{s}'", "SELECT * FROM T WHERE STATUS = :s"),
+    ("SELECT * FROM T WHERE ID > {n}", "SELECT * FROM T WHERE ID > :n"),
+    ("SELECT * FROM T WHERE NOTE LIKE '%{s}%'", "SELECT * FROM T WHERE NOTE LIKE CONCAT('%', :s, '%')"),
+    ("SELECT * FROM T WHERE NOTE = 'it''s {s}'", "SELECT * FROM T WHERE NOTE = CONCAT('it''s ', :s)"),
+    ("SELECT '{other}' AS X FROM T WHERE ID = {n}", "SELECT '{other}' AS X FROM T WHERE ID = :n"),
+])
+def test_template_binds_values(builder, template, expected):
+    query, params = builder.build_custom_query(template_view(template, n=5, s='WAIT'))
+    
+    assert query == expected
+    assert all(f':{name}' in query for name in params)
+
+
+def test_template_passes_only_referenced_params(builder):
+    _, params = builder.build_custom_query(
+        template_view("SELECT TOP {n} * FROM T WHERE STATUS = '{s}'", n=5, s='WAIT', unused='x')
+    )
+    
+    assert params == {'n': 5, 's': 'WAIT'}
+
+
+@pytest.mark.parametrize('template', [
+    "SELECT * FROM {table}",
+    "SELECT * FROM T JOIN {table} ON 1 = 1",
+    "SELECT * FROM T ORDER BY {table}",
+    "SELECT * FROM {table}.dbo.T",
+    "SELECT T.{table} FROM T",
+])
+def test_template_rejects_identifier_placeholders(builder, template):
+    with pytest.raises(ValueError, match='identifier'):
+        builder.build_custom_query(template_view(template, table='T'))
@@ -0,0 +1,169 @@
+"""
+Test della coalescenza di SingleFlight (tra thread e tra processi con lock_dir)
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from core import single_flight
+from core.single_flight import SingleFlight
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached')
+        time.sleep(0.01)
+
+
+def run_concurrently(flight, key, func, callers):
+    """Chiama flight.do da più thread; restituisce (risultati, errori)"""
+    
+    results, errors = [], []
+    
+    def call():
+        try:
+            results.append(flight.do(key, func))
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+    
+    def query():
+        executions.append(1)
+        release.wait(5)
+        return ['row']
+    
+    threads, results, errors = run_concurrently(flight, 'q', query, 5)
+    
+    # Il leader resta in esecuzione finché tutti gli altri non sono in attesa
+    wait_until(lambda: flight.stats['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert executions == [1]
+    assert errors == []
+    assert len(results) == 5 and all(result is results[0] for result in results)
+    assert flight.stats == {'executions': 1, 'coalesced': 4}
+
+
+def test_leader_exception_reaches_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+    
+    def query():
+        release.wait(5)
+        raise RuntimeError('timeout')
+    
+    threads, results, errors = run_concurrently(flight, 'q', query, 3)
+    
+    wait_until(lambda: flight.stats['coalesced'] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert results == []
+    assert len(errors) == 3 and all(str(e) == 'timeout' for e in errors)
+    
+    # La chiamata fallita non resta registrata: la successiva esegue di nuovo
+    assert flight.do('q', lambda: 'ok') == 'ok'
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats == {'executions': 2, 'coalesced': 0}
+
+
+needs_fcntl = pytest.mark.skipif(single_flight.fcntl is None, reason='cross-process coalescing requires fcntl')
+
+
+def _leader_process(lock_dir, marker_dir, queue):
+    def query():
+        with open(os.path.join(marker_dir, 'executions'), 'a') as f:
+            f.write('x\n')
+        open(os.path.join(marker_dir, 'started'), 'w').close()
+        time.sleep(1)
+        return {'rows': [1, 2, 3]}
+    
+    queue.put(('leader', SingleFlight(lock_dir).do('q', query)))
+
+
+def _follower_process(lock_dir, marker_dir, queue):
+    def query():
+        with open(os.path.join(marker_dir, 'executions'), 'a') as f:
+            f.write('x\n')
+        return {'rows': 'follower'}
+    
+    flight = SingleFlight(lock_dir)
+    queue.put(('follower', flight.do('q', query), flight.stats['coalesced']))
+
+
+@needs_fcntl
+def test_processes_share_result_and_clean_up(tmp_path):
+    lock_dir, marker_dir = tmp_path / 'locks', tmp_path / 'markers'
+    marker_dir.mkdir()
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    
+    leader = context.Process(target=_leader_process, args=(str(lock_dir), str(marker_dir), queue))
+    leader.start()
+    wait_until(lambda: (marker_dir / 'started').exists())
+    
+    follower = context.Process(target=_follower_process, args=(str(lock_dir), str(marker_dir), queue))
+    follower.start()
+    
+    messages = {message[0]: message[1:] for message in (queue.get(timeout=10), queue.get(timeout=10))}
+    leader.join(5)
+    follower.join(5)
+    
+    assert (marker_dir / 'executions').read_text() == 'x\n'
+    assert messages['leader'] == ({'rows': [1, 2, 3]},)
+    assert messages['follower'] == ({'rows': [1, 2, 3]}, 1)
+    
+    # Restano solo i lock file: risultato condiviso e marker .wait eliminati
+    assert [path.suffix for path in lock_dir.iterdir()] == ['.lock']
+
+
+@needs_fcntl
+def test_result_not_written_without_waiters(tmp_path):
+    flight = SingleFlight(tmp_path)
+    
+    assert flight.do('q', lambda: 'value') == 'value'
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.lock']
+
+
+@needs_fcntl
+def test_sweep_removes_stale_files(tmp_path):
+    flight = SingleFlight(tmp_path)
+    flight.do('q', lambda: 'value')
+    
+    stale = tmp_path / 'old.result'
+    stale.write_bytes(b'')
+    old = time.time() - SingleFlight.STALE_AFTER - 10
+    os.utime(stale, (old, old))
+    
+    # Pulizia al più ogni SWEEP_INTERVAL: la prima è già avvenuta in do()
+    flight._sweep(time.time())
+    assert stale.exists()
+    
+    flight._sweep(time.time() + SingleFlight.SWEEP_INTERVAL + 1)
+    assert not stale.exists()
+    assert len(list(tmp_path.glob('*.lock'))) == 1
@@ -0,0 +1,34 @@
+"""
+Test della registrazione delle viste custom in ViewGenerator
+"""
+
+import logging
+
+from flask import Flask
+from sqlalchemy import create_engine
+
+from core.view_generator import ViewGenerator
+
+
+def test_invalid_template_view_is_rejected_at_load(caplog):
+    overrides = {
+        'global': {},
+        'views': {
+            'by_status': {
+                'query_type': 'template',
+                'query_template': "SELECT * FROM T WHERE STATUS = '{status}'",
+                'parameters': {'status': 'WAIT'},
+            },
+            'by_table': {
+                'query_type': 'template',
+                'query_template': 'SELECT * FROM {table}',
+                'parameters': {'table': 'T'},
+            },
+        },
+    }
+    
+    with caplog.at_level(logging.ERROR, logger='core.view_generator'):
+        generator = ViewGenerator(Flask(__name__), create_engine('sqlite://'), schema={}, overrides=overrides)
+    
+    assert generator.registry.routes == {'/by_status': ('view', 'by_status')}
+    assert 'by_table' in caplog.text and 'identifier' in caplog.text
@@ -0,0 +1,93 @@
+"""
+Test dell'indentazione XML in streaming (limiti di dimensione e profondità, errori)
+"""
+
+import pytest
+
+from core.xml_pretty import BACKENDS, XmlFormatError, pretty_print_xml, preview_xml
+
+
+# Backend con limiti (minidom è solo il riferimento dei benchmark)
+LIMITED_BACKENDS = [name for name in ('stream', 'lxml') if name in BACKENDS]
+
+
+def nested(depth):
+    return '<n>' * depth + 'x' + '</n>' * depth
+
+
+def test_indents_document():
+    assert pretty_print_xml('<a x="1"><b>t</b><c/></a>', backend='stream') == '<a x="1">\n  <b>t</b>\n  <c/>\n</a>'
+
+
+@pytest.mark.parametrize('backend', LIMITED_BACKENDS)
+def test_max_bytes_counts_utf8_bytes_of_text(backend):
+    document = '<a><b>' + 'é' * 20 + '</b></a>'
+    
+    # 20 byte: '<a><b>' (6) e 7 caratteri 'é' (2 byte ciascuno)
+    output = pretty_print_xml(document, max_bytes=20, backend=backend)
+    
+    assert 'é' * 7 in output and 'é' * 8 not in output
+    assert output.endswith('<!-- ... truncated after 20 bytes -->')
+
+
+@pytest.mark.parametrize('backend', LIMITED_BACKENDS)
+def test_document_within_max_bytes_is_not_truncated(backend):
+    document = '<a>' + 'é' * 5 + '</a>'
+    
+    output = pretty_print_xml(document, max_bytes=len(document.encode('utf-8')), backend=backend)
+    
+    assert output == document
+
+
+def test_max_bytes_applies_to_bytes_input():
+    document = ('<a>' + '<b>1</b>' * 100 + '</a>').encode('utf-8')
+    
+    output = pretty_print_xml(document, max_bytes=35, backend='stream')
+    
+    assert output.count('<b>1</b>') == 4
+    assert 'truncated after 35 bytes' in output
+
+
+@pytest.mark.parametrize('backend', LIMITED_BACKENDS)
+def test_max_depth_collapses_deeper_levels(backend):
+    output = pretty_print_xml(nested(5), max_depth=2, backend=backend)
+    
+    assert output.count('<n>') == 2
+    assert '<!-- ... -->' in output
+    assert 'x' not in output.replace('<!-- ... -->', '')
+
+
+def test_text_ignores_declared_encoding():
+    document = '<?xml version="1.0" encoding="ISO-8859-1"?><a>è</a>'
+    
+    assert pretty_print_xml(document, backend='stream').endswith('<a>è</a>')
+    assert pretty_print_xml(document.encode('latin-1'), backend='stream').endswith('<a>è</a>')
+
+
+@pytest.mark.parametrize('backend', ['stream', 'minidom'])
+def test_error_reports_line_and_column(backend):
+    with pytest.raises(XmlFormatError, match=r'line 2, column 7: mismatched tag'):
+        pretty_print_xml('<a>\n <b></a>', backend=backend)
+
+
+def test_error_column_counts_characters_before_error():
+    # Secondo '<' in posizione 6: 'é' conta come un carattere, non come due byte
+    with pytest.raises(XmlFormatError, match=r'line 1, column 6:'):
+        pretty_print_xml('<a>é<</a>', backend='stream')
+
+
+def test_preview_stops_after_requested_lines():
+    document = '<a>' + '<b>1</b>' * 10000 + '</a>'
+    
+    assert preview_xml(document) == '<a>\n  <b>1</b>...'
+    assert preview_xml('<a><b>1</b></a>', lines=5) == '<a>\n  <b>1</b>\n</a>'
+
+
+def test_preview_reports_errors_in_read_part():
+    with pytest.raises(XmlFormatError, match=r'line 1, column \d+'):
+        preview_xml('<a><b></c></a>')
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        pretty_print_xml('<a/>', backend='missing')
@@ -95,6 +95,11 @@ class TranslationManager:
                 "language_name": "Italiano",
                 "language_code": "it"
             },
+            "format": {
+                "thousands_separator": ".",
+                "decimal_separator": ",",
+                "datetime_format": "%Y-%m-%d %H:%M:%S"
+            },
             "header": {
                 "title": "Systore API Dashboard",
                 "subtitle": "Visualizza e gestisci i dati del tuo Impianto",
@@ -209,6 +214,11 @@ class TranslationManager:
                 "language_name": "English",
                 "language_code": "en"
             },
+            "format": {
+                "thousands_separator": ",",
+                "decimal_separator": ".",
+                "datetime_format": "%Y-%m-%d %H:%M:%S"
+            },
             "header": {
                 "title": "Systore API Dashboard",
                 "subtitle": "View and manage your Plant data",